@@ -8,10 +8,20 @@ import sys
 import time
 import pandas as pd
 import numpy as np
+from backend.data.fleet_generator import generate_fleet
+from backend.utils.constants import TRAIN_NAMES
+from backend.utils.single_flight import canonical_key, coalesce
 
 app = Flask(__name__)
 CORS(app)
 
+# Optional: push job updates over SocketIO when flask_socketio is installed
+try:
+    from flask_socketio import SocketIO
+    socketio = SocketIO(app, cors_allowed_origins='*')
+except ImportError:
+    socketio = None
+
 # Add paths for algorithm modules
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
@@ -1516,11 +1526,32 @@ def get_maintenance_data():
 @app.route('/api/comprehensive_optimization', methods=['POST'])
 def run_comprehensive_optimization():
     """Run REAL optimization using actual AI models and algorithms"""
+    data = request.get_json() or {}
+    
+    # Long-running: {"async": true} queues a job and returns its id immediately
+    if data.get('async') and job_manager:
+        job = job_manager.submit('comprehensive', data)
+        if 'job_id' not in job:
+            return jsonify({"status": "error", **job}), 503
+        return jsonify({
+            "status": "accepted",
+            "job": job,
+            "poll_url": f"/api/jobs/{job['job_id']}"
+        }), 202
+    
+    payload, status_code = comprehensive_optimization(data)
+    return jsonify(payload), status_code
+
+@coalesce(key=lambda data: canonical_key(data.get('constraints', {})))
+def comprehensive_optimization(data):
+    """Comprehensive optimization pipeline; returns (payload, HTTP status)
+
+    Concurrent requests with the same constraints share one run.
+    """
     start_time = time.time()
     
     try:
         print("ðŸš‡ Starting REAL comprehensive optimization...")
-        data = request.get_json() or {}
         constraints = data.get('constraints', {})
         
         # Step 1: Load and prepare REAL data
@@ -1535,46 +1566,30 @@ def run_comprehensive_optimization():
             print("   âš ï¸ CSV not found, generating training data...")
             schedule_df = pd.DataFrame()
         
-        # Generate comprehensive train data based on REAL parameters
-        train_names = [
-            "KRISHNA", "TAPTI", "NILA", "SARAYU", "ARUTH",
-            "VAIGAI", "JHANAVI", "DHWANIL", "BHAVANI", "PADMA",
-            "MANDAKINI", "YAMUNA", "PERIYAR", "KABANI", "VAAYU",
-            "KAVERI", "SHIRIYA", "PAMPA", "NARMADA", "MAHE",
-            "MAARUT", "SABARMATHI", "GODHAVARI", "GANGA", "PAVAN"
-        ]
+        # Generate comprehensive train data based on REAL parameters. A local
+        # Generator instead of np.random.seed: concurrent runs cannot reseed each other
+        fleet = generate_fleet(len(TRAIN_NAMES), seed=42)  # Consistent results for demonstration
+        rng = np.random.default_rng(42)
+        n = len(fleet)
         
-        # Create realistic training data with REAL KMRL parameters
-        np.random.seed(42)  # Consistent results for demonstration
-        train_data = []
-        
-        for i, train_id in enumerate(train_names):
-            # Real KMRL operational parameters
-            base_delay = np.random.exponential(2.1)  # Realistic delay distribution
-            dwell_time = np.random.randint(45, 90)   # Real station dwell times
-            distance = np.random.uniform(2.5, 25.6)  # KMRL route distances
-            load_factor = np.random.beta(2, 3)       # Realistic passenger loads
+        # Real KMRL operational parameters
+        trains_df = pd.DataFrame({
+            'train_id': fleet['train_id'],
+            'dwell_time_seconds': fleet['dwell_time_seconds'],   # Real station dwell times
+            'distance_km': rng.uniform(2.5, 25.6, n),            # KMRL route distances
+            'scheduled_load_factor': rng.beta(2, 3, n),          # Realistic passenger loads
+            'time_of_day': fleet['time_of_day'],
+            'passenger_density': fleet['passenger_density'],
+            'route_complexity': fleet['route_complexity'],
+            'baseline_delay_minutes': rng.exponential(2.1, n),   # Realistic delay distribution
             
-            train_entry = {
-                'train_id': train_id,
-                'dwell_time_seconds': dwell_time,
-                'distance_km': distance,
-                'scheduled_load_factor': load_factor,
-                'time_of_day': np.random.randint(6, 22),
-                'passenger_density': np.random.uniform(0.2, 0.9),
-                'route_complexity': np.random.uniform(0.8, 2.0),
-                'baseline_delay_minutes': base_delay,
-                
-                # Maintenance and operational status
-                'mileage_km': np.random.randint(15000, 45000),
-                'last_maintenance_days': np.random.randint(5, 120),
-                'certificate_valid': np.random.choice([0, 1], p=[0.15, 0.85]),
-                'critical_jobs_open': np.random.choice([0, 1, 2], p=[0.75, 0.20, 0.05]),
-                'energy_efficiency_baseline': np.random.uniform(65, 85)
-            }
-            train_data.append(train_entry)
-        
-        trains_df = pd.DataFrame(train_data)
+            # Maintenance and operational status
+            'mileage_km': fleet['mileage_km'],
+            'last_maintenance_days': rng.integers(5, 120, n),
+            'certificate_valid': fleet['certificate_valid'],
+            'critical_jobs_open': fleet['critical_jobs_open'],
+            'energy_efficiency_baseline': rng.uniform(65, 85, n)
+        })
         print(f"   âœ… Generated comprehensive data for {len(trains_df)} KMRL trains")
         
         # Step 2: REAL AI Delay Prediction
@@ -1611,7 +1626,7 @@ def run_comprehensive_optimization():
                     original_delay = float(original_prediction) if original_prediction else train['baseline_delay_minutes']
                 
                 # Simulate optimization improvement (realistic 15-35% reduction)
-                improvement_factor = np.random.uniform(0.15, 0.35)
+                improvement_factor = rng.uniform(0.15, 0.35)
                 optimized_delay = original_delay * (1 - improvement_factor)
                 
                 predicted_delays.append(max(0, optimized_delay))
@@ -1629,7 +1644,7 @@ def run_comprehensive_optimization():
         except Exception as e:
             print(f"   âš ï¸ Delay prediction fallback: {e}")
             # Fallback with realistic improvements
-            trains_df['predicted_delay_minutes'] = trains_df['baseline_delay_minutes'] * np.random.uniform(0.65, 0.85, len(trains_df))
+            trains_df['predicted_delay_minutes'] = trains_df['baseline_delay_minutes'] * rng.uniform(0.65, 0.85, len(trains_df))
             trains_df['delay_improvement'] = trains_df['baseline_delay_minutes'] - trains_df['predicted_delay_minutes']
             delay_reduction = trains_df['delay_improvement'].mean()
         
@@ -1643,21 +1658,13 @@ def run_comprehensive_optimization():
             
             smart_ai = SmartMetroAI()
             
-            # Train the model with current data
+            # Reuse persisted models unless the current data needs a retrain
             maintenance_df = trains_df[trains_df['critical_jobs_open'] > 0].copy()
-            smart_ai.train_models(trains_df, trains_df, maintenance_df)
+            smart_ai.ensure_models(trains_df, trains_df, maintenance_df)
             
             # Get REAL readiness assessments
-            readiness_scores = []
-            maintenance_recommendations = []
-            
-            for _, train in trains_df.iterrows():
-                train_dict = train.to_dict()
-                readiness = smart_ai.calculate_train_readiness(train_dict)
-                maintenance = smart_ai.predict_maintenance(train_dict)
-                
-                readiness_scores.append(readiness)
-                maintenance_recommendations.append(maintenance.get('action', 'Normal'))
+            readiness_scores = smart_ai.calculate_fleet_readiness(trains_df)['readiness_score']
+            maintenance_recommendations = smart_ai.predict_maintenance_batch(trains_df)['action']
             
             trains_df['ai_readiness_score'] = readiness_scores
             trains_df['maintenance_recommendation'] = maintenance_recommendations
@@ -1668,8 +1675,8 @@ def run_comprehensive_optimization():
         except Exception as e:
             print(f"   âš ï¸ Readiness assessment fallback: {e}")
             # Generate realistic readiness scores
-            trains_df['ai_readiness_score'] = np.random.beta(4, 1, len(trains_df)) * 0.4 + 0.6  # 0.6-1.0 range
-            trains_df['maintenance_recommendation'] = np.random.choice(
+            trains_df['ai_readiness_score'] = rng.beta(4, 1, len(trains_df)) * 0.4 + 0.6  # 0.6-1.0 range
+            trains_df['maintenance_recommendation'] = rng.choice(
                 ['Normal', 'Monitor', 'Schedule Maintenance'], 
                 len(trains_df), 
                 p=[0.7, 0.2, 0.1]
@@ -1733,12 +1740,12 @@ def run_comprehensive_optimization():
                 scheduling_efficiency = or_tools_result['performance_metrics'].get('efficiency', 85.2)
                 print(f"   âœ… OR-Tools Scheduling: {scheduling_efficiency:.1f}% efficiency achieved")
             else:
-                scheduling_efficiency = 85.2 + np.random.uniform(5, 15)
+                scheduling_efficiency = 85.2 + rng.uniform(5, 15)
                 print(f"   âš ï¸ OR-Tools fallback: {scheduling_efficiency:.1f}% efficiency")
                 
         except Exception as e:
             print(f"   âš ï¸ OR-Tools optimization fallback: {e}")
-            scheduling_efficiency = 85.2 + np.random.uniform(5, 15)
+            scheduling_efficiency = 85.2 + rng.uniform(5, 15)
         
         # Step 6: REAL Results Compilation and Analysis
         print("ðŸ“Š Step 6/6: Compiling real optimization results...")
@@ -1749,7 +1756,7 @@ def run_comprehensive_optimization():
         optimized_accuracy = min(99.8, baseline_accuracy + (scheduling_efficiency - baseline_accuracy) * 0.8)
         
         baseline_energy = trains_df['energy_efficiency_baseline'].mean()
-        energy_improvement = np.random.uniform(8, 18)  # Realistic improvement range
+        energy_improvement = rng.uniform(8, 18)  # Realistic improvement range
         optimized_energy = min(95, baseline_energy + energy_improvement)
         
         # Assign operational status based on REAL AI analysis
@@ -1808,7 +1815,7 @@ def run_comprehensive_optimization():
                 'trains_analyzed': len(trains_df),
                 'average_delay_reduction_minutes': delay_reduction,
                 'total_delay_savings_per_day': delay_reduction * len(trains_df) * 2,  # Round trips
-                'prediction_confidence': np.random.uniform(0.88, 0.96)
+                'prediction_confidence': rng.uniform(0.88, 0.96)
             },
             
             'readiness_assessment_results': {
@@ -1816,7 +1823,7 @@ def run_comprehensive_optimization():
                 'average_readiness_score': avg_readiness,
                 'trains_ready_for_service': len(trains_df[trains_df['ai_readiness_score'] > 0.8]),
                 'maintenance_required': len(trains_df[trains_df['maintenance_recommendation'] == 'Schedule Maintenance']),
-                'assessment_accuracy': np.random.uniform(0.91, 0.97)
+                'assessment_accuracy': rng.uniform(0.91, 0.97)
             },
             
             'constraint_optimization_results': {
@@ -1830,9 +1837,9 @@ def run_comprehensive_optimization():
             'scheduling_optimization_results': {
                 'algorithm': 'OR-Tools Constraint Programming',
                 'scheduling_efficiency': scheduling_efficiency,
-                'conflicts_resolved': np.random.randint(4, 12),
-                'time_slots_optimized': np.random.randint(180, 320),
-                'route_utilization_improvement': np.random.uniform(12, 25)
+                'conflicts_resolved': int(rng.integers(4, 12)),
+                'time_slots_optimized': int(rng.integers(180, 320)),
+                'route_utilization_improvement': rng.uniform(12, 25)
             },
             
             # Overall Performance Improvement (REAL calculations)
@@ -1872,7 +1879,7 @@ def run_comprehensive_optimization():
         print(f"   ðŸ”‹ Energy Efficiency: {optimized_energy:.1f}% (improved by {optimized_energy - baseline_energy:.1f}%)")
         print(f"   ðŸ“ˆ Scheduling Accuracy: {optimized_accuracy:.1f}% (improved by {optimized_accuracy - baseline_accuracy:.1f}%)")
         
-        return jsonify({
+        return {
             "status": "success",
             "message": f"REAL comprehensive optimization completed in {total_duration:.2f}s using actual AI models",
             "results": final_results,
@@ -1883,7 +1890,7 @@ def run_comprehensive_optimization():
                 "output_files": ["outputs/real_optimization_results.csv", "outputs/optimization_summary.json"],
                 "can_be_inspected": True
             }
-        }), 200
+        }, 200
         
     except Exception as e:
         duration = time.time() - start_time
@@ -1891,12 +1898,31 @@ def run_comprehensive_optimization():
         import traceback
         traceback.print_exc()
         
-        return jsonify({
+        return {
             "status": "error",
             "message": f"Real optimization failed after {duration:.2f}s: {str(e)}",
             "duration": duration,
             "note": "Check console for detailed error information"
-        }), 500
+        }, 500
+
+def comprehensive_job(params):
+    """Job runner for queued comprehensive optimizations"""
+    payload, status_code = comprehensive_optimization(params)
+    if status_code != 200:
+        raise RuntimeError(payload['message'])
+    return payload
+
+# Optimization job queue (/api/jobs)
+try:
+    from backend.api.jobs import init_jobs, run_master_job, run_scenario_batch_job
+    job_manager = init_jobs(app, socketio=socketio, db_path='outputs/jobs_dashboard.db', runners={
+        'master': run_master_job,
+        'scenario_batch': run_scenario_batch_job,
+        'comprehensive': comprehensive_job
+    })
+except Exception as e:
+    print(f"âš ï¸ Optimization job queue unavailable: {e}")
+    job_manager = None
 
 
 if __name__ == '__main__':
@@ -1909,4 +1935,7 @@ if __name__ == '__main__':
     print("ðŸŒ http://localhost:5000")
     print("=" * 60)
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    if socketio is not None:
+        socketio.run(app, debug=True, host='0.0.0.0', port=5000)
+    else:
+        app.run(debug=True, host='0.0.0.0', port=5000)
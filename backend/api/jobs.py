@@ -0,0 +1,362 @@
+"""
+🚇 KMRL Optimization Jobs
+Asynchronous job queue for long-running optimization pipelines
+
+- POST returns a job id at once; a bounded worker pool runs the pipeline
+- Clients poll /api/jobs/<id> or listen for 'job_update' SocketIO events
+- Queue depth, cancellation and per-job queue/run timing are exposed
+- Job state lives in SQLite, so it survives restarts: queued jobs are
+  re-queued and jobs that were running are marked 'interrupted'
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from flask import Blueprint, current_app, jsonify, request
+
+from backend.utils.single_flight import canonical_key, coalesce
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed', 'cancelled', 'interrupted')
+FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled', 'interrupted')
+
+SCHEDULE_COLUMNS = [
+    'TrainID', 'final_operational_status', 'predicted_delay_minutes',
+    'ai_readiness_score', 'maintenance_recommendation', 'RollingStockFitnessStatus'
+]
+
+jobs_bp = Blueprint('jobs', __name__)
+
+# One orchestrator for every job in the process, created on first use, so
+# trained models, the stage cache and the standby pool carry over between runs
+_orchestrator = None
+_orchestrator_lock = threading.Lock()
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    return str(value)
+
+
+def get_orchestrator():
+    """The process-wide orchestrator shared by master and scenario batch jobs"""
+    global _orchestrator
+    with _orchestrator_lock:
+        if _orchestrator is None:
+            from backend.orchestrator import KMRLMasterOrchestrator
+            _orchestrator = KMRLMasterOrchestrator()
+        return _orchestrator
+
+
+@coalesce(key=lambda params: canonical_key(params.get('constraints'), params.get('scenario'),
+                                           params.get('budget_seconds')))
+def run_master_job(params):
+    """Run the master orchestrator for one job and return a JSON-friendly result.
+
+    Identical concurrent requests (sync or queued) share a single run.
+    """
+    orchestrator = get_orchestrator()
+    final_schedule, summary, emergency = orchestrator.run_master_optimization(
+        constraints=params.get('constraints') or {'min_service': 13, 'max_maintenance': 8},
+        scenario=params.get('scenario'),
+        budget_seconds=params.get('budget_seconds')
+    )
+    if 'error' in summary:
+        raise RuntimeError(summary['error'])
+    return {
+        'summary': summary,
+        'schedule': _schedule_records(final_schedule),
+        'emergency_response': emergency
+    }
+
+
+def _schedule_records(final_schedule):
+    if final_schedule is None:
+        return None
+    columns = [col for col in SCHEDULE_COLUMNS if col in final_schedule.columns]
+    return final_schedule[columns].to_dict(orient='records')
+
+
+def run_scenario_batch_job(params):
+    """Compare scenario/constraint variants in one orchestrator run"""
+    orchestrator = get_orchestrator()
+    comparison, outputs, summary = orchestrator.run_scenario_batch(
+        params.get('variants') or [], budget_seconds=params.get('budget_seconds')
+    )
+    return {
+        'comparison': comparison.to_dict(orient='records'),
+        'summary': summary,
+        'variants': {
+            name: {
+                'schedule': _schedule_records(output['schedule']),
+                'emergency_response': output['emergency_response']
+            } for name, output in outputs.items()
+        }
+    }
+
+
+class JobStore:
+    def __init__(self, db_path='outputs/jobs.db'):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    params TEXT,
+                    result TEXT,
+                    error TEXT,
+                    submitted_at REAL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+
+    def insert(self, job_id, kind, params):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, params, submitted_at) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(params, default=_json_default), time.time())
+            )
+
+    def update(self, job_id, **fields):
+        if 'result' in fields:
+            fields['result'] = json.dumps(fields['result'], default=_json_default)
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def with_status(self, *statuses):
+        marks = ', '.join('?' * len(statuses))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE status IN ({marks}) ORDER BY submitted_at", statuses
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def timing(self):
+        with self._lock:
+            row = self._conn.execute("""
+                SELECT AVG(started_at - submitted_at), AVG(finished_at - started_at)
+                FROM jobs WHERE status = 'succeeded'
+            """).fetchone()
+        return row[0], row[1]
+
+
+class JobManager:
+    def __init__(self, runners=None, max_workers=2, max_queue=32, store=None, socketio=None):
+        self.runners = runners or {'master': run_master_job, 'scenario_batch': run_scenario_batch_job}
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.store = store or JobStore()
+        self.socketio = socketio
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='kmrl-job')
+        self._futures = {}
+        self._cancel_requested = set()
+        self._lock = threading.Lock()
+        self._recover()
+
+    def _recover(self):
+        """Resume jobs left over from a previous process"""
+        for job in self.store.with_status('running'):
+            self.store.update(job['id'], status='interrupted', finished_at=time.time(),
+                              error='Server restarted while the job was running')
+        for job in self.store.with_status('queued'):
+            if job['kind'] in self.runners:
+                self._enqueue(job['id'], job['kind'], json.loads(job['params'] or '{}'))
+            else:
+                self.store.update(job['id'], status='failed', error=f"Unknown job kind: {job['kind']}")
+
+    def _enqueue(self, job_id, kind, params):
+        with self._lock:
+            self._futures[job_id] = self._pool.submit(self._run, job_id, kind, params)
+
+    def queue_depth(self):
+        with self._lock:
+            return sum(1 for future in self._futures.values() if not future.running() and not future.done())
+
+    def submit(self, kind='master', params=None):
+        """Queue a job; returns the job record or an error dict when the queue is full"""
+        if kind not in self.runners:
+            return {'error': f"Unknown job kind: {kind}"}
+        if self.queue_depth() >= self.max_queue:
+            return {'error': 'Job queue is full', 'queue_depth': self.queue_depth()}
+        job_id = uuid.uuid4().hex
+        params = params or {}
+        self.store.insert(job_id, kind, params)
+        self._enqueue(job_id, kind, params)
+        job = self.get(job_id)
+        self._emit(job)
+        return job
+
+    def _cancelling(self, job_id):
+        with self._lock:
+            return job_id in self._cancel_requested
+
+    def _run(self, job_id, kind, params):
+        if self._cancelling(job_id):
+            fields = {'status': 'cancelled'}
+        else:
+            self.store.update(job_id, status='running', started_at=time.time())
+            self._emit(self.get(job_id))
+            try:
+                result = self.runners[kind](params)
+                fields = {'status': 'succeeded', 'result': result}
+            except Exception as e:
+                fields = {'status': 'failed', 'error': f"{type(e).__name__}: {e}"}
+
+        with self._lock:
+            # A running job cannot be interrupted, so a cancel discards its result;
+            # deciding and finishing under the lock means no cancel slips in between
+            if job_id in self._cancel_requested and fields['status'] != 'cancelled':
+                fields = {'status': 'cancelled', 'error': 'Cancelled while running'}
+            self.store.update(job_id, finished_at=time.time(), **fields)
+            self._futures.pop(job_id, None)
+            self._cancel_requested.discard(job_id)
+        self._emit(self.get(job_id))
+
+    def cancel(self, job_id):
+        """Cancel a queued job, or discard the result of a running one"""
+        with self._lock:
+            job = self.store.get(job_id)
+            if job is None:
+                return {'error': f"Job {job_id} not found"}
+            if job['status'] in FINISHED_STATUSES:
+                return {'error': f"Job {job_id} already {job['status']}"}
+            future = self._futures.get(job_id)
+            if future is not None and future.cancel():
+                self._futures.pop(job_id, None)
+                self.store.update(job_id, status='cancelled', finished_at=time.time())
+            else:
+                self._cancel_requested.add(job_id)
+        job = self.get(job_id)
+        self._emit(job)
+        return job
+
+    def get(self, job_id, include_result=True):
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        now = time.time()
+        started, finished = job['started_at'], job['finished_at']
+        record = {
+            'job_id': job['id'],
+            'kind': job['kind'],
+            'status': job['status'],
+            'cancel_requested': self._cancelling(job['id']),
+            'params': json.loads(job['params'] or '{}'),
+            'error': job['error'],
+            'submitted_at': datetime.fromtimestamp(job['submitted_at']).isoformat(),
+            'queue_seconds': round((started or finished or now) - job['submitted_at'], 3),
+            'run_seconds': round((finished or now) - started, 3) if started else None
+        }
+        if include_result and job['result'] is not None:
+            record['result'] = json.loads(job['result'])
+        return record
+
+    def stats(self):
+        queue_wait, run_time = self.store.timing()
+        with self._lock:
+            running = sum(1 for future in self._futures.values() if future.running())
+        return {
+            'queue_depth': self.queue_depth(),
+            'running': running,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'jobs_by_status': self.store.counts(),
+            'avg_queue_seconds': queue_wait,
+            'avg_run_seconds': run_time
+        }
+
+    def _emit(self, job):
+        if self.socketio is None or job is None:
+            return
+        try:
+            payload = {key: value for key, value in job.items() if key != 'result'}
+            self.socketio.emit('job_update', payload)
+        except Exception as e:
+            print(f"⚠️ Could not push job update: {e}")
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+
+def init_jobs(app, socketio=None, manager=None, db_path=None, **kwargs):
+    """Attach a JobManager to the app and register the /api/jobs endpoints.
+
+    Apps that run side by side need their own db_path: on start-up a manager
+    marks every 'running' job in its database as interrupted.
+    """
+    if manager is None:
+        if db_path is not None:
+            kwargs.setdefault('store', JobStore(db_path))
+        manager = JobManager(socketio=socketio, **kwargs)
+    app.extensions['kmrl_jobs'] = manager
+    if 'jobs' not in app.blueprints:
+        app.register_blueprint(jobs_bp)
+    return manager
+
+
+def get_job_manager():
+    return current_app.extensions['kmrl_jobs']
+
+
+@jobs_bp.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Queue an optimization job and return its id immediately"""
+    data = request.get_json(silent=True) or {}
+    params = data.get('params') or {key: value for key, value in data.items() if key != 'kind'}
+    job = get_job_manager().submit(data.get('kind', 'master'), params)
+    if 'job_id' not in job:
+        return jsonify({'status': 'error', **job}), 503 if 'queue_depth' in job else 400
+    return jsonify({'status': 'accepted', 'job': job}), 202
+
+
+@jobs_bp.route('/api/jobs', methods=['GET'])
+def job_stats():
+    """Queue depth, running jobs and timing"""
+    return jsonify(get_job_manager().stats())
+
+
+@jobs_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'error': f"Job {job_id} not found"}), 404
+    return jsonify(job)
+
+
+@jobs_bp.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = get_job_manager().cancel(job_id)
+    if 'job_id' not in job:
+        return jsonify({'status': 'error', **job}), 404 if 'not found' in job['error'] else 409
+    return jsonify(job)
@@ -1,11 +1,30 @@
+"""
+🚇 KMRL Run Schedule API
+/api/run_schedule endpoint backed by the master orchestrator
+
+- Synchronous by default; {"async": true} queues a job and returns its id
+  (poll /api/jobs/<id> or listen for 'job_update' events)
+- {"budget_seconds": n} bounds the run; degraded stages are listed in
+  summary['degraded_stages']
+- /api/scenario_batch compares several {name, constraints, scenario}
+  variants, training models once and fanning out the scenario stages
+"""
+
 import time
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+
+from backend.api.jobs import get_job_manager, run_master_job, run_scenario_batch_job
 
+schedule_bp = Blueprint('schedule', __name__)
 
-@app.route('/api/run_schedule', methods=['POST'])
+
+@schedule_bp.route('/api/run_schedule', methods=['POST'])
 def run_schedule():
     """Enhanced API endpoint with master orchestrator"""
     start_time = time.time()
-    
+
     try:
         data = request.get_json() or {}
         constraints = data.get('constraints', {
@@ -13,30 +32,32 @@ def run_schedule():
             'max_maintenance': 8
         })
         scenario = data.get('scenario')
+        params = {'constraints': constraints, 'scenario': scenario, 'budget_seconds': data.get('budget_seconds')}
+
+        if data.get('async'):
+            job = get_job_manager().submit('master', params)
+            if 'job_id' not in job:
+                return jsonify({"status": "error", **job}), 503
+            return jsonify({
+                "status": "accepted",
+                "job": job,
+                "poll_url": f"/api/jobs/{job['job_id']}"
+            }), 202
 
         # Call master orchestrator
-        orchestrator = KMRLMasterOrchestrator()
-        final_schedule, summary, emergency = orchestrator.run_master_optimization(
-            constraints=constraints,
-            scenario=scenario
-        )
+        result = run_master_job(params)
+        summary = result['summary']
 
         duration = time.time() - start_time
-        
-        # Prepare response data
-        schedule_data = final_schedule[[
-            'TrainID', 'final_operational_status', 'predicted_delay_minutes', 
-            'ai_readiness_score', 'maintenance_recommendation',
-            'RollingStockFitnessStatus'
-        ]].to_dict(orient='records')
 
         return jsonify({
             "status": "success",
             "message": f"Master AI optimization completed for {summary['total_trains']} trains",
             "duration_seconds": round(duration, 2),
             "summary": summary,
-            "schedule": schedule_data,
-            "emergency_response": emergency,
+            "degraded_stages": summary.get('degraded_stages', []),
+            "schedule": result['schedule'],
+            "emergency_response": result['emergency_response'],
             "optimization_method": "Master AI Pipeline (SmartAI + DelayPredictor + PuLP + OR-Tools)",
             "timestamp": datetime.now().isoformat()
         }), 200
@@ -44,10 +65,51 @@ def run_schedule():
     except Exception as e:
         duration = time.time() - start_time
         error_msg = f"Master optimization failed: {str(e)}"
-        
+
         return jsonify({
-            "status": "error", 
+            "status": "error",
             "message": error_msg,
             "duration_seconds": round(duration, 2),
             "error_type": type(e).__name__
         }), 500
+
+
+@schedule_bp.route('/api/scenario_batch', methods=['POST'])
+def run_scenario_batch():
+    """Compare scenario/constraint variants in one pipeline run"""
+    start_time = time.time()
+
+    try:
+        data = request.get_json() or {}
+        variants = data.get('variants') or []
+        if not variants:
+            return jsonify({"status": "error", "message": "No variants given"}), 400
+        params = {'variants': variants, 'budget_seconds': data.get('budget_seconds')}
+
+        if data.get('async'):
+            job = get_job_manager().submit('scenario_batch', params)
+            if 'job_id' not in job:
+                return jsonify({"status": "error", **job}), 503
+            return jsonify({
+                "status": "accepted",
+                "job": job,
+                "poll_url": f"/api/jobs/{job['job_id']}"
+            }), 202
+
+        result = run_scenario_batch_job(params)
+        return jsonify({
+            "status": "success",
+            "message": f"Compared {len(variants)} variants",
+            "duration_seconds": round(time.time() - start_time, 2),
+            **result,
+            "timestamp": datetime.now().isoformat()
+        }), 200
+
+    except Exception as e:
+        duration = time.time() - start_time
+        return jsonify({
+            "status": "error",
+            "message": f"Scenario batch failed: {str(e)}",
+            "duration_seconds": round(duration, 2),
+            "error_type": type(e).__name__
+        }), 500
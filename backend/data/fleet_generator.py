@@ -0,0 +1,232 @@
+"""
+🚇 KMRL Fleet Generator
+Vectorized synthetic trainsets, job cards and schedule history
+
+- Each column is drawn in one call from its own numpy Generator, derived
+  from the seed and the table/column name; nothing touches the global
+  np.random state, so output depends only on the seed, even when stages
+  generate data concurrently
+- Adding a column does not change the draws of the existing ones
+- Dates are taken from small label tables, so millions of rows stay cheap
+- The first 25 trainsets carry the KMRL train names
+"""
+
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from backend.utils.constants import TRAIN_NAMES
+
+# column -> (distribution, arguments); 'int' ranges exclude the upper bound
+FLEET_COLUMNS = {
+    # Operational Parameters
+    'dwell_time_seconds': ('int', 45, 90),
+    'distance_km': ('uniform', 2.5, 15.0),
+    'scheduled_load_factor': ('uniform', 0.4, 0.95),
+    'time_of_day': ('int', 6, 22),
+    'passenger_density': ('uniform', 0.2, 0.9),
+    'route_complexity': ('uniform', 0.8, 2.0),
+    'passenger_load': ('int', 100, 400),
+    'route': ('choice', ['Red Line', 'Blue Line', 'Green Line'], None),
+
+    # Certificate & Fitness Status
+    'certificate_valid': ('choice', [0, 1], [0.15, 0.85]),
+    'cert_days_left_rolling_stock': ('int', 10, 365),
+    'cert_days_left_signalling': ('int', 100, 1825),
+    'cert_days_left_telecom': ('int', 150, 1460),
+    'RollingStockFitnessStatus': ('flag', 0.88),
+    'SignallingFitnessStatus': ('flag', 0.92),
+    'TelecomFitnessStatus': ('flag', 0.90),
+
+    # Maintenance Data
+    'mileage_km': ('int', 15000, 45000),
+    'TotalMileageKM': ('int', 15000, 45000),
+    'MileageSinceLastServiceKM': ('int', 1000, 8000),
+    'BrakepadWear%': ('uniform', 15, 90),
+    'HVACWear%': ('uniform', 10, 85),
+    'DoorSystemWear%': ('uniform', 5, 75),
+    'battery_health': ('uniform', 65, 95),
+    'mechanical_score': ('uniform', 0.6, 0.95),
+    'energy_consumption': ('uniform', 60, 95),
+
+    # Job Cards
+    'OpenJobCards': ('poisson', 1.2),
+    'critical_jobs_open': ('choice', [0, 1, 2], [0.75, 0.20, 0.05]),
+    'JobCardStatus': ('choice', ['close', 'open'], [0.72, 0.28]),
+
+    # Operational Status and Logistics
+    'status': ('choice', ['Active', 'Standby', 'Maintenance'], [0.5, 0.35, 0.15]),
+    'OperationalStatus': ('choice', ['service', 'standby', 'maintenance'], [0.50, 0.35, 0.15]),
+    'location': ('choice', ['Muttom', 'Kalamassery'], [0.65, 0.35]),
+    'Depot': ('choice', ['Muttom', 'Kalamassery'], [0.65, 0.35]),
+    'BayPositionID': ('int', 1, 25),
+    'stabling_capacity': ('int', 3, 8),
+    'ShuntingMovesRequired': ('poisson', 1.8),
+    'shunting_score': ('uniform', 0.4, 1.0),
+    'readiness_score': ('uniform', 0.7, 0.98),
+    'ReliabilityScore': ('uniform', 0.75, 0.98),
+    'MileageBalanceVariance': ('normal', 0, 1200),
+    'CleaningRequired': ('flag', 0.28),
+
+    # Environmental
+    'weather_condition': ('choice', ['clear', 'cloudy', 'rainy'], [0.65, 0.25, 0.10]),
+    'is_peak_hour': ('choice', [0, 1], [0.68, 0.32]),
+
+    # Branding & Revenue
+    'brand_hours_remaining': ('int', 0, 8),
+    'BrandingActive': ('flag', 0.32),
+    'branding_hours_today': ('uniform', 0, 7),
+    'branding_min_hours': ('uniform', 3, 8),
+    'ExposureHoursTarget': ('choice', [260, 280, 300, 320], None),
+    'ExposureHoursAccrued': ('int', 40, 280),
+}
+
+JOB_CARD_COLUMNS = {
+    'priority': ('choice', ['low', 'medium', 'high', 'critical'], [0.4, 0.35, 0.20, 0.05]),
+    'priority_level': ('int', 1, 5),
+    'status': ('choice', ['open', 'in_progress', 'closed'], [0.25, 0.15, 0.60]),
+    'job_type': ('choice', ['preventive', 'corrective', 'emergency'], [0.5, 0.4, 0.1]),
+    'estimated_hours': ('int', 1, 12),
+    'is_critical': ('choice', [0, 1], [0.85, 0.15]),
+    'component': ('choice', ['brakes', 'hvac', 'doors', 'electrical', 'signaling'], [0.3, 0.25, 0.2, 0.15, 0.1]),
+}
+
+HISTORY_COLUMNS = {
+    'delay_minutes': ('exponential', 2.5),
+    'passenger_load': ('uniform', 0.3, 0.95),
+    'weather': ('choice', ['clear', 'cloudy', 'rain', 'fog'], [0.6, 0.25, 0.10, 0.05]),
+    'route': ('choice', [f'Route_{i}' for i in range(1, 6)], None),
+    'incident_reported': ('choice', [0, 1], [0.85, 0.15]),
+}
+
+JOBS_PER_TRAIN = ([0, 1, 2, 3, 4], [0.3, 0.35, 0.2, 0.1, 0.05])
+
+
+def column_rng(seed, table, column):
+    """Independent Generator for one column of one table"""
+    key = (zlib.crc32(table.encode()), zlib.crc32(column.encode()))
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=key))
+
+
+def draw(rng, spec, n):
+    """n values of one column spec"""
+    kind, *args = spec
+    if kind == 'int':
+        return rng.integers(args[0], args[1], n)
+    if kind == 'uniform':
+        return rng.uniform(args[0], args[1], n)
+    if kind == 'normal':
+        return rng.normal(args[0], args[1], n)
+    if kind == 'exponential':
+        return rng.exponential(args[0], n)
+    if kind == 'poisson':
+        return rng.poisson(args[0], n)
+    if kind == 'flag':
+        return rng.random(n) < args[0]
+    if kind == 'choice':
+        values, p = args
+        return np.asarray(values, dtype=object if isinstance(values[0], str) else None)[
+            rng.choice(len(values), n, p=p)]
+    raise ValueError(f"Unknown column distribution: {kind}")
+
+
+def _draw_table(columns, seed, table, n):
+    return {name: draw(column_rng(seed, table, name), spec, n) for name, spec in columns.items()}
+
+
+def _labels(reference, offsets, unit, fmt):
+    """Formatted timestamps for integer offsets, via a table of the distinct values"""
+    low, high = int(offsets.min(initial=0)), int(offsets.max(initial=0))
+    table = (reference + pd.to_timedelta(np.arange(low, high + 1), unit=unit)).strftime(fmt)
+    return np.asarray(table, dtype=object)[offsets - low]
+
+
+def _reference(reference):
+    return pd.Timestamp(reference) if reference is not None else pd.Timestamp.now().floor('h')
+
+
+def train_names(n):
+    """KMRL names for the first 25 trainsets, numbered ids after that"""
+    names = np.empty(n, dtype=object)
+    named = min(n, len(TRAIN_NAMES))
+    names[:named] = TRAIN_NAMES[:named]
+    if n > named:
+        width = len(str(n))
+        names[named:] = [f'KMRL_{i:0{width}d}' for i in range(named + 1, n + 1)]
+    return names
+
+
+def generate_fleet(n_trainsets=25, seed=42, reference=None):
+    """One row per trainset with operational, fitness, maintenance and branding columns"""
+    reference = _reference(reference)
+    names = train_names(n_trainsets)
+    columns = _draw_table(FLEET_COLUMNS, seed, 'fleet', n_trainsets)
+
+    days_since = column_rng(seed, 'fleet', 'last_maintenance').integers(0, 120, n_trainsets)
+    interval = column_rng(seed, 'fleet', 'next_maintenance').integers(60, 121, n_trainsets)
+    departs_in = column_rng(seed, 'fleet', 'scheduled_departure').integers(1, 24, n_trainsets)
+    crew = column_rng(seed, 'fleet', 'crew_id')
+    crew_ids = np.char.add('CREW_', np.char.zfill(crew.integers(1, 50, n_trainsets).astype(str), 3)).astype(object)
+    crew_ids[crew.random(n_trainsets) <= 0.1] = None
+
+    day = reference.normalize()
+    return pd.DataFrame({
+        'train_id': names,
+        'TrainID': names,
+        'trainset_id': names,
+        **columns,
+        'last_maintenance': _labels(day, -days_since, 'D', '%Y-%m-%d'),
+        'next_maintenance': _labels(day, interval - days_since, 'D', '%Y-%m-%d'),
+        'scheduled_departure': _labels(reference, departs_in, 'h', '%Y-%m-%d %H:%M'),
+        'crew_id': crew_ids,
+    })
+
+
+def generate_job_cards(fleet, seed=42, reference=None):
+    """0-4 job cards per trainset"""
+    day = _reference(reference).normalize()
+    counts = draw(column_rng(seed, 'job_cards', 'count'), ('choice', *JOBS_PER_TRAIN), len(fleet))
+    train = np.repeat(fleet['train_id'].to_numpy(), counts)
+    n = len(train)
+    width = max(4, len(str(n)))
+    created = column_rng(seed, 'job_cards', 'created_date').integers(0, 30, n)
+    return pd.DataFrame({
+        'job_id': [f'JOB_{i:0{width}d}' for i in range(1, n + 1)],
+        'train_id': train,
+        'trainset_id': train,
+        'TrainID': train,
+        **_draw_table(JOB_CARD_COLUMNS, seed, 'job_cards', n),
+        'created_date': _labels(day, -created, 'D', '%Y-%m-%d'),
+        'description': np.char.add('Maintenance work on ', train.astype(str)).astype(object),
+    })
+
+
+def generate_schedule_history(fleet, n_records=None, seed=42, reference=None):
+    """Past departures of random trainsets over the last 180 days (4 per trainset by default)"""
+    day = _reference(reference).normalize()
+    n = n_records if n_records is not None else 4 * len(fleet)
+    trains = fleet['train_id'].to_numpy()[column_rng(seed, 'history', 'train_id').integers(0, len(fleet), n)]
+    days_ago = column_rng(seed, 'history', 'date').integers(1, 180, n)
+    minute_of_day = pd.Timestamp(0).normalize()
+    departures = {
+        name: _labels(minute_of_day, column_rng(seed, 'history', name).integers(5 * 60, 23 * 60, n), 'min', '%H:%M')
+        for name in ('scheduled_departure', 'actual_departure')
+    }
+    return pd.DataFrame({
+        'date': _labels(day, -days_ago, 'D', '%Y-%m-%d'),
+        'train_id': trains,
+        **departures,
+        **_draw_table(HISTORY_COLUMNS, seed, 'history', n),
+    })
+
+
+def generate_dataset(n_trainsets=25, seed=42, reference=None, history_records=None):
+    """Fleet, job cards and schedule history from one seed"""
+    reference = _reference(reference)
+    fleet = generate_fleet(n_trainsets, seed, reference)
+    return {
+        'trainsets': fleet,
+        'jobcards': generate_job_cards(fleet, seed, reference),
+        'schedule_history': generate_schedule_history(fleet, history_records, seed, reference),
+    }
@@ -1,3 +1,8 @@
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
@@ -7,108 +12,212 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, mean_squared_error
 import joblib
 import warnings
+from backend.models.demand_features import RollingDemandFeatures
+from backend.models.monte_carlo import MonteCarloEngine, SCENARIO_METRICS
+from backend.utils.shared_fleet import cow_view
 warnings.filterwarnings('ignore')
 
+PEAK_HOURS = [7, 8, 9, 17, 18, 19]
+
+# Column order the demand model is trained on
+DEMAND_FEATURES = [
+    'hour', 'day_of_week', 'month', 'is_weekend',
+    'is_peak_hour', 'route_encoded', 'historical_demand', 'demand_trend'
+]
+
+# Weight of each readiness factor in the combined score
+READINESS_WEIGHTS = {
+    'mechanical': 0.40,
+    'maintenance': 0.25,
+    'energy': 0.20,
+    'branding': 0.10,
+    'crew': 0.05
+}
+
+# Quantiles predicted together by the multi-output quantile boosters
+QUANTILES = [0.1, 0.5, 0.9]
+
+# Native XGBoost binary file per persisted booster
+MODEL_FILES = {
+    'delay_model': 'delay.ubj',
+    'demand_model': 'demand.ubj',
+    'maintenance_model': 'maintenance.ubj',
+    'delay_quantile_model': 'delay_quantiles.ubj',
+    'demand_quantile_model': 'demand_quantiles.ubj'
+}
+
+# Size of each booster when trained (or refitted) from scratch
+BOOSTER_PARAMS = {
+    'delay_model': {'n_estimators': 100, 'max_depth': 6},
+    'demand_model': {'n_estimators': 150, 'max_depth': 8},
+    'maintenance_model': {'n_estimators': 100, 'max_depth': 6},
+    'delay_quantile_model': {
+        'n_estimators': 100, 'max_depth': 6,
+        'objective': 'reg:quantileerror', 'quantile_alpha': np.array(QUANTILES)
+    },
+    'demand_quantile_model': {
+        'n_estimators': 150, 'max_depth': 8,
+        'objective': 'reg:quantileerror', 'quantile_alpha': np.array(QUANTILES)
+    }
+}
+
+MODEL_CLASSES = {
+    'delay_model': xgb.XGBRegressor,
+    'demand_model': xgb.XGBRegressor,
+    'maintenance_model': xgb.XGBClassifier,
+    'delay_quantile_model': xgb.XGBRegressor,
+    'demand_quantile_model': xgb.XGBRegressor
+}
+
+
+def data_fingerprint(*frames):
+    """Content hash of the training frames, used to decide whether to retrain"""
+    digest = hashlib.sha256()
+    for frame in frames:
+        digest.update(json.dumps([str(col) for col in frame.columns]).encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
 class SmartMetroAI:
-    def __init__(self):
+    def __init__(self, incremental_rounds=50, max_total_trees=1000, window_size=20000,
+                 model_dir='backend/models/saved_models/smart_ai', keep_versions=3,
+                 n_jobs=None, early_stopping_rounds=20):
         self.delay_model = None
         self.demand_model = None
         self.maintenance_model = None
         self.readiness_model = None
         
+        # P10/P50/P90 boosters trained alongside the point models
+        self.delay_quantile_model = None
+        self.demand_quantile_model = None
+        
         self.scaler = StandardScaler()
         self.label_encoders = {}
         
         self.model_performance = {}
         
+        # Total XGBoost threads shared by the concurrently trained models
+        # (None uses every core) and patience on each held-out split
+        self.n_jobs = n_jobs
+        self.early_stopping_rounds = early_stopping_rounds
+        
+        # Continued boosting: rounds added per update, tree cap per model and
+        # number of most recent rows kept for updates and cap-triggered refits
+        self.incremental_rounds = incremental_rounds
+        self.max_total_trees = max_total_trees
+        self.window_size = window_size
+        self.training_windows = {}
+        
+        # Per-route lag/rolling demand state, carried across incremental batches
+        self.demand_features = RollingDemandFeatures(window=7, keep_history=False)
+        
+        # Versioned artifacts: <model_dir>/<version>/ plus manifest.json
+        self.model_dir = model_dir
+        self.keep_versions = keep_versions
+        self.model_version = None
+        self.data_fingerprint = None
+        
     def train_models(self, schedules_df, trains_df, maintenance_df):
         """Train all AI models with comprehensive data"""
         print("Training advanced AI models...")
         
-        # Prepare features for delay prediction
-        delay_features = self._prepare_delay_features(schedules_df)
+        # A full retrain replaces the sliding windows instead of extending them
+        self.training_windows = {}
         
-        # Train XGBoost delay prediction model
+        # Features are prepared sequentially since they share the label encoders
+        delay_features = self._prepare_delay_features(schedules_df)
         X_delay = delay_features.drop(['delay_minutes', 'train_id'], axis=1, errors='ignore')
         y_delay = delay_features['delay_minutes'].fillna(0)
+        self._update_window('delay', X_delay, y_delay)
         
-        X_train, X_test, y_train, y_test = train_test_split(
-            X_delay, y_delay, test_size=0.2, random_state=42
-        )
+        demand_features = self._prepare_demand_features(schedules_df)
+        X_demand = demand_features.drop(['passenger_load', 'train_id'], axis=1, errors='ignore')
+        y_demand = demand_features['passenger_load'].fillna(0)
+        self._update_window('demand', X_demand, y_demand)
         
-        self.delay_model = xgb.XGBRegressor(
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=6,
-            random_state=42
-        )
+        jobs = {
+            'delay_model': (X_delay, y_delay),
+            'demand_model': (X_demand, y_demand),
+            'delay_quantile_model': (X_delay, y_delay),
+            'demand_quantile_model': (X_demand, y_demand)
+        }
         
-        self.delay_model.fit(X_train, y_train)
-        delay_pred = self.delay_model.predict(X_test)
-        delay_rmse = np.sqrt(mean_squared_error(y_test, delay_pred))
+        maintenance_features = self._prepare_maintenance_features(trains_df, maintenance_df)
+        if not maintenance_features.empty:
+            X_maint = maintenance_features.drop(['needs_maintenance', 'train_id'], axis=1, errors='ignore')
+            y_maint = maintenance_features['needs_maintenance']
+            jobs['maintenance_model'] = (X_maint, y_maint)
+        
+        # The models are independent, so fit them concurrently and split the
+        # cores between them (XGBoost releases the GIL while boosting)
+        n_jobs = max(1, (self.n_jobs or os.cpu_count() or 1) // len(jobs))
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            futures = {
+                attr: pool.submit(self._fit_booster, attr, X, y, n_jobs)
+                for attr, (X, y) in jobs.items()
+            }
+            fitted = {attr: future.result() for attr, future in futures.items()}
         
+        self.delay_model, y_test, delay_pred = fitted['delay_model']
+        self.delay_quantile_model, _, delay_quantiles = fitted['delay_quantile_model']
+        delay_rmse = np.sqrt(mean_squared_error(y_test, delay_pred))
         self.model_performance['delay_prediction'] = {
             'rmse': delay_rmse,
-            'accuracy': 1 - (delay_rmse / y_test.std())
+            'accuracy': 1 - (delay_rmse / y_test.std()),
+            'trees': self.delay_model.get_booster().num_boosted_rounds(),
+            'interval_coverage': self._interval_coverage(y_test, delay_quantiles)
         }
         
-        # Train demand forecasting model
-        demand_features = self._prepare_demand_features(schedules_df)
-        
-        X_demand = demand_features.drop(['passenger_load', 'train_id'], axis=1, errors='ignore')
-        y_demand = demand_features['passenger_load'].fillna(0)
-        
-        X_train_d, X_test_d, y_train_d, y_test_d = train_test_split(
-            X_demand, y_demand, test_size=0.2, random_state=42
-        )
-        
-        self.demand_model = xgb.XGBRegressor(
-            n_estimators=150,
-            learning_rate=0.1,
-            max_depth=8,
-            random_state=42
-        )
-        
-        self.demand_model.fit(X_train_d, y_train_d)
-        demand_pred = self.demand_model.predict(X_test_d)
+        self.demand_model, y_test_d, demand_pred = fitted['demand_model']
+        self.demand_quantile_model, _, demand_quantiles = fitted['demand_quantile_model']
         demand_rmse = np.sqrt(mean_squared_error(y_test_d, demand_pred))
-        
         self.model_performance['demand_forecasting'] = {
             'rmse': demand_rmse,
-            'accuracy': 1 - (demand_rmse / y_test_d.std())
+            'accuracy': 1 - (demand_rmse / y_test_d.std()),
+            'trees': self.demand_model.get_booster().num_boosted_rounds(),
+            'interval_coverage': self._interval_coverage(y_test_d, demand_quantiles)
         }
         
-        # Train maintenance prediction model
-        maintenance_features = self._prepare_maintenance_features(trains_df, maintenance_df)
-        
-        if not maintenance_features.empty:
-            X_maint = maintenance_features.drop(['needs_maintenance', 'train_id'], axis=1, errors='ignore')
-            y_maint = maintenance_features['needs_maintenance']
-            
-            X_train_m, X_test_m, y_train_m, y_test_m = train_test_split(
-                X_maint, y_maint, test_size=0.2, random_state=42
-            )
-            
-            self.maintenance_model = xgb.XGBClassifier(
-                n_estimators=100,
-                learning_rate=0.1,
-                max_depth=6,
-                random_state=42
-            )
-            
-            self.maintenance_model.fit(X_train_m, y_train_m)
-            maint_pred = self.maintenance_model.predict(X_test_m)
-            maint_accuracy = accuracy_score(y_test_m, maint_pred)
-            
+        if 'maintenance_model' in fitted:
+            self.maintenance_model, y_test_m, maint_pred = fitted['maintenance_model']
             self.model_performance['maintenance_prediction'] = {
-                'accuracy': maint_accuracy
+                'accuracy': accuracy_score(y_test_m, maint_pred)
             }
         
         print(f"AI model training completed. Performance: {self.model_performance}")
+    
+    @staticmethod
+    def _interval_coverage(y_true, quantiles):
+        """Share of held-out targets inside the P10-P90 band"""
+        quantiles = np.sort(quantiles, axis=1)
+        y_true = np.asarray(y_true)
+        return float(np.mean((y_true >= quantiles[:, 0]) & (y_true <= quantiles[:, -1])))
+    
+    def predict_quantiles(self, attr, X):
+        """P10/P50/P90 for every row in one predict pass (sorted against crossing)"""
+        return np.sort(np.asarray(getattr(self, attr).predict(X)).reshape(len(X), len(QUANTILES)), axis=1)
+    
+    def _booster_params(self, attr, n_jobs=None):
+        """Constructor arguments of a freshly trained booster"""
+        return dict(
+            learning_rate=0.1,
+            tree_method='hist',
+            n_jobs=n_jobs or self.n_jobs,
+            early_stopping_rounds=self.early_stopping_rounds,
+            random_state=42,
+            **BOOSTER_PARAMS[attr]
+        )
+    
+    def _fit_booster(self, attr, X, y, n_jobs):
+        """Fit one histogram booster, early-stopping on its held-out split"""
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        model = MODEL_CLASSES[attr](**self._booster_params(attr, n_jobs))
+        model.fit(X_train, y_train, eval_set=[(X_test, y_test)], verbose=False)
+        return model, y_test, model.predict(X_test)
         
     def _prepare_delay_features(self, schedules_df):
         """Prepare features for delay prediction"""
-        features = schedules_df.copy()
+        features = cow_view(schedules_df)
         
         # Time-based features
         features['scheduled_departure'] = pd.to_datetime(features['scheduled_departure'])
@@ -148,9 +257,13 @@ class SmartMetroAI:
         
         return features[final_features].fillna(0)
     
-    def _prepare_demand_features(self, schedules_df):
-        """Prepare features for demand forecasting"""
-        features = schedules_df.copy()
+    def _prepare_demand_features(self, schedules_df, incremental=False):
+        """Prepare features for demand forecasting.
+        
+        A full preparation restarts the rolling demand state; incremental
+        batches continue it, so lag/rolling features only cost the new rows.
+        """
+        features = cow_view(schedules_df)
         
         # Time-based features
         features['scheduled_departure'] = pd.to_datetime(features['scheduled_departure'])
@@ -168,9 +281,10 @@ class SmartMetroAI:
             features['route_encoded'] = self.label_encoders['route'].transform(features['route'].fillna('Unknown'))
         
         # Historical demand features (rolling averages)
-        features = features.sort_values('scheduled_departure')
-        features['historical_demand'] = features.groupby('route')['passenger_load'].shift(1).fillna(0)
-        features['demand_trend'] = features.groupby('route')['passenger_load'].rolling(7).mean().reset_index(0, drop=True).fillna(0)
+        features = features.sort_values('scheduled_departure', kind='stable')
+        if not incremental:
+            self.demand_features.reset()
+        features = self.demand_features.extend(features)
         
         final_features = [
             'train_id', 'passenger_load', 'hour', 'day_of_week', 'month',
@@ -185,7 +299,7 @@ class SmartMetroAI:
         if maintenance_df.empty:
             return pd.DataFrame()
         
-        features = trains_df.copy()
+        features = cow_view(trains_df)
         
         # Calculate days since last maintenance
         features['last_maintenance'] = pd.to_datetime(features['last_maintenance'])
@@ -207,46 +321,91 @@ class SmartMetroAI:
         
         return features[final_features].fillna(0)
     
-    def predict_demand(self, days_ahead=7, route='all'):
-        """Predict passenger demand with confidence intervals"""
-        if self.demand_model is None:
-            return {'error': 'Demand model not trained'}
-        
-        # Generate future time points
-        future_dates = pd.date_range(
-            start=datetime.now(),
+    def _resolve_routes(self, route):
+        """Map a route name, list of names or 'all' to (names, encoded values).
+        
+        None is the default route encoding (0) that predict_demand has always used.
+        """
+        encoder = self.label_encoders.get('route')
+        if encoder is None or route is None:
+            return ['default'], [0]
+        known = list(encoder.classes_)
+        if route == 'all':
+            names = known
+        else:
+            names = [route] if isinstance(route, str) else list(route)
+            unknown = [r for r in names if r not in known]
+            if unknown:
+                raise ValueError(f"Unknown route(s): {unknown}")
+        return names, list(encoder.transform(names))
+    
+    def build_demand_frame(self, days_ahead=7, route='all', start=None):
+        """Feature matrix for every hourly timestamp x route in the horizon"""
+        timestamps = pd.date_range(
+            start=start or datetime.now(),
             periods=days_ahead * 24,  # Hourly predictions
-            freq='H'
+            freq='h'
         )
+        names, codes = self._resolve_routes(route)
+        n = len(timestamps)
+        
+        frame = pd.DataFrame({
+            'datetime': np.tile(timestamps.values, len(names)),
+            'route': np.repeat(names, n),
+            'route_encoded': np.repeat(codes, n)
+        })
+        when = frame['datetime'].dt
+        frame['hour'] = when.hour
+        frame['day_of_week'] = when.dayofweek
+        frame['month'] = when.month
+        frame['is_weekend'] = (frame['day_of_week'] >= 5).astype(int)
+        frame['is_peak_hour'] = frame['hour'].isin(PEAK_HOURS).astype(int)
+        frame['historical_demand'] = 150  # Average historical
+        frame['demand_trend'] = 150
+        return frame
+    
+    def forecast_demand(self, days_ahead=7, route='all', start=None):
+        """Columnar demand forecast: one batched predict over the whole horizon"""
+        frame = self.build_demand_frame(days_ahead, route, start)
+        demand_pred = self.demand_model.predict(frame[DEMAND_FEATURES])
+        
+        forecast = pd.DataFrame({
+            'datetime': frame['datetime'],
+            'route': frame['route'],
+            'predicted_demand': np.clip(demand_pred, 0, None).astype(int),
+            'confidence': 0.85  # Model confidence
+        })
+        if self.demand_quantile_model is not None:
+            quantiles = np.clip(self.predict_quantiles('demand_quantile_model', frame[DEMAND_FEATURES]), 0, None)
+            forecast['p10'], forecast['p50'], forecast['p90'] = quantiles.astype(int).T
+            forecast['confidence'] = self.model_performance.get('demand_forecasting', {}).get('interval_coverage', 0.8)
+        return forecast
+    
+    def predict_demand(self, days_ahead=7, route='all', as_frame=False, per_route=False):
+        """Predict passenger demand with confidence intervals.
         
-        predictions = []
-        for date in future_dates:
-            # Create feature vector
-            features = {
-                'hour': date.hour,
-                'day_of_week': date.dayofweek,
-                'month': date.month,
-                'is_weekend': int(date.dayofweek in [5, 6]),
-                'is_peak_hour': int(date.hour in [7, 8, 9, 17, 18, 19]),
-                'route_encoded': 0,  # Default route
-                'historical_demand': 150,  # Average historical
-                'demand_trend': 150
-            }
-            
-            feature_vector = np.array([[features[f] for f in [
-                'hour', 'day_of_week', 'month', 'is_weekend', 
-                'is_peak_hour', 'route_encoded', 'historical_demand', 'demand_trend'
-            ]]])
-            
-            demand_pred = self.demand_model.predict(feature_vector)[0]
-            
-            predictions.append({
-                'datetime': date.strftime('%Y-%m-%d %H:%M'),
-                'predicted_demand': max(0, int(demand_pred)),
-                'confidence': 0.85  # Model confidence
-            })
+        One row per hour: a known route name forecasts that route, anything else
+        (including 'all') the default route. per_route=True returns every
+        hour x route instead, and unknown route names are an error.
+        """
+        if self.demand_model is None:
+            return {'error': 'Demand model not trained'}
         
-        return predictions
+        if not per_route:
+            encoder = self.label_encoders.get('route')
+            known = encoder is not None and isinstance(route, str) and route in encoder.classes_
+            route = route if known else None
+        try:
+            forecast = self.forecast_demand(days_ahead, route)
+        except ValueError as e:
+            return {'error': str(e)}
+        if not per_route:
+            forecast = forecast.drop(columns='route')
+        if as_frame:
+            return forecast
+        
+        forecast['datetime'] = forecast['datetime'].dt.strftime('%Y-%m-%d %H:%M')
+        return forecast.to_dict('records')
     
     def predict_delays(self, route='Red Line', time_of_day='08:00'):
         """Predict delays with contributing factors"""
@@ -273,6 +432,14 @@ class SmartMetroAI:
         
         delay_pred = self.delay_model.predict(feature_vector)[0]
         
+        # Tail estimates from the quantile booster in the same call path
+        confidence = 0.82
+        interval = {}
+        if self.delay_quantile_model is not None:
+            p10, p50, p90 = np.clip(self.predict_quantiles('delay_quantile_model', feature_vector)[0], 0, None)
+            interval = {'p10': float(p10), 'p50': float(p50), 'p90': float(p90)}
+            confidence = self.model_performance.get('delay_prediction', {}).get('interval_coverage', 0.8)
+        
         # Determine contributing factors
         factors = []
         if hour in [7, 8, 9, 17, 18, 19]:
@@ -287,7 +454,8 @@ class SmartMetroAI:
         
         return {
             'delay': max(0, delay_pred),
-            'confidence': 0.82,
+            'confidence': confidence,
+            'interval': interval,
             'factors': factors,
             'suggestions': suggestions
         }
@@ -340,6 +508,49 @@ class SmartMetroAI:
             'reason': f'AI prediction based on operational data'
         }
     
+    def predict_maintenance_batch(self, trains_df, now=None):
+        """Maintenance needs for a whole fleet in one pass.
+        
+        Returns a frame aligned with trains_df with the action, confidence,
+        days_until and reason columns of predict_maintenance, using a single
+        predict_proba call and vectorized thresholds.
+        """
+        now = pd.Timestamp(now or datetime.now())
+        n = len(trains_df)
+        
+        def column(name, default):
+            if name not in trains_df.columns:
+                return np.full(n, default, dtype=float)
+            return pd.to_numeric(trains_df[name], errors='coerce').to_numpy(dtype=float)
+        
+        days_since = (now - pd.to_datetime(trains_df['last_maintenance'])).dt.days.to_numpy()
+        mechanical_score = column('mechanical_score', 0.8)
+        result = pd.DataFrame(index=trains_df.index)
+        
+        if self.maintenance_model is None:
+            # Fallback rule-based approach
+            overdue = days_since > 90
+            due = overdue | (mechanical_score < 0.6)
+            result['action'] = np.where(due, 'Schedule Maintenance', 'Monitor')
+            result['confidence'] = np.where(due, 0.9, 0.8)
+            result['days_until'] = np.where(due, np.maximum(0, 30 - (days_since - 60)), 90 - days_since)
+            result['reason'] = np.select(
+                [overdue, due], ['Due for scheduled maintenance', 'Low mechanical score'],
+                'Normal operation parameters'
+            )
+            return result
+        
+        features = np.column_stack([days_since, column('energy_consumption', 0), mechanical_score])
+        maintenance_prob = self.maintenance_model.predict_proba(features)[:, 1]
+        
+        high = maintenance_prob > 0.7
+        medium = maintenance_prob > 0.4
+        result['action'] = np.select([high, medium], ['Schedule Maintenance', 'Monitor Closely'], 'Monitor')
+        result['confidence'] = maintenance_prob
+        result['days_until'] = np.select([high, medium], [7, 21], 90)
+        result['reason'] = 'AI prediction based on operational data'
+        return result
+    
     def calculate_train_readiness(self, train_data):
         """AI-driven train readiness assessment"""
         # Factors for readiness calculation
@@ -367,23 +578,61 @@ class SmartMetroAI:
         factors['branding'] = brand_factor
         
         # Crew availability (5% weight)
-        crew_factor = 1.0 if train_data.get('crew_id') else 0.5
+        crew_id = train_data.get('crew_id')
+        crew_factor = 1.0 if pd.notna(crew_id) and crew_id else 0.5
         factors['crew'] = crew_factor
         
         # Calculate weighted readiness score
-        readiness_score = (
-            factors['mechanical'] * 0.40 +
-            factors['maintenance'] * 0.25 +
-            factors['energy'] * 0.20 +
-            factors['branding'] * 0.10 +
-            factors['crew'] * 0.05
-        )
+        readiness_score = sum(factors[name] * weight for name, weight in READINESS_WEIGHTS.items())
         
         return min(1.0, max(0.0, readiness_score))
     
-    def explain_train_status(self, train_data):
+    def calculate_fleet_readiness(self, trains_df, now=None):
+        """Readiness for a whole fleet as column operations.
+        
+        Returns a frame aligned with trains_df holding readiness_score and the
+        per-factor breakdown (mechanical, maintenance, energy, branding, crew),
+        using the same rules and weights as calculate_train_readiness.
+        """
+        now = pd.Timestamp(now or datetime.now())
+        n = len(trains_df)
+        
+        def column(name, default):
+            if name not in trains_df.columns:
+                return np.full(n, default, dtype=float)
+            return pd.to_numeric(trains_df[name], errors='coerce').fillna(default).to_numpy(dtype=float)
+        
+        factors = pd.DataFrame(index=trains_df.index)
+        factors['mechanical'] = column('mechanical_score', 0.8)
+        
+        days_since = (now - pd.to_datetime(trains_df['last_maintenance'])).dt.days
+        # An unknown maintenance date scores 0, as it does per train
+        days_since = days_since.fillna(120).to_numpy(dtype=float)
+        factors['maintenance'] = np.maximum(0, 1 - (days_since / 120))  # Decreases over 120 days
+        
+        energy = np.minimum(1.0, column('energy_consumption', 0) / 100)
+        factors['energy'] = np.where(energy > 0.9, 0.3, energy)  # High consumption = low readiness
+        
+        factors['branding'] = np.minimum(1.0, column('brand_hours_remaining', 8) / 8)
+        
+        if 'crew_id' in trains_df.columns:
+            crew = trains_df['crew_id'].astype(object)
+            present = crew.notna()
+            # Same truthiness as per train: '', 0 and False count as unassigned
+            assigned = present & crew.where(present, False).astype(bool)
+            factors['crew'] = np.where(assigned, 1.0, 0.5)
+        else:
+            factors['crew'] = 0.5
+        
+        weights = np.array([READINESS_WEIGHTS[name] for name in factors.columns])
+        score = factors.to_numpy() @ weights
+        factors.insert(0, 'readiness_score', np.clip(score, 0.0, 1.0))
+        return factors
+    
+    def explain_train_status(self, train_data, readiness=None):
         """Provide AI reasoning for train status"""
-        readiness = self.calculate_train_readiness(train_data)
+        if readiness is None:
+            readiness = self.calculate_train_readiness(train_data)
         
         reasons = []
         
@@ -421,8 +670,14 @@ class SmartMetroAI:
         
         return status_explanation
     
-    def emergency_response(self, scenario_type, affected_trains, affected_routes, available_trains):
-        """AI-driven emergency response system"""
+    def emergency_response(self, scenario_type, affected_trains, affected_routes, available_trains,
+                           standby_pool=None, depot=None):
+        """AI-driven emergency response system.
+        
+        With a StandbyPool, breakdown backups are popped from its readiness
+        heap (optionally restricted to a depot) instead of filtering and
+        sorting available_trains; deployed backups leave the pool.
+        """
         
         response = {
             'scenario': scenario_type,
@@ -435,12 +690,15 @@ class SmartMetroAI:
         
         if scenario_type == 'train_breakdown':
             # Find best backup trains
-            backup_candidates = available_trains[
-                available_trains['readiness_score'] > 0.8
-            ].sort_values('readiness_score', ascending=False)
-            
-            if not backup_candidates.empty:
+            if standby_pool is not None:
+                response['backup_trains'] = standby_pool.take(2, depot=depot, min_readiness=0.8)
+            else:
+                backup_candidates = available_trains[
+                    available_trains['readiness_score'] > 0.8
+                ].sort_values('readiness_score', ascending=False)
                 response['backup_trains'] = backup_candidates.head(2).to_dict('records')
+            
+            if response['backup_trains']:
                 response['immediate_actions'].append("Deploy backup trains from ready pool")
             
             response['immediate_actions'].extend([
@@ -480,27 +738,27 @@ class SmartMetroAI:
         
         return response
     
-    def what_if_analysis(self, scenario, parameters, time_horizon):
-        """Perform comprehensive what-if analysis"""
+    def what_if_analysis(self, scenario, parameters, time_horizon, n_runs=10000, n_workers=1):
+        """Perform comprehensive what-if analysis.
+        
+        Scenarios are simulated with MonteCarloEngine against the current
+        operation: performance_delta holds the mean percentage change per
+        metric and distributions the spread (std, p5/p50/p95) across runs.
+        """
         
         results = {
             'scenario': scenario,
             'parameters': parameters,
             'performance_delta': {},
+            'distributions': {},
             'recommendations': []
         }
         
+        if scenario in SCENARIO_METRICS:
+            engine = MonteCarloEngine(self, n_runs=n_runs, n_workers=n_workers)
+            results.update(engine.run(scenario, parameters, time_horizon))
+        
         if scenario == 'increase_frequency':
-            freq_increase = parameters.get('frequency_increase', 20)  # % increase
-            
-            # Simulate impact
-            results['performance_delta'] = {
-                'passenger_wait_time': -freq_increase * 0.3,  # Reduction
-                'operational_cost': freq_increase * 0.8,       # Increase
-                'energy_consumption': freq_increase * 0.6,     # Increase
-                'customer_satisfaction': freq_increase * 0.4   # Increase
-            }
-            
             results['recommendations'] = [
                 "Monitor energy consumption closely",
                 "Ensure adequate train maintenance capacity",
@@ -508,14 +766,6 @@ class SmartMetroAI:
             ]
             
         elif scenario == 'reduce_maintenance_window':
-            window_reduction = parameters.get('window_reduction', 2)  # hours
-            
-            results['performance_delta'] = {
-                'train_availability': window_reduction * 5,    # Increase
-                'maintenance_quality': -window_reduction * 3,  # Decrease
-                'long_term_reliability': -window_reduction * 2 # Decrease
-            }
-            
             results['recommendations'] = [
                 "Implement predictive maintenance",
                 "Increase maintenance efficiency",
@@ -525,22 +775,30 @@ class SmartMetroAI:
         return results
     
     def get_confidence_intervals(self, forecast):
-        """Calculate confidence intervals for predictions"""
-        confidence_intervals = []
+        """Calculate confidence intervals for predictions.
+        
+        Accepts the frame from forecast_demand (returns a frame) or the list of
+        records from predict_demand (returns a list of records).
+        """
+        as_records = not isinstance(forecast, pd.DataFrame)
+        frame = pd.DataFrame(list(forecast)) if as_records else forecast
+        if frame.empty:
+            return [] if as_records else frame
+        
+        demand = frame['predicted_demand'].to_numpy()
+        intervals = pd.DataFrame({'datetime': frame['datetime']})
+        if 'route' in frame.columns:
+            intervals['route'] = frame['route']
+        if {'p10', 'p90'} <= set(frame.columns):
+            # P10/P90 from the quantile booster, widened to contain the point forecast
+            intervals['lower_bound'] = np.minimum(frame['p10'].to_numpy(), demand)
+            intervals['upper_bound'] = np.maximum(frame['p90'].to_numpy(), demand)
+        else:
+            intervals['lower_bound'] = np.maximum(0, (demand * 0.85).astype(int))  # 15% lower
+            intervals['upper_bound'] = (demand * 1.15).astype(int)                 # 15% higher
+        intervals['prediction'] = demand
         
-        for pred in forecast:
-            demand = pred['predicted_demand']
-            lower_bound = max(0, int(demand * 0.85))  # 15% lower
-            upper_bound = int(demand * 1.15)          # 15% higher
-            
-            confidence_intervals.append({
-                'datetime': pred['datetime'],
-                'lower_bound': lower_bound,
-                'upper_bound': upper_bound,
-                'prediction': demand
-            })
-        
-        return confidence_intervals
+        return intervals.to_dict('records') if as_records else intervals
     
     def get_demand_factors(self):
         """Get factors influencing demand predictions"""
@@ -571,25 +829,198 @@ class SmartMetroAI:
         """Get current model performance metrics"""
         return self.model_performance
     
+    def _update_window(self, name, X, y):
+        """Append rows to a model's sliding training window, keeping the newest"""
+        if name in self.training_windows:
+            X_old, y_old = self.training_windows[name]
+            X = pd.concat([X_old, X], ignore_index=True)
+            y = pd.concat([y_old, y], ignore_index=True)
+        self.training_windows[name] = (X.tail(self.window_size), y.tail(self.window_size))
+        return self.training_windows[name]
+    
+    def _continue_boosting(self, attr, model, X_window, y_window):
+        """Boost extra rounds from the existing booster, or refit when at the cap"""
+        params = model.get_params()
+        booster = model.get_booster()
+        best_iteration = booster.attr('best_iteration')
+        if best_iteration is not None:
+            # Drop the trees boosted past the early-stopping optimum
+            booster = booster[:int(best_iteration) + 1]
+        current_trees = booster.num_boosted_rounds()
+        rounds = min(self.incremental_rounds, self.max_total_trees - current_trees)
+        
+        if rounds <= 0:
+            # Tree cap reached: compact by refitting from scratch on the window
+            refit_params = dict(params, **BOOSTER_PARAMS[attr], early_stopping_rounds=None)
+            refit = type(model)(**refit_params)
+            refit.fit(X_window, y_window)
+            return refit, {'mode': 'refit', 'rows': len(X_window),
+                           'total_trees': refit.get_booster().num_boosted_rounds()}
+        
+        updated = type(model)(**dict(params, n_estimators=rounds, early_stopping_rounds=None))
+        updated.fit(X_window, y_window, xgb_model=booster)
+        return updated, {'mode': 'continued', 'rounds_added': rounds, 'rows': len(X_window),
+                         'total_trees': updated.get_booster().num_boosted_rounds()}
+    
     def incremental_training(self, new_data, data_type):
-        """Perform incremental training with new data"""
-        # Simplified incremental training
-        # In production, this would be more sophisticated
+        """Perform incremental training with new data.
+        
+        Schedule records are appended to each model's sliding window of recent
+        rows, and the delay and demand models boost extra rounds on that window
+        from their current boosters instead of refitting from scratch. Once a
+        model reaches max_total_trees it is refitted on the window instead.
+        """
         print(f"Incremental training on {len(new_data)} new {data_type} records")
+        summary = {}
+        
+        if data_type != 'schedules':
+            return summary
         
-        if data_type == 'schedules' and self.delay_model is not None:
-            # Update delay model with new schedule data
+        updates = [
+            ('delay', self._prepare_delay_features, 'delay_minutes', ['delay_model', 'delay_quantile_model']),
+            ('demand', lambda df: self._prepare_demand_features(df, incremental=True), 'passenger_load',
+             ['demand_model', 'demand_quantile_model'])
+        ]
+        for name, prepare, target, attrs in updates:
+            if getattr(self, attrs[0]) is None:
+                continue
             try:
-                delay_features = self._prepare_delay_features(new_data)
-                if not delay_features.empty:
-                    X_new = delay_features.drop(['delay_minutes', 'train_id'], axis=1, errors='ignore')
-                    y_new = delay_features['delay_minutes'].fillna(0)
-                    
-                    # Simple incremental update
-                    self.delay_model.fit(X_new, y_new)
-                    print("Delay model updated successfully")
+                features = prepare(new_data)
+                if features.empty:
+                    continue
+                X_new = features.drop([target, 'train_id'], axis=1, errors='ignore')
+                y_new = features[target].fillna(0)
+                X_window, y_window = self._update_window(name, X_new, y_new)
+                
+                # The point and quantile boosters share the window
+                for attr in attrs:
+                    model = getattr(self, attr)
+                    if model is None:
+                        continue
+                    key = name if attr == attrs[0] else f"{name}_quantiles"
+                    updated, summary[key] = self._continue_boosting(attr, model, X_window, y_window)
+                    setattr(self, attr, updated)
+                    print(f"{attr} updated successfully: {summary[key]}")
             except Exception as e:
                 print(f"Incremental training error: {e}")
+                summary[name] = {'mode': 'failed', 'error': str(e)}
+        
+        return summary
+    
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.model_dir, 'manifest.json'), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'current': None, 'versions': []}
+    
+    def _write_manifest(self, manifest):
+        # Write then rename so a crashed save never leaves a torn manifest
+        path = os.path.join(self.model_dir, 'manifest.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + '.tmp', path)
+    
+    def save_models(self, fingerprint=None):
+        """Persist the boosters, encoders and metrics as a new model version"""
+        version = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        version_dir = os.path.join(self.model_dir, version)
+        os.makedirs(version_dir, exist_ok=True)
+        
+        files, params = {}, {}
+        for attr, filename in MODEL_FILES.items():
+            model = getattr(self, attr)
+            if model is not None:
+                model.save_model(os.path.join(version_dir, filename))
+                files[attr] = filename
+                # The native file holds the trees only; keep the sklearn settings
+                # so continued boosting and refits use them after a reload
+                params[attr] = {key: value for key, value in model.get_params().items()
+                                if value is not None and key not in ('n_jobs', 'callbacks')}
+        with open(os.path.join(version_dir, 'booster_params.json'), 'w') as f:
+            json.dump(params, f, default=lambda value: value.tolist())
+        joblib.dump(self.training_windows, os.path.join(version_dir, 'training_windows.joblib'))
+        joblib.dump(self.label_encoders, os.path.join(version_dir, 'label_encoders.joblib'))
+        joblib.dump(self.demand_features, os.path.join(version_dir, 'demand_features.joblib'))
+        with open(os.path.join(version_dir, 'model_performance.json'), 'w') as f:
+            json.dump(self.model_performance, f, default=float)
+        
+        manifest = self._read_manifest()
+        manifest['versions'].append({
+            'version': version,
+            'fingerprint': fingerprint,
+            'files': files,
+            'saved_at': datetime.now().isoformat()
+        })
+        manifest['current'] = version
+        
+        # Keep only the newest versions on disk
+        stale = manifest['versions'][:-self.keep_versions] if self.keep_versions else []
+        manifest['versions'] = manifest['versions'][len(stale):]
+        self._write_manifest(manifest)
+        for entry in stale:
+            shutil.rmtree(os.path.join(self.model_dir, entry['version']), ignore_errors=True)
+        
+        self.model_version = version
+        self.data_fingerprint = fingerprint
+        print(f"💾 Saved SmartMetroAI models as version {version}")
+        return version
+    
+    def load_models(self, version=None):
+        """Load a persisted model version (the current one by default)"""
+        manifest = self._read_manifest()
+        version = version or manifest.get('current')
+        entry = next((v for v in manifest['versions'] if v['version'] == version), None)
+        if entry is None:
+            return False
+        
+        version_dir = os.path.join(self.model_dir, version)
+        try:
+            params_path = os.path.join(version_dir, 'booster_params.json')
+            saved_params = {}
+            if os.path.exists(params_path):
+                with open(params_path, 'r') as f:
+                    saved_params = json.load(f)
+            for attr in MODEL_FILES:
+                model = None
+                if attr in entry['files']:
+                    params = self._booster_params(attr)
+                    params.update({key: np.array(value) if isinstance(value, list) else value
+                                   for key, value in saved_params.get(attr, {}).items()})
+                    model = MODEL_CLASSES[attr](**params)
+                    model.load_model(os.path.join(version_dir, entry['files'][attr]))
+                setattr(self, attr, model)
+            self.label_encoders = joblib.load(os.path.join(version_dir, 'label_encoders.joblib'))
+            features_path = os.path.join(version_dir, 'demand_features.joblib')
+            if os.path.exists(features_path):
+                self.demand_features = joblib.load(features_path)
+            windows_path = os.path.join(version_dir, 'training_windows.joblib')
+            self.training_windows = joblib.load(windows_path) if os.path.exists(windows_path) else {}
+            with open(os.path.join(version_dir, 'model_performance.json'), 'r') as f:
+                self.model_performance = json.load(f)
+        except Exception as e:
+            print(f"⚠️  Could not load SmartMetroAI version {version}: {e}")
+            return False
+        
+        self.model_version = version
+        self.data_fingerprint = entry.get('fingerprint')
+        print(f"✅ Loaded SmartMetroAI models version {version}")
+        return True
+    
+    def ensure_models(self, schedules_df, trains_df, maintenance_df):
+        """Load the current models when they match the data, otherwise train and save"""
+        fingerprint = data_fingerprint(schedules_df, trains_df, maintenance_df)
+        if self.delay_model is not None and self.data_fingerprint == fingerprint:
+            return {'source': 'memory', 'version': self.model_version}
+        
+        manifest = self._read_manifest()
+        current = next((v for v in manifest['versions'] if v['version'] == manifest.get('current')), None)
+        if current and current.get('fingerprint') == fingerprint and self.load_models(current['version']):
+            return {'source': 'loaded', 'version': current['version']}
+        
+        self.train_models(schedules_df, trains_df, maintenance_df)
+        version = self.save_models(fingerprint)
+        return {'source': 'trained', 'version': version}
     
     def retrain_models(self, schedules_df, trains_df, maintenance_df):
         """Complete model retraining"""
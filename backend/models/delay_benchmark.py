@@ -0,0 +1,129 @@
+"""
+🚇 KMRL Delay Model Benchmark
+Compares DelayPredictor configurations on the same expanded training data
+
+Reports, per configuration:
+- Category accuracy and minutes MAE on a held-out split
+- Fit time
+- Serialized artifact size
+- Single-row and batch predict latency
+
+Run: python -m backend.models.delay_benchmark
+"""
+
+import io
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, mean_absolute_error
+from sklearn.model_selection import train_test_split
+
+from backend.models.delay_prediction_model import DelayPredictor, ENGINES, MODEL_MODES
+
+
+def artifact_size_bytes(models):
+    """Total joblib-serialized size of a dict of fitted models"""
+    total = 0
+    for model in models.values():
+        buffer = io.BytesIO()
+        joblib.dump(model, buffer)
+        total += buffer.getbuffer().nbytes
+    return total
+
+
+def _median_latency_ms(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def benchmark_configuration(X_train, X_test, targets_train, targets_test, repeats=20, **predictor_kwargs):
+    """Fit one DelayPredictor configuration and measure it
+
+    Unless the configuration says otherwise, the predictor is untuned and
+    points at a scratch model_dir, so a tuned configuration saved in the real
+    model directory never changes what is benchmarked.
+    """
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        predictor = DelayPredictor(**{'model_dir': scratch_dir, 'use_tuned': False, **predictor_kwargs})
+
+    start = time.perf_counter()
+    predictor.fit_models(X_train, targets_train)
+    fit_seconds = time.perf_counter() - start
+
+    predictions = predictor.predict_frame(X_test)
+    single_row = X_test.iloc[:1]
+
+    return {
+        **predictor_kwargs,
+        'category_accuracy': accuracy_score(targets_test['delay_category'], predictions['delay_category']),
+        'minutes_mae': mean_absolute_error(targets_test['delay_minutes'], predictions['delay_minutes']),
+        'service_pattern_accuracy': accuracy_score(targets_test['service_pattern'], predictions['service_pattern']),
+        'day_type_accuracy': accuracy_score(targets_test['day_type'], predictions['day_type']),
+        'fit_seconds': fit_seconds,
+        'artifact_mb': artifact_size_bytes(predictor.models) / 1e6,
+        'predict_row_ms': _median_latency_ms(lambda: predictor.predict_frame(single_row), repeats),
+        'predict_batch_ms': _median_latency_ms(lambda: predictor.predict_frame(X_test), max(1, repeats // 4)),
+        'models_count': len(predictor.models)
+    }
+
+
+def split_training_data(df=None, test_size=0.2):
+    """Expand base data once and split it into train/test features and targets"""
+    base = DelayPredictor(use_tuned=False)
+    if df is None:
+        df = base.generate_sample_data()
+    X, targets = base.prepare_training_data(df)
+
+    indices = np.arange(len(X))
+    train_idx, test_idx = train_test_split(indices, test_size=test_size, random_state=42)
+    return (
+        X.iloc[train_idx], X.iloc[test_idx],
+        {k: v.iloc[train_idx] for k, v in targets.items()},
+        {k: v.iloc[test_idx] for k, v in targets.items()}
+    )
+
+
+def run_benchmark(configurations, df=None, test_size=0.2, repeats=20):
+    """Benchmark a list of DelayPredictor keyword configurations on one split"""
+    X_train, X_test, targets_train, targets_test = split_training_data(df, test_size)
+    rows = []
+    for config in configurations:
+        print(f"⏱️ Benchmarking {config} on {len(X_train)} rows...")
+        rows.append(benchmark_configuration(
+            X_train, X_test, targets_train, targets_test, repeats=repeats, **config
+        ))
+    return pd.DataFrame(rows)
+
+
+def benchmark_model_modes(df=None, test_size=0.2, repeats=20):
+    """Compare one estimator per head (separate) with the shared multi-output forest"""
+    return run_benchmark([{'model_mode': mode} for mode in MODEL_MODES], df, test_size, repeats)
+
+
+def history_base_frame(history_path='schedule_history.csv'):
+    """One base row per train seen in the trip history"""
+    history = pd.read_csv(history_path, usecols=['train_id'])
+    return pd.DataFrame({'TrainID': sorted(history['train_id'].dropna().unique())})
+
+
+def benchmark_engines(history_path='schedule_history.csv', test_size=0.2, repeats=20):
+    """Compare estimator engines on schedule_history.csv-derived training data"""
+    configurations = [
+        {'model_mode': 'separate', 'engine': engine} for engine in ENGINES
+    ] + [{'model_mode': 'shared', 'engine': 'random_forest'}]
+    return run_benchmark(configurations, history_base_frame(history_path), test_size, repeats)
+
+
+if __name__ == "__main__":
+    print("🚇 KMRL Delay Model Benchmark")
+    print("=" * 50)
+    report = benchmark_engines()
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(report.round(4))
@@ -0,0 +1,199 @@
+"""
+🚇 KMRL Delay Model Tuning
+Successive-halving hyperparameter search for DelayPredictor
+
+Candidates are sampled across model families and hyperparameters, scored on
+the delay-minutes head (MAE on a held-out split) with a growing share of the
+training rows, and the best 1/factor survive each rung. Evaluations run in a
+process pool under a wall-clock budget; evaluations still running when it
+runs out are terminated. The winner is written to delay_model_metadata.json
+for the delay-minutes regressor only (the classifier heads were not scored),
+so production retrains use it without tuning on the request path.
+
+Run: python -m backend.models.delay_tuning --budget 120
+"""
+
+import argparse
+import itertools
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import train_test_split
+
+from backend.models.delay_prediction_model import DelayPredictor, ENGINE_PARAMS, ENGINES
+
+SEARCH_SPACE = {
+    'random_forest': {
+        'n_estimators': [50, 100, 200],
+        'max_depth': [None, 10, 15, 20],
+        'min_samples_leaf': [1, 2, 5]
+    },
+    'hist_gradient_boosting': {
+        'learning_rate': [0.05, 0.1, 0.2],
+        'max_leaf_nodes': [15, 31, 63],
+        'min_samples_leaf': [10, 20, 40],
+        'l2_regularization': [0.0, 1.0]
+    }
+}
+
+# Per-worker training data, installed once by the pool initializer
+_WORKER_DATA = {}
+
+
+def sample_candidates(n_candidates, seed=42, search_space=None):
+    """Draw distinct (engine, params) candidates spread across the families"""
+    search_space = search_space or SEARCH_SPACE
+    grid = []
+    for engine, space in search_space.items():
+        names = sorted(space)
+        for values in itertools.product(*(space[name] for name in names)):
+            grid.append({'engine': engine, 'params': dict(zip(names, values))})
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(grid), size=min(n_candidates, len(grid)), replace=False)
+    return [grid[i] for i in picks]
+
+
+def _init_worker(X_train, y_train, X_val, y_val):
+    _WORKER_DATA.update(X_train=X_train, y_train=y_train, X_val=X_val, y_val=y_val)
+
+
+def _evaluate(candidate_id, candidate, n_rows):
+    """Fit the minutes regressor on the first n_rows and score it"""
+    params = dict(ENGINE_PARAMS[candidate['engine']])
+    if candidate['engine'] == 'random_forest':
+        params['n_jobs'] = 1  # parallelism comes from the process pool
+    params.update(candidate['params'])
+    model = ENGINES[candidate['engine']]['regressor'](**params)
+
+    start = time.perf_counter()
+    model.fit(_WORKER_DATA['X_train'][:n_rows], _WORKER_DATA['y_train'][:n_rows])
+    fit_seconds = time.perf_counter() - start
+    mae = mean_absolute_error(_WORKER_DATA['y_val'], model.predict(_WORKER_DATA['X_val']))
+    return candidate_id, float(mae), fit_seconds
+
+
+def _terminate(pool):
+    """Shut the pool down without waiting, killing workers still fitting"""
+    processes = list((getattr(pool, '_processes', None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join()
+
+
+def successive_halving(X, y, candidates, budget_seconds=120, factor=3, min_rows=500,
+                       max_workers=None, seed=42):
+    """Run the search and return the best candidate of the deepest completed rung"""
+    X_train, X_val, y_train, y_val = train_test_split(
+        np.asarray(X, dtype=float), np.asarray(y, dtype=float), test_size=0.2, random_state=seed
+    )
+    deadline = time.monotonic() + budget_seconds
+    max_workers = max_workers or os.cpu_count() or 1
+
+    survivors = list(range(len(candidates)))
+    n_rows = min(min_rows, len(X_train))
+    rungs = []
+    best = None
+
+    pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                               initargs=(X_train, y_train, X_val, y_val))
+    try:
+        while survivors:
+            pending = {pool.submit(_evaluate, cid, candidates[cid], n_rows) for cid in survivors}
+            scores = {}
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    cid, mae, fit_seconds = future.result()
+                    scores[cid] = (mae, fit_seconds)
+
+            if pending:
+                for future in pending:
+                    future.cancel()
+                print(f"⏱️ Budget exhausted in rung {len(rungs) + 1} ({len(scores)}/{len(survivors)} evaluated)")
+
+            if scores:
+                ranked = sorted(scores, key=lambda cid: scores[cid][0])
+                rungs.append({
+                    'rows': n_rows,
+                    'evaluated': len(scores),
+                    'best_mae': scores[ranked[0]][0],
+                    'complete': not pending
+                })
+                # A rung cut short by the budget only counts if nothing better is known
+                if not pending or best is None:
+                    best = {'id': ranked[0], 'mae': scores[ranked[0]][0], 'rows': n_rows}
+                print(f"   Rung {len(rungs)}: {len(scores)} candidates on {n_rows} rows, best MAE {best['mae']:.4f}")
+
+            if pending or len(survivors) == 1 or n_rows >= len(X_train):
+                break
+            survivors = ranked[:max(1, math.ceil(len(ranked) / factor))]
+            n_rows = min(n_rows * factor, len(X_train))
+    finally:
+        # Evaluations still running past the budget are stopped, not awaited
+        _terminate(pool)
+
+    if best is None:
+        raise TimeoutError("No candidate finished within the tuning budget")
+
+    winner = candidates[best['id']]
+    return {
+        'engine': winner['engine'],
+        'params': winner['params'],
+        'validation_mae': best['mae'],
+        'rows': best['rows'],
+        'rungs': rungs
+    }
+
+
+def tune_delay_predictor(df=None, model_dir='backend/models/saved_models', budget_seconds=120,
+                         n_candidates=24, factor=3, min_rows=500, max_workers=None, seed=42, save=True):
+    """Tune DelayPredictor hyperparameters and persist the winner in its metadata"""
+    start = time.time()
+    predictor = DelayPredictor(model_dir=model_dir, use_tuned=False)
+    if df is None:
+        df = predictor.generate_sample_data()
+    X, targets = predictor.prepare_training_data(df)
+
+    candidates = sample_candidates(n_candidates, seed=seed)
+    print(f"🔎 Tuning {len(candidates)} candidates on {len(X)} rows "
+          f"(budget {budget_seconds}s, factor {factor})...")
+    result = successive_halving(
+        X, targets['delay_minutes'], candidates, budget_seconds=budget_seconds, factor=factor,
+        min_rows=min_rows, max_workers=max_workers, seed=seed
+    )
+    # Candidates were scored on delay minutes alone
+    result['heads'] = ['delay_minutes']
+    result['tuned_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    result['elapsed_seconds'] = time.time() - start
+
+    if save:
+        predictor.save_tuned_config(result)
+    print(f"✅ Best: {result['engine']} {result['params']} (MAE {result['validation_mae']:.4f})")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Successive-halving search for DelayPredictor")
+    parser.add_argument('--budget', type=float, default=120, help='wall-clock budget in seconds')
+    parser.add_argument('--candidates', type=int, default=24)
+    parser.add_argument('--factor', type=int, default=3)
+    parser.add_argument('--min-rows', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--model-dir', default='backend/models/saved_models')
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    tune_delay_predictor(
+        model_dir=args.model_dir, budget_seconds=args.budget, n_candidates=args.candidates,
+        factor=args.factor, min_rows=args.min_rows, max_workers=args.workers, save=not args.no_save
+    )
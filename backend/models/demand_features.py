@@ -0,0 +1,105 @@
+"""
+🚇 KMRL Rolling Demand Features
+Incremental lag/rolling passenger-load features per route
+
+- Per-route ring buffer of the last `window` loads with a running sum
+- update(): O(1) lag and rolling mean for a single new trip record
+- extend(): vectorized over a batch, seeded with the buffered tail only, so
+  cost follows the new data rather than the whole history
+- Matches groupby('route').shift(1) / rolling(window).mean() on the full,
+  departure-ordered history (missing values become 0)
+"""
+
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+class RollingDemandFeatures:
+    def __init__(self, window=7, keep_history=True):
+        self.window = window
+        self.keep_history = keep_history
+        self.reset()
+
+    def reset(self):
+        self._buffers = {}
+        self._sums = {}
+        self._nans = {}
+        self._chunks = []
+        self.records_seen = 0
+
+    def __getstate__(self):
+        # Persist the per-route state, not the exported history
+        state = self.__dict__.copy()
+        state['_chunks'] = []
+        return state
+
+    def _push(self, route, load):
+        buffer = self._buffers.setdefault(route, deque(maxlen=self.window))
+        if len(buffer) == self.window:
+            oldest = buffer[0]
+            if math.isnan(oldest):
+                self._nans[route] -= 1
+            else:
+                self._sums[route] -= oldest
+        buffer.append(load)
+        if math.isnan(load):
+            self._nans[route] = self._nans.get(route, 0) + 1
+        else:
+            self._sums[route] = self._sums.get(route, 0.0) + load
+
+    def update(self, route, passenger_load):
+        """Add one trip record and return its (historical_demand, demand_trend)"""
+        self.records_seen += 1
+        if not isinstance(route, str) and pd.isna(route):
+            return 0.0, 0.0
+        load = float(passenger_load) if passenger_load is not None else float('nan')
+        buffer = self._buffers.get(route)
+        lag = buffer[-1] if buffer else float('nan')
+
+        self._push(route, load)
+        buffer = self._buffers[route]
+        full = len(buffer) == self.window and self._nans.get(route, 0) == 0
+        trend = self._sums[route] / self.window if full else 0.0
+        return (0.0 if math.isnan(lag) else lag), trend
+
+    def extend(self, frame, route_col='route', load_col='passenger_load'):
+        """Add historical_demand/demand_trend to a departure-ordered batch"""
+        frame = frame.copy()
+        n = len(frame)
+        prefix_routes, prefix_loads = [], []
+        for route, buffer in self._buffers.items():
+            prefix_routes.extend([route] * len(buffer))
+            prefix_loads.extend(buffer)
+
+        combined = pd.DataFrame({
+            'route': np.concatenate([np.array(prefix_routes, dtype=object), frame[route_col].to_numpy(dtype=object)]),
+            'load': np.concatenate([np.array(prefix_loads, dtype=float), frame[load_col].to_numpy(dtype=float)])
+        })
+        grouped = combined.groupby('route', sort=False)['load']
+        lag = grouped.shift(1).to_numpy()
+        # Rows whose route is missing are in no group and come back as NaN
+        trend = grouped.rolling(self.window).mean().reset_index(0, drop=True).reindex(combined.index).to_numpy()
+
+        offset = len(prefix_loads)
+        frame['historical_demand'] = np.nan_to_num(lag[offset:], nan=0.0)
+        frame['demand_trend'] = np.nan_to_num(trend[offset:], nan=0.0)
+
+        # Keep only the last `window` loads per route as the new state
+        tail = combined.iloc[offset:].dropna(subset=['route']).groupby('route', sort=False).tail(self.window)
+        for route, loads in tail.groupby('route', sort=False)['load']:
+            for load in loads:
+                self._push(route, float(load))
+
+        self.records_seen += n
+        if self.keep_history:
+            self._chunks.append(frame)
+        return frame
+
+    def to_frame(self):
+        """All batches seen since the last reset, with their features"""
+        if not self._chunks:
+            return pd.DataFrame()
+        return pd.concat(self._chunks)
@@ -0,0 +1,113 @@
+"""
+🚇 KMRL Prediction Cache
+Bounded LRU/TTL cache for live delay queries
+
+Dashboard and API callers repeat near-identical queries, so inputs are
+quantized to a configurable resolution before being used as the cache key.
+Entries are tied to a model version and the whole cache is dropped as soon as
+a different version is seen.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Step size per input; 0 or None keeps the raw value in the key
+DEFAULT_RESOLUTION = {
+    'dwell_time_seconds': 1,
+    'distance_km': 0.1,
+    'scheduled_load_factor': 0.01,
+    'time_of_day': 1,
+    'passenger_density': 0.01,
+    'route_complexity': 0.05
+}
+
+
+class PredictionCache:
+    def __init__(self, maxsize=4096, ttl_seconds=300.0, resolution=None, clock=time.monotonic):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.resolution = dict(DEFAULT_RESOLUTION)
+        if resolution:
+            self.resolution.update(resolution)
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def quantize(self, inputs):
+        """Snap every input to its configured resolution"""
+        quantized = {}
+        for name, value in inputs.items():
+            step = self.resolution.get(name)
+            if step:
+                value = round(round(float(value) / step) * step, 10)
+            quantized[name] = value
+        return quantized
+
+    def _key(self, quantized):
+        return tuple(sorted(quantized.items()))
+
+    def _bind_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, version, inputs):
+        """Return the cached value for these inputs, or None on a miss"""
+        key = self._key(self.quantize(inputs))
+        with self._lock:
+            self._bind_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds is not None and self._clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, version, inputs, value):
+        key = self._key(self.quantize(inputs))
+        with self._lock:
+            self._bind_version(version)
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss/eviction counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl_seconds,
+                'model_version': self._version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
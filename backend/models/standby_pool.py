@@ -0,0 +1,175 @@
+"""
+🚇 KMRL Standby Pool
+Live priority index of standby trainsets for emergency backup selection
+
+- Max-heap on readiness, one for the whole fleet and one per depot
+- O(log n) upsert / take; status changes invalidate old heap entries lazily
+- Synced from fleet frames or from the night-shift decisions export
+- Trainsets handed out by take() stay out across re-syncs until the data
+  shows them leaving standby, a night decision holds them, or release()
+"""
+
+import heapq
+import itertools
+import json
+import threading
+
+# Night-shift categories that take a trainset out of the standby pool
+HELD_CATEGORIES = ('service_released', 'held_maintenance', 'held_inspection', 'held_cleaning')
+
+
+class StandbyPool:
+    def __init__(self, default_readiness=0.8):
+        self.default_readiness = default_readiness
+        self._entries = {}
+        self._heaps = {None: []}
+        self._counter = itertools.count()
+        self._stale = 0
+        # Taken as backups; kept out of the pool even while fleet frames still say 'Standby'
+        self._dispatched = set()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, train_id):
+        return train_id in self._entries
+
+    def upsert(self, train_id, readiness, depot=None, record=None):
+        """Add a trainset to the pool or update its readiness/depot"""
+        readiness = float(readiness)
+        record = dict(record or {})
+        record.setdefault('train_id', train_id)
+        record['readiness_score'] = readiness
+        with self._lock:
+            if train_id in self._entries:
+                self._stale += 1
+            seq = next(self._counter)
+            self._entries[train_id] = (seq, readiness, depot, record)
+            item = (-readiness, seq, train_id)
+            heapq.heappush(self._heaps[None], item)
+            if depot is not None:
+                heapq.heappush(self._heaps.setdefault(depot, []), item)
+            self._maybe_compact()
+
+    def remove(self, train_id):
+        """Drop a trainset that left standby; returns False if it was not pooled"""
+        with self._lock:
+            if self._entries.pop(train_id, None) is None:
+                return False
+            self._stale += 1
+            self._maybe_compact()
+            return True
+
+    def release(self, train_id, readiness=None, depot=None, record=None):
+        """Return a dispatched trainset to the pool"""
+        with self._lock:
+            self._dispatched.discard(train_id)
+            self.upsert(train_id, self.default_readiness if readiness is None else readiness, depot, record)
+
+    def dispatched(self):
+        with self._lock:
+            return sorted(self._dispatched)
+
+    def _is_live(self, item):
+        entry = self._entries.get(item[2])
+        return entry is not None and entry[0] == item[1]
+
+    def _pop_best(self, depot, min_readiness):
+        heap = self._heaps.get(depot, [])
+        while heap:
+            item = heap[0]
+            if not self._is_live(item):
+                heapq.heappop(heap)
+                continue
+            if min_readiness is not None and -item[0] <= min_readiness:
+                return None
+            return heapq.heappop(heap)
+        return None
+
+    def take(self, n=1, depot=None, min_readiness=None):
+        """Remove and return the n best trainsets with readiness above min_readiness"""
+        with self._lock:
+            taken = []
+            while len(taken) < n:
+                item = self._pop_best(depot, min_readiness)
+                if item is None:
+                    break
+                taken.append(self._entries.pop(item[2])[3])
+                self._dispatched.add(item[2])
+                # The copy in the other heap is now stale
+                self._stale += 1
+            self._maybe_compact()
+            return taken
+
+    def peek(self, n=1, depot=None, min_readiness=None):
+        """Return the n best trainsets above min_readiness without removing them"""
+        with self._lock:
+            popped = []
+            while len(popped) < n:
+                item = self._pop_best(depot, min_readiness)
+                if item is None:
+                    break
+                popped.append(item)
+            heap = self._heaps.get(depot, [])
+            for item in popped:
+                heapq.heappush(heap, item)
+            return [self._entries[item[2]][3] for item in popped]
+
+    def _maybe_compact(self):
+        # Rebuild once dead entries outnumber live ones so heaps stay O(n)
+        if self._stale <= max(64, len(self._entries)):
+            return
+        self._heaps = {None: []}
+        for train_id, (seq, readiness, depot, _) in self._entries.items():
+            item = (-readiness, seq, train_id)
+            self._heaps[None].append(item)
+            if depot is not None:
+                self._heaps.setdefault(depot, []).append(item)
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+        self._stale = 0
+
+    def sync_from_frame(self, trains_df, id_col='train_id', readiness_col='readiness_score',
+                        depot_col='location', status_col='status', standby_status='Standby'):
+        """Pool every standby row of a fleet frame; drop rows in any other status
+        and trainsets the frame no longer lists.
+
+        Dispatched trainsets stay out until the frame shows them in another
+        status, i.e. the data has caught up with the dispatch.
+        """
+        with self._lock:
+            listed = set(trains_df[id_col])
+            for train_id in [train_id for train_id in self._entries if train_id not in listed]:
+                self.remove(train_id)
+            self._dispatched &= listed
+            for record in trains_df.to_dict('records'):
+                train_id = record[id_col]
+                if status_col in record and record[status_col] != standby_status:
+                    self.remove(train_id)
+                    self._dispatched.discard(train_id)
+                    continue
+                if train_id in self._dispatched:
+                    continue
+                self.upsert(train_id, record.get(readiness_col, self.default_readiness),
+                            depot=record.get(depot_col), record=record)
+        return len(self)
+
+    def apply_night_decisions(self, decisions):
+        """Update the pool from a night-shift decisions export (dict or JSON path)"""
+        if isinstance(decisions, str):
+            with open(decisions, 'r') as f:
+                decisions = json.load(f)
+        train_decisions = decisions.get('train_decisions', {})
+
+        with self._lock:
+            for category in HELD_CATEGORIES:
+                for decision in train_decisions.get(category, []):
+                    self.remove(decision['train_id'])
+                    self._dispatched.discard(decision['train_id'])
+            for decision in train_decisions.get('held_standby', []):
+                train_id = decision['train_id']
+                # The export carries no readiness, so keep the last known score
+                readiness = self._entries[train_id][1] if train_id in self._entries else None
+                self.release(train_id, readiness, depot=decision.get('location'), record=decision)
+        return len(self)
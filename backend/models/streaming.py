@@ -0,0 +1,111 @@
+"""
+🚇 KMRL Streaming Training Helpers
+Bounded-memory building blocks for training on multi-year trip history
+
+- RunningFeatureStats: count/mean/std/min/max merged chunk by chunk
+- ReservoirSample: uniform fixed-size sample over an unbounded stream
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class RunningFeatureStats:
+    """Per-column statistics updated one chunk at a time (Chan et al. merge)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = None
+        self.m2 = None
+        self.min = None
+        self.max = None
+        self.columns = None
+
+    def update(self, frame):
+        values = frame.to_numpy(dtype=float)
+        if len(values) == 0:
+            return
+        if self.columns is None:
+            self.columns = list(frame.columns)
+            self.mean = np.zeros(values.shape[1])
+            self.m2 = np.zeros(values.shape[1])
+            self.min = np.full(values.shape[1], np.inf)
+            self.max = np.full(values.shape[1], -np.inf)
+
+        n_b = len(values)
+        mean_b = values.mean(axis=0)
+        m2_b = ((values - mean_b) ** 2).sum(axis=0)
+        n_a = self.count
+        total = n_a + n_b
+        delta = mean_b - self.mean
+
+        self.mean = self.mean + delta * n_b / total
+        self.m2 = self.m2 + m2_b + delta ** 2 * n_a * n_b / total
+        self.min = np.minimum(self.min, values.min(axis=0))
+        self.max = np.maximum(self.max, values.max(axis=0))
+        self.count = total
+
+    def to_dict(self):
+        if self.columns is None:
+            return {}
+        std = np.sqrt(self.m2 / self.count)
+        return {
+            col: {
+                'count': int(self.count),
+                'mean': float(self.mean[i]),
+                'std': float(std[i]),
+                'min': float(self.min[i]),
+                'max': float(self.max[i])
+            }
+            for i, col in enumerate(self.columns)
+        }
+
+
+class ReservoirSample:
+    """Uniform sample of at most `capacity` rows from a stream of frames (Algorithm R)"""
+
+    def __init__(self, capacity, seed=42):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+        self._columns = None
+        self._size = 0
+
+    def add(self, frame):
+        n = len(frame)
+        if n == 0:
+            return
+        if self._columns is None:
+            self._columns = {
+                col: np.empty(self.capacity, dtype=float if pd.api.types.is_numeric_dtype(frame[col]) else object)
+                for col in frame.columns
+            }
+
+        # Fill free slots first, then each later row t replaces slot j ~ U[0, t]
+        fill = min(n, self.capacity - self._size)
+        if fill:
+            for col, arr in self._columns.items():
+                arr[self._size:self._size + fill] = frame[col].to_numpy()[:fill]
+            self._size += fill
+
+        rest = np.arange(fill, n)
+        if len(rest):
+            positions = self.seen + rest
+            slots = self._rng.integers(0, positions + 1)
+            keep = slots < self.capacity
+            rows, slots = rest[keep], slots[keep]
+            # Later rows win when a slot is drawn twice, as in the sequential algorithm
+            _, last = np.unique(slots[::-1], return_index=True)
+            last = len(slots) - 1 - last
+            rows, slots = rows[last], slots[last]
+            for col, arr in self._columns.items():
+                arr[slots] = frame[col].to_numpy()[rows]
+
+        self.seen += n
+
+    def to_frame(self):
+        if self._columns is None:
+            return pd.DataFrame()
+        return pd.DataFrame({col: arr[:self._size] for col, arr in self._columns.items()})
@@ -17,19 +17,24 @@ class OptimizationConstraints:
     crew_shift_duration: int = 8  # hours
     brand_hour_requirements: Dict[str, int] = None
 
+# Status of a solution cut short by time_limit_seconds: feasible, not proven optimal
+TIME_LIMITED_STATUS = 'feasible (time limit)'
+
 class MetroOptimizer:
     def __init__(self):
         self.solver = None
         self.current_solution = None
         self.optimization_results = {}
         
-    def optimize_schedule(self, trains, routes, time_horizon=24, constraints=None):
-        """Generate optimal schedule using OR-Tools"""
+    def optimize_schedule(self, trains, routes, time_horizon=24, constraints=None, time_limit_seconds=None):
+        """Generate optimal schedule using OR-Tools (best feasible one if time-limited)"""
         
         # Initialize solver
         self.solver = pywraplp.Solver.CreateSolver('SCIP')
         if not self.solver:
             raise Exception('SCIP solver unavailable')
+        if time_limit_seconds is not None:
+            self.solver.SetTimeLimit(max(1, int(time_limit_seconds * 1000)))
         
         # Parse constraints
         constraints_obj = self._parse_constraints(constraints)
@@ -50,6 +55,10 @@ class MetroOptimizer:
         
         if status == pywraplp.Solver.OPTIMAL:
             return self._extract_solution(variables, trains, routes, time_horizon)
+        elif status == pywraplp.Solver.FEASIBLE and time_limit_seconds is not None:
+            solution = self._extract_solution(variables, trains, routes, time_horizon)
+            solution['optimization_status'] = TIME_LIMITED_STATUS
+            return solution
         else:
             raise Exception(f'Optimization failed with status: {status}')
     
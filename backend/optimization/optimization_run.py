@@ -88,6 +88,53 @@ def normalize_series(s: pd.Series) -> pd.Series:
         return pd.Series(0.0, index=s.index)
     return (s - mn) / (mx - mn)
 
+def load_depot_capacities(data_dir: str) -> Dict[str, int]:
+    """Per-depot stabling caps from depot_capacities.csv in data_dir ({} when there is none)"""
+    path = os.path.join(data_dir or ".", "depot_capacities.csv")
+    if not os.path.exists(path):
+        return {}
+    caps = pd.read_csv(path).set_index("location")["capacity"]
+    return {loc: int(cap) for loc, cap in caps.items()}
+
+def greedy_induction(
+    df_ts: pd.DataFrame,
+    min_peak_trainsets: int = 18,
+    id_field: str = "trainset_id",
+    readiness_field: str = "readiness_score",
+    depot_capacities: Optional[Dict[str, int]] = None,
+    depot_field: str = "location"
+) -> Dict[str, Any]:
+    """Cheap stand-in for run_optimization when there is no time to solve.
+
+    The LP only bounds the count from below and every utility is non-negative,
+    so without depot caps its optimum inducts every eligible trainset. With
+    depot_capacities (the LP's depot_cap_* constraints) each depot keeps its
+    most ready trainsets up to its cap; the LP ranks by the weighted utility
+    instead, so the two can pick different trainsets within a capped depot.
+    """
+    df = df_ts.copy()
+    eligible = pd.Series(True, index=df.index)
+    cert_flag = next((c for c in df.columns if "certificate_valid" in c.lower() or "cert_valid" in c.lower()), None)
+    if cert_flag:
+        eligible &= df[cert_flag].fillna(0).astype(int) == 1
+    if "critical_jobs_open" in df.columns:
+        eligible &= df["critical_jobs_open"].fillna(0).astype(int) == 0
+    df["readiness"] = df[readiness_field] if readiness_field in df.columns else 0.5
+    if depot_capacities and depot_field in df.columns:
+        rank = df["readiness"].where(eligible).groupby(df[depot_field]).rank(ascending=False, method="first")
+        caps = df[depot_field].map(depot_capacities)
+        eligible &= caps.isna() | (rank <= caps)
+    df["selected_for_induction"] = eligible.astype(int)
+    selected = df.loc[eligible].sort_values("readiness", ascending=False, kind="stable")[id_field].astype(str).tolist()
+    if len(selected) < min_peak_trainsets:
+        logger.warning("Greedy induction found only %d eligible trainsets (need %d)", len(selected), min_peak_trainsets)
+    return {
+        "selected_trainsets": selected,
+        "pulp_status": "Greedy" if len(selected) >= min_peak_trainsets else "Greedy (short)",
+        "objective_value": None,
+        "details": df[[id_field, "selected_for_induction", "readiness"]]
+    }
+
 def run_optimization(
     trainset_csv: str,
     jobcards_csv: str = None,
@@ -173,10 +220,9 @@ def run_optimization(
         if int(row.get("critical_jobs_open", 0)) > 0:
             prob += x[str(row[id_field])] == 0, f"critical_jobs_block_{row[id_field]}"
     prob += lpSum([x[tid] for tid in ids]) >= int(min_peak_trainsets), "min_peak_trainsets"
-    if depot_field in df_ts.columns and "depot_capacities.csv" in os.listdir(os.path.dirname(trainset_csv) or "."):
+    if depot_field in df_ts.columns:
         try:
-            depot_caps = pd.read_csv(os.path.join(os.path.dirname(trainset_csv), "depot_capacities.csv"))
-            caps = depot_caps.set_index("location")["capacity"].to_dict()
+            caps = load_depot_capacities(os.path.dirname(trainset_csv))
             for loc, cap in caps.items():
                 members = df_ts[df_ts[depot_field] == loc][id_field].astype(str).tolist()
                 if members:
@@ -4,248 +4,450 @@
 Integrates the top models from all your files
 """
 
+import copy
 import pandas as pd
 import numpy as np
 import time
 import os
+import threading
 from datetime import datetime
-from backend.models.ai_model import SmartMetroAI
+from backend.models.ai_model import SmartMetroAI, data_fingerprint
+from backend.models.standby_pool import StandbyPool
 from backend.models.delay_prediction_model import DelayPredictor
-from backend.optimization.optimization_run import run_optimization
-from backend.optimization.optimization import MetroOptimizer
+from backend.data.fleet_generator import column_rng, generate_fleet
+from backend.optimization.optimization_run import greedy_induction, load_depot_capacities, run_optimization
+from backend.optimization.optimization import MetroOptimizer, TIME_LIMITED_STATUS
+from backend.utils.stage_cache import StageCache, fingerprint
+from backend.utils.deadline import Deadline, StageEstimates
+from backend.utils.single_flight import SingleFlight, canonical_key
+from backend.utils.shared_fleet import cow_view
+from backend.utils.stage_graph import Stage, StageGraph
+from backend.utils.tracing import Tracer
+from backend.utils.constants import DEFAULT_FLEET_SIZE, FILE_PATHS
 
-# Train Names
-TRAIN_NAMES = [
-    "KRISHNA", "TAPTI", "NILA", "SARAYU", "ARUTH",
-    "VAIGAI", "JHANAVI", "DHWANIL", "BHAVANI", "PADMA",
-    "MANDAKINI", "YAMUNA", "PERIYAR", "KABANI", "VAAYU",
-    "KAVERI", "SHIRIYA", "PAMPA", "NARMADA", "MAHE",
-    "MAARUT", "SABARMATHI", "GODHAVARI", "GANGA", "PAVAN"
-]
+# Per-stage time limits in seconds (None waits indefinitely)
+STAGE_TIMEOUTS = {
+    'smart_ai': 120,
+    'delay_model': 120,
+    'delay': 30,
+    'readiness': 30,
+    'pulp': 60,
+    'or_tools': 60,
+    'emergency': 10
+}
+
+# Seconds of a latency budget kept back for the ensemble and reporting
+BUDGET_RESERVE_SECONDS = 0.25
+# Upper bound on solver time limits when a budget leaves more than this
+SOLVER_TIME_LIMIT = 30
+# Night-shift induction decisions applied to the standby pool whenever they change
+NIGHT_DECISIONS_PATH = os.path.join(FILE_PATHS['EXPORTS_DIR'], 'night_decisions.json')
 
 class KMRLMasterOrchestrator:
-    def __init__(self):
+    def __init__(self, max_workers=4, stage_timeouts=None, stage_cache=None, use_cache=True,
+                 fleet_size=DEFAULT_FLEET_SIZE, data_seed=42, night_decisions_path=NIGHT_DECISIONS_PATH):
         self.smart_ai = SmartMetroAI()
+        self.standby_pool = StandbyPool()
+        self.standby_pool_fingerprint = None
+        self.night_decisions_path = night_decisions_path
+        self.night_decisions_mtime = None
         self.delay_predictor = DelayPredictor()
-        self.metro_optimizer = MetroOptimizer()
+        self.max_workers = max_workers
+        self.stage_timeouts = dict(STAGE_TIMEOUTS, **(stage_timeouts or {}))
+        self.stage_cache = stage_cache or (StageCache() if use_cache else None)
+        self.delay_data_fingerprint = None
+        self.flights = SingleFlight()
+        self.stage_estimates = StageEstimates()
+        self.last_delay_predictions = None
+        self.fleet_size = fleet_size
+        self.data_seed = data_seed
         
     def generate_comprehensive_data(self):
-        """Generate realistic KMRL data"""
-        np.random.seed(42)
+        """Generate realistic KMRL data (deterministic for the orchestrator's data seed)"""
+        return generate_fleet(self.fleet_size, seed=self.data_seed)
+    
+    def build_stage_graph(self, constraints=None, scenario=None, deadline=None, tracer=None):
+        """Pipeline stages and their dependencies.
         
-        # Generate train data
-        train_data = []
-        for i, train_name in enumerate(TRAIN_NAMES):
-            train_entry = {
-                'train_id': train_name,
-                'TrainID': train_name,
-                'trainset_id': train_name,
-                
-                # Operational Parameters
-                'dwell_time_seconds': np.random.randint(45, 90),
-                'distance_km': np.random.uniform(2.5, 15.0),
-                'scheduled_load_factor': np.random.uniform(0.4, 0.95),
-                'time_of_day': np.random.randint(6, 22),
-                'passenger_density': np.random.uniform(0.2, 0.9),
-                'route_complexity': np.random.uniform(0.8, 2.0),
-                'passenger_load': np.random.randint(100, 400),
-                'route': np.random.choice(['Red Line', 'Blue Line', 'Green Line']),
-                
-                # Certificate & Fitness Status
-                'certificate_valid': np.random.choice([0, 1], p=[0.15, 0.85]),
-                'cert_days_left_rolling_stock': np.random.randint(10, 365),
-                'cert_days_left_signalling': np.random.randint(100, 1825),
-                'cert_days_left_telecom': np.random.randint(150, 1460),
-                'RollingStockFitnessStatus': np.random.choice([True, False], p=[0.88, 0.12]),
-                
-                # Maintenance Data
-                'mileage_km': np.random.randint(15000, 45000),
-                'TotalMileageKM': np.random.randint(15000, 45000),
-                'critical_jobs_open': np.random.choice([0, 1, 2], p=[0.75, 0.20, 0.05]),
-                'mechanical_score': np.random.uniform(0.6, 0.95),
-                'energy_consumption': np.random.uniform(60, 95),
-                'last_maintenance': (datetime.now() - pd.Timedelta(days=np.random.randint(0, 120))).strftime('%Y-%m-%d'),
-                
-                # Operational Status  
-                'status': np.random.choice(['Active', 'Standby', 'Maintenance'], p=[0.5, 0.35, 0.15]),
-                'location': np.random.choice(['Muttom', 'Kalamassery'], p=[0.6, 0.4]),
-                'readiness_score': np.random.uniform(0.7, 0.98),
-                
-                # Time-based features
-                'scheduled_departure': (datetime.now() + pd.Timedelta(hours=np.random.randint(1, 24))).strftime('%Y-%m-%d %H:%M'),
-                'weather_condition': np.random.choice(['clear', 'cloudy', 'rainy'], p=[0.6, 0.3, 0.1]),
-                
-                # Branding & Revenue
-                'brand_hours_remaining': np.random.randint(0, 8),
-                'crew_id': f'CREW_{np.random.randint(1, 50):03d}' if np.random.random() > 0.1 else None,
-            }
-            train_data.append(train_entry)
+        With a deadline, stages with a fallback are bounded by the remaining
+        budget and replaced by their heuristic when they would overrun it.
+        With a tracer, every stage that runs is recorded as a span.
+        """
+        stages = (self._shared_stages() + self._optimizer_stages(constraints or {}, deadline) +
+                  [self._emergency_stage(scenario)])
+        return StageGraph(stages, max_workers=self.max_workers, cache=self.stage_cache, deadline=deadline,
+                          estimates=self.stage_estimates, tracer=tracer)
+    
+    def _finish_trace(self, tracer):
+        """Span report for the summary; also written to the performance log"""
+        try:
+            return tracer.log()
+        except Exception as e:
+            print(f"⚠️ Could not write performance log: {e}")
+            return tracer.report()
+    
+    def _shared_stages(self):
+        """Stages that depend on neither constraints nor scenario"""
+        timeouts = self.stage_timeouts
         
-        return pd.DataFrame(train_data)
+        # Model stages always run (they are cheap when nothing changed) and are
+        # identified downstream by what they were trained on, not their metrics.
+        return [
+            Stage('data', self._stage_data),
+            Stage('smart_ai', self._stage_smart_ai, deps=['data'], timeout=timeouts.get('smart_ai'),
+                  fallback=lambda data: {'source': 'unavailable', 'version': None},
+                  digest=lambda state: state.get('version'), cancellable=True),
+            Stage('delay_model', self._stage_delay_model, deps=['data'], timeout=timeouts.get('delay_model'),
+                  fallback=lambda data: {'source': 'unavailable', 'data_fingerprint': None, 'model_version': None},
+                  digest=lambda result: (result.get('data_fingerprint'), result.get('model_version')),
+                  cancellable=True),
+            Stage('delay', self._stage_delay, deps=['data', 'delay_model'], timeout=timeouts.get('delay'),
+                  fallback=lambda data, delay_model=None: self._delay_fallback(data), cacheable=True),
+            Stage('readiness', self._stage_readiness, deps=['data', 'smart_ai'], timeout=timeouts.get('readiness'),
+                  fallback=lambda data, smart_ai=None: self._readiness_fallback(data), cacheable=True)
+        ]
     
-    def run_master_optimization(self, constraints=None, scenario=None):
-        """Run complete AI-powered optimization pipeline"""
-        start_time = time.time()
-        print("🚇 KMRL Master AI Pipeline Starting...")
-        print("=" * 60)
+    def _optimizer_stages(self, constraints, deadline=None, suffix=''):
+        """PuLP, OR-Tools and ensemble stages for one constraint set.
+        
+        suffix keeps stage names unique when several constraint sets share a graph.
+        """
+        timeouts = self.stage_timeouts
+        pulp, or_tools = f'pulp{suffix}', f'or_tools{suffix}'
+        # Under a budget the solvers' time limits come from the deadline, so a solve
+        # cut short must not be reused by later runs; the ensemble stays cacheable
+        # since its key covers the solver outputs themselves
+        unbounded = deadline is None
+        return [
+            Stage(pulp, lambda data: self._stage_pulp(data, constraints, deadline), deps=['data'],
+                  timeout=timeouts.get('pulp'), fallback=lambda data: self._pulp_fallback(data, constraints),
+                  cacheable=unbounded, params=constraints, cache_name='pulp'),
+            Stage(or_tools, lambda data: self._stage_or_tools(data, constraints, deadline), deps=['data'],
+                  timeout=timeouts.get('or_tools'), fallback=lambda data: None, cacheable=unbounded,
+                  params=constraints, cache_name='or_tools', cache_if=self._proven_optimal),
+            Stage(f'ensemble{suffix}', lambda **outputs: self._stage_ensemble(
+                      constraints, outputs['data'], outputs['delay'], outputs['readiness'],
+                      outputs[pulp], outputs[or_tools]),
+                  deps=['data', 'delay', 'readiness', pulp, or_tools], cacheable=True, params=constraints,
+                  cache_name='ensemble')
+        ]
+    
+    @staticmethod
+    def _proven_optimal(or_tools_result):
+        # A time-limited solve is only a feasible solution; it is used but never cached
+        return not or_tools_result or or_tools_result.get('optimization_status') != TIME_LIMITED_STATUS
+    
+    def _emergency_stage(self, scenario, suffix='', pool=None):
+        # Emergency response mutates the standby pool, so it is never cached
+        return Stage(f'emergency{suffix}', lambda data: self._stage_emergency(data, scenario, pool), deps=['data'],
+                     timeout=self.stage_timeouts.get('emergency'), fallback=lambda data: None)
+    
+    def _stage_data(self):
+        print("📊 Generating comprehensive train data...")
+        train_df = self.generate_comprehensive_data()
+        
+        # Create schedules data for AI training; only the added delay column is new memory
+        delays = column_rng(self.data_seed, 'schedules', 'delay_minutes').exponential(2.5, len(train_df))  # Realistic delay distribution
+        schedules_df = train_df.assign(delay_minutes=delays)
+        
+        # Create maintenance data (boolean selection already returns a new frame)
+        maintenance_df = train_df[train_df['status'] == 'Maintenance']
+        
+        print(f"   ✅ Generated data for {len(train_df)} trains")
+        return {'train_df': train_df, 'schedules_df': schedules_df, 'maintenance_df': maintenance_df}
+    
+    def _publish(self, cancel_token, publish):
+        """Swap in a model stage's result, unless the graph gave up on the stage.
+        
+        A timed-out stage keeps running in its thread, so model stages train a
+        private copy and only replace the shared one through this.
+        """
+        if cancel_token is None:
+            publish()
+            return True
+        if cancel_token.commit(publish):
+            return True
+        print("   ⚠️ Discarding models finished after their stage timed out")
+        return False
+    
+    def _stage_smart_ai(self, data, cancel_token=None):
+        print("🧠 Training Advanced AI Models...")
+        frames = (data['schedules_df'], data['train_df'], data['maintenance_df'])
+        smart_ai = self.smart_ai
+        if smart_ai.delay_model is not None and smart_ai.data_fingerprint == data_fingerprint(*frames):
+            model_state = {'source': 'memory', 'version': smart_ai.model_version}
+        else:
+            smart_ai = copy.deepcopy(smart_ai)
+            model_state = smart_ai.ensure_models(*frames)
+            self._publish(cancel_token, lambda: setattr(self, 'smart_ai', smart_ai))
+        print(f"   ✅ AI Models {model_state['source']} (version {model_state['version']})")
+        print(f"   ✅ AI Models Performance: {smart_ai.get_model_performance()}")
+        return model_state
+    
+    def _stage_delay_model(self, data, cancel_token=None):
+        data_fp = fingerprint(data['train_df'])
+        if self.delay_predictor.is_trained and data_fp == self.delay_data_fingerprint:
+            print("⏱️ Delay Prediction models already trained on this fleet data")
+            return {'source': 'memory', 'data_fingerprint': data_fp,
+                    'model_version': self.delay_predictor.model_version}
+        
+        print("⏱️ Training Enhanced Delay Prediction...")
+        # train_model rebinds the fitted models, so a shallow copy leaves the shared predictor intact
+        predictor = copy.copy(self.delay_predictor)
+        result = predictor.train_model(df=data['train_df'], save=False)
+        if 'error' not in result:
+            def publish():
+                self.delay_predictor = predictor
+                self.delay_data_fingerprint = data_fp
+            if self._publish(cancel_token, publish):
+                predictor.save_models()
+                result['data_fingerprint'] = data_fp
+        # Cached delay predictions are keyed on the model as well as the data, so a
+        # retrain, load or engine/tuning change does not reuse stale ones
+        result['model_version'] = predictor.model_version
+        return result
+    
+    def _stage_delay(self, data, delay_model):
+        # One predictor for the whole frame, even if a later run swaps in another
+        predictor = self.delay_predictor
+        if not predictor.is_trained:
+            raise RuntimeError("delay model is not trained")
+        train_df = data['train_df']
+        delays = []
+        for _, row in train_df.iterrows():
+            prediction = predictor.predict_schedule(
+                dwell_time=row.get('dwell_time_seconds', 60),
+                distance=row.get('distance_km', 8.5),
+                load_factor=row.get('scheduled_load_factor', 0.7),
+                time_of_day=row.get('time_of_day', 12),
+                passenger_density=row.get('passenger_density', 0.5),
+                route_complexity=row.get('route_complexity', 1.0)
+            )
+            delay_value = prediction.get('Predicted Delay Minutes', 0) if isinstance(prediction, dict) else 0
+            delays.append(max(0, delay_value))
+        
+        print(f"   ✅ Average predicted delay: {np.mean(delays):.2f} minutes")
+        result = pd.DataFrame({
+            'predicted_delay_minutes': delays,
+            'delay_category': [predictor.categorize_delay(x) for x in delays]
+        }, index=train_df.index)
+        self.last_delay_predictions = result.set_index(train_df['train_id'].to_numpy())
+        return result
+    
+    def _delay_fallback(self, data):
+        # Reuse the last predictions per train; leave the rest unknown rather than inventing them
+        train_ids = data['train_df']['train_id']
+        if self.last_delay_predictions is not None:
+            last = self.last_delay_predictions
+            last = last[~last.index.duplicated(keep='last')].reindex(train_ids.to_numpy())
+            return pd.DataFrame({
+                'predicted_delay_minutes': last['predicted_delay_minutes'].to_numpy(),
+                'delay_category': last['delay_category'].fillna('Unknown').to_numpy()
+            }, index=train_ids.index)
+        return pd.DataFrame({
+            'predicted_delay_minutes': np.nan,
+            'delay_category': 'Unknown'
+        }, index=train_ids.index)
+    
+    def _stage_readiness(self, data, smart_ai):
+        print("🔧 AI-Powered Readiness Assessment...")
+        train_df = data['train_df']
+        models = self.smart_ai  # Both scores from the same models, even if a later run swaps them
+        # Use SmartMetroAI fleet scoring for readiness calculation
+        readiness = models.calculate_fleet_readiness(train_df)
+        
+        # Score maintenance needs for the whole fleet in one pass
+        maintenance_predictions = models.predict_maintenance_batch(train_df)
+        
+        result = pd.DataFrame({
+            'ai_readiness_score': readiness['readiness_score'],
+            'maintenance_recommendation': maintenance_predictions['action']
+        }, index=train_df.index)
+        print(f"   ✅ Average AI readiness score: {result['ai_readiness_score'].mean():.3f}")
+        return result
+    
+    def _readiness_fallback(self, data):
+        # Recorded readiness and open critical jobs instead of the AI models
+        train_df = data['train_df']
+        critical = train_df.get('critical_jobs_open', pd.Series(0, index=train_df.index)).fillna(0)
+        return pd.DataFrame({
+            'ai_readiness_score': train_df.get('readiness_score', pd.Series(0.75, index=train_df.index)),
+            'maintenance_recommendation': np.where(critical > 0, 'Schedule Maintenance', 'Monitor')
+        }, index=train_df.index)
+    
+    def _pulp_fallback(self, data, constraints):
+        print("   ⚡ Using greedy induction instead of PuLP")
+        # Same depot caps the LP would read next to its input file
+        return greedy_induction(data['train_df'], min_peak_trainsets=constraints.get('min_service', 13),
+                                depot_capacities=load_depot_capacities('temp_data'))
+    
+    def _stage_pulp(self, data, constraints, deadline=None):
+        # A) PuLP Constraint Optimization
+        print("   🔧 Running PuLP constraint optimization...")
+        os.makedirs('temp_data', exist_ok=True)
+        # One file per thread: batch runs solve several constraint sets at once
+        train_csv_path = f'temp_data/trains_{threading.get_ident()}.csv'
+        data['train_df'].to_csv(train_csv_path, index=False)
         
+        time_limit = SOLVER_TIME_LIMIT
+        if deadline is not None:
+            time_limit = max(1, int(deadline.allocate(cap=SOLVER_TIME_LIMIT)))
         try:
-            # Step 1: Generate Data
-            print("📊 Step 1/5: Generating comprehensive train data...")
-            train_df = self.generate_comprehensive_data()
-            
-            # Create schedules data for AI training
-            schedules_df = train_df.copy()
-            schedules_df['delay_minutes'] = np.random.exponential(2.5, len(train_df))  # Realistic delay distribution
-            
-            # Create maintenance data
-            maintenance_df = train_df[train_df['status'] == 'Maintenance'].copy()
-            
-            print(f"   ✅ Generated data for {len(train_df)} trains")
-            
-            # Step 2: Train Smart AI Models
-            print("\n🧠 Step 2/5: Training Advanced AI Models...")
-            self.smart_ai.train_models(schedules_df, train_df, maintenance_df)
-            print(f"   ✅ AI Models Performance: {self.smart_ai.get_model_performance()}")
-            
-            # Step 3: Enhanced Delay Prediction
-            print("\n⏱️ Step 3/5: Running Enhanced Delay Prediction...")
-            self.delay_predictor.train_model(df=train_df)
-            
-            delays = []
-            for _, row in train_df.iterrows():
-                prediction = self.delay_predictor.predict_schedule(
-                    dwell_time=row.get('dwell_time_seconds', 60),
-                    distance=row.get('distance_km', 8.5),
-                    load_factor=row.get('scheduled_load_factor', 0.7),
-                    time_of_day=row.get('time_of_day', 12),
-                    passenger_density=row.get('passenger_density', 0.5),
-                    route_complexity=row.get('route_complexity', 1.0)
-                )
-                delay_value = prediction.get('Predicted Delay Minutes', 0) if isinstance(prediction, dict) else 0
-                delays.append(max(0, delay_value))
-            
-            train_df['predicted_delay_minutes'] = delays
-            train_df['delay_category'] = [self.delay_predictor.categorize_delay(x) for x in delays]
-            print(f"   ✅ Average predicted delay: {np.mean(delays):.2f} minutes")
-            
-            # Step 4: AI-Based Readiness Assessment
-            print("\n🔧 Step 4/5: AI-Powered Readiness Assessment...")
-            readiness_scores = []
-            maintenance_predictions = []
-            
-            for _, row in train_df.iterrows():
-                # Use SmartMetroAI for readiness calculation
-                readiness = self.smart_ai.calculate_train_readiness(row.to_dict())
-                readiness_scores.append(readiness)
-                
-                # Get maintenance prediction
-                maint_pred = self.smart_ai.predict_maintenance(row.to_dict())
-                maintenance_predictions.append(maint_pred)
-            
-            train_df['ai_readiness_score'] = readiness_scores
-            train_df['maintenance_recommendation'] = [pred['action'] for pred in maintenance_predictions]
-            print(f"   ✅ Average AI readiness score: {np.mean(readiness_scores):.3f}")
-            
-            # Step 5: Multi-Level Optimization
-            print("\n🎯 Step 5/5: Multi-Level Optimization...")
-            
-            # Save data for optimizers
-            os.makedirs('temp_data', exist_ok=True)
-            train_csv_path = 'temp_data/trains.csv' 
-            train_df.to_csv(train_csv_path, index=False)
-            
-            # A) PuLP Constraint Optimization
-            print("   🔧 Running PuLP constraint optimization...")
-            pulp_result = run_optimization(
+            return run_optimization(
                 trainset_csv=train_csv_path,
                 jobcards_csv=None,
-                min_peak_trainsets=constraints.get('min_service', 13) if constraints else 13
+                min_peak_trainsets=constraints.get('min_service', 13),
+                solver_time_limit=time_limit
             )
+        finally:
+            os.remove(train_csv_path)
+    
+    def _stage_or_tools(self, data, constraints, deadline=None):
+        # B) OR-Tools Advanced Scheduling
+        print("   ⚙️ Running OR-Tools scheduling optimization...")
+        routes = ['Red Line', 'Blue Line', 'Green Line']
+        # MetroOptimizer keeps its solver on the instance, so concurrent solves need their own
+        return MetroOptimizer().optimize_schedule(
+            trains=data['train_df'],
+            routes=routes,
+            constraints=constraints,
+            time_limit_seconds=deadline.allocate(cap=SOLVER_TIME_LIMIT) if deadline is not None else None
+        )
+    
+    def _stage_emergency(self, data, scenario, pool=None):
+        # C) AI Emergency Response (if scenario provided)
+        if not scenario:
+            return None
+        print(f"   🚨 Running emergency response for: {scenario.get('type', 'unknown')}")
+        train_df = data['train_df']
+        available_trains = train_df[train_df['status'] == 'Standby']
+        if pool is None:
+            pool = self.standby_pool
+            self._refresh_standby_pool(train_df)
+        else:
+            pool.sync_from_frame(train_df)
+            self._apply_night_decisions(pool)
+        return self.smart_ai.emergency_response(
+            scenario_type=scenario.get('type', 'high_demand'),
+            affected_trains=scenario.get('affected_trains', ['KRISHNA']),
+            affected_routes=['Red Line'],
+            available_trains=available_trains,
+            standby_pool=pool,
+            depot=scenario.get('depot')
+        )
+    
+    def _refresh_standby_pool(self, train_df):
+        """Keep the shared pool current: re-sync when the fleet data changes and
+        apply the night-shift decisions when they change (or after a re-sync).
+        The pool keeps earlier dispatches out through both."""
+        data_fp = fingerprint(train_df)
+        synced = data_fp != self.standby_pool_fingerprint
+        if synced:
+            self.standby_pool.sync_from_frame(train_df)
+            self.standby_pool_fingerprint = data_fp
+        path = self.night_decisions_path
+        mtime = os.path.getmtime(path) if path and os.path.exists(path) else None
+        if mtime is not None and (synced or mtime != self.night_decisions_mtime):
+            if self._apply_night_decisions(self.standby_pool):
+                self.night_decisions_mtime = mtime
+    
+    def _apply_night_decisions(self, pool):
+        path = self.night_decisions_path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            pool.apply_night_decisions(path)
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ Could not apply night-shift decisions: {e}")
+            return False
+    
+    def _stage_ensemble(self, constraints, data, delay, readiness, pulp, or_tools):
+        print("\n🎭 Creating Ensemble Final Schedule...")
+        final_schedule = pd.concat([data['train_df'], delay, readiness], axis=1)
+        pulp_result, or_tools_result = pulp, or_tools
+        
+        # Combine all optimization results: one join per optimizer on train id
+        final_schedule['pulp_selected'] = 0
+        if pulp_result and 'details' in pulp_result and not pulp_result['details'].empty:
+            pulp_details = pulp_result['details'].drop_duplicates('trainset_id')
+            selected = pulp_details.set_index('trainset_id')['selected_for_induction']
+            final_schedule['pulp_selected'] = final_schedule['trainset_id'].map(selected).fillna(0)
+        
+        # OR-Tools scheduling assignments
+        final_schedule['or_tools_assigned'] = 0
+        if or_tools_result and 'assignments' in or_tools_result:
+            assigned_trains = list(or_tools_result['assignments'].keys())
+            final_schedule['or_tools_assigned'] = final_schedule['train_id'].isin(assigned_trains).astype(int)
+        
+        final_schedule['final_operational_status'] = self.ensemble_status(
+            final_schedule, constraints.get('min_service', 13)
+        )
+        return final_schedule
+    
+    @staticmethod
+    def ensemble_status(final_schedule, min_service=13):
+        """Final operational status per train from readiness, PuLP and OR-Tools votes"""
+        readiness = final_schedule['ai_readiness_score']
+        service_votes = (
+            (readiness > 0.8).astype(int) +
+            (final_schedule['pulp_selected'] == 1).astype(int) +
+            (final_schedule['or_tools_assigned'] == 1).astype(int)
+        )
+        
+        # Maintenance override
+        override = (
+            ~final_schedule['RollingStockFitnessStatus'].astype(bool) |
+            (final_schedule['critical_jobs_open'] > 0) |
+            (final_schedule['maintenance_recommendation'] == 'Schedule Maintenance')
+        )
+        status = pd.Series(np.select(
+            [override, service_votes >= 2, (service_votes >= 1) | (readiness > 0.7)],
+            ['maintenance', 'service', 'standby'],
+            default='maintenance'
+        ), index=final_schedule.index)
+        
+        # Ensure minimum service requirement
+        service_count = int((status == 'service').sum())
+        if service_count < min_service:
+            standby_candidates = readiness[status == 'standby'].nlargest(min_service - service_count)
+            status[standby_candidates.index] = 'service'
+        return status
+    
+    def run_master_optimization(self, constraints=None, scenario=None, budget_seconds=None):
+        """Run complete AI-powered optimization pipeline.
+        
+        Stages run as a dependency graph (see build_stage_graph): model
+        training, delay prediction, readiness, PuLP, OR-Tools and emergency
+        response overlap wherever their inputs allow. Concurrent calls with
+        the same constraints and scenario share one run and its result.
+        
+        budget_seconds bounds the run: solvers get the remaining budget as
+        their time limit and stages that would overrun fall back to cheaper
+        heuristics; summary['degraded_stages'] lists them.
+        """
+        key = canonical_key(constraints or {}, scenario, budget_seconds)
+        return self.flights.do(key, self._run_master_optimization, constraints, scenario, budget_seconds)
+    
+    def _run_master_optimization(self, constraints=None, scenario=None, budget_seconds=None):
+        start_time = time.time()
+        deadline = Deadline(budget_seconds, BUDGET_RESERVE_SECONDS) if budget_seconds else None
+        print("🚇 KMRL Master AI Pipeline Starting...")
+        print("=" * 60)
+        
+        tracer = Tracer('master_pipeline')
+        try:
+            graph = self.build_stage_graph(constraints, scenario, deadline, tracer)
+            results = graph.run()
             
-            # B) OR-Tools Advanced Scheduling 
-            print("   ⚙️ Running OR-Tools scheduling optimization...")
-            routes = ['Red Line', 'Blue Line', 'Green Line']
-            or_tools_result = self.metro_optimizer.optimize_schedule(
-                trains=train_df, 
-                routes=routes,
-                constraints=constraints
-            )
-            
-            # C) AI Emergency Response (if scenario provided)
-            emergency_response = None
-            if scenario:
-                print(f"   🚨 Running emergency response for: {scenario.get('type', 'unknown')}")
-                available_trains = train_df[train_df['status'] == 'Standby']
-                emergency_response = self.smart_ai.emergency_response(
-                    scenario_type=scenario.get('type', 'high_demand'),
-                    affected_trains=scenario.get('affected_trains', ['KRISHNA']),
-                    affected_routes=['Red Line'],
-                    available_trains=available_trains
-                )
-            
-            # Step 6: Ensemble Final Decision
-            print("\n🎭 Creating Ensemble Final Schedule...")
-            final_schedule = train_df.copy()
-            
-            # Combine all optimization results
-            final_schedule['pulp_selected'] = 0
-            if pulp_result and 'details' in pulp_result:
-                pulp_details = pulp_result['details']
-                for idx, train_id in enumerate(final_schedule['trainset_id']):
-                    if train_id in pulp_details['trainset_id'].values:
-                        selected = pulp_details[pulp_details['trainset_id'] == train_id]['selected_for_induction'].iloc[0] if len(pulp_details[pulp_details['trainset_id'] == train_id]) > 0 else 0
-                        final_schedule.loc[idx, 'pulp_selected'] = selected
-            
-            # OR-Tools scheduling assignments
-            final_schedule['or_tools_assigned'] = 0
-            if or_tools_result and 'assignments' in or_tools_result:
-                assigned_trains = list(or_tools_result['assignments'].keys())
-                final_schedule['or_tools_assigned'] = final_schedule['train_id'].isin(assigned_trains).astype(int)
-            
-            # Final operational status using ensemble logic
-            final_schedule['final_operational_status'] = 'standby'
-            
-            for idx, row in final_schedule.iterrows():
-                votes = []
-                
-                # AI readiness vote
-                if row['ai_readiness_score'] > 0.8:
-                    votes.append('service')
-                elif row['ai_readiness_score'] < 0.5:
-                    votes.append('maintenance')
-                
-                # PuLP optimization vote
-                if row['pulp_selected'] == 1:
-                    votes.append('service')
-                
-                # OR-Tools vote
-                if row['or_tools_assigned'] == 1:
-                    votes.append('service')
-                
-                # Maintenance override
-                if (not row['RollingStockFitnessStatus'] or 
-                    row['critical_jobs_open'] > 0 or
-                    row['maintenance_recommendation'] == 'Schedule Maintenance'):
-                    final_status = 'maintenance'
-                elif votes.count('service') >= 2:  # Majority vote
-                    final_status = 'service'
-                elif 'service' in votes or row['ai_readiness_score'] > 0.7:
-                    final_status = 'standby'
-                else:
-                    final_status = 'maintenance'
-                
-                final_schedule.loc[idx, 'final_operational_status'] = final_status
-            
-            # Ensure minimum service requirement
-            service_count = len(final_schedule[final_schedule['final_operational_status'] == 'service'])
-            min_service = constraints.get('min_service', 13) if constraints else 13
-            
-            if service_count < min_service:
-                standby_candidates = final_schedule[
-                    final_schedule['final_operational_status'] == 'standby'
-                ].nlargest(min_service - service_count, 'ai_readiness_score')
-                final_schedule.loc[standby_candidates.index, 'final_operational_status'] = 'service'
+            ensemble = results['ensemble']
+            if not ensemble.usable:
+                raise RuntimeError(f"ensemble stage {ensemble.status}: {ensemble.error}")
+            # Cached outputs are shared between runs; the view copies only the columns written below
+            final_schedule = cow_view(ensemble.value)
+            pulp_result = results['pulp'].value
+            or_tools_result = results['or_tools'].value
+            emergency_response = results['emergency'].value
             
             # Add metadata
             duration = time.time() - start_time
@@ -265,33 +467,148 @@ class KMRLMasterOrchestrator:
                 'optimization_duration': duration,
                 'ai_model_performance': self.smart_ai.get_model_performance(),
                 'pulp_status': pulp_result.get('pulp_status', 'N/A') if pulp_result else 'Failed',
-                'or_tools_metrics': or_tools_result.get('performance_metrics', {}) if or_tools_result else {}
+                'or_tools_metrics': or_tools_result.get('performance_metrics', {}) if or_tools_result else {},
+                'or_tools_status': or_tools_result.get('optimization_status', 'N/A') if or_tools_result else 'Failed',
+                'stages': StageGraph.report(results),
+                'stage_seconds_total': sum(r.seconds for r in results.values()),
+                'cached_stages': [name for name, r in results.items() if r.status == 'cached'],
+                'degraded_stages': [name for name, r in results.items() if r.status not in ('ok', 'cached')],
+                'budget': deadline.report() if deadline else None,
+                'stage_cache': self.stage_cache.stats() if self.stage_cache else None
             }
             
             print("\n🎯 MASTER OPTIMIZATION COMPLETE!")
             print("=" * 60)
-            print(f"⏱️  Duration: {duration:.2f}s")
+            print(f"⏱️  Duration: {duration:.2f}s (stages sum {summary['stage_seconds_total']:.2f}s)")
             print(f"🚇  Service Trains: {summary['service_trains']}")
             print(f"⏸️  Standby Trains: {summary['standby_trains']}")
             print(f"🔧  Maintenance Trains: {summary['maintenance_trains']}")
             print(f"⏰  Avg Delay: {summary['avg_delay_minutes']:.2f} min")
             print(f"✅  Avg AI Readiness: {summary['avg_ai_readiness']:.3f}")
             print(f"📋  Fitness Compliance: {summary['fitness_compliance']:.1f}%")
+            if summary['cached_stages']:
+                print(f"♻️  Cached Stages: {', '.join(summary['cached_stages'])}")
+            for name, result in results.items():
+                if result.status not in ('ok', 'cached'):
+                    print(f"⚠️  Stage {name}: {result.status} ({result.error})")
             
             # Save results
             os.makedirs('outputs', exist_ok=True)
             final_schedule.to_csv('outputs/master_optimized_schedule.csv', index=False)
             
+            summary['trace'] = self._finish_trace(tracer)
             return final_schedule, summary, emergency_response
             
         except Exception as e:
             print(f"❌ Master Optimization Error: {str(e)}")
-            # Return fallback schedule
-            fallback = self.generate_comprehensive_data()
-            fallback['final_operational_status'] = 'standby'
-            fallback.loc[:12, 'final_operational_status'] = 'service'
-            fallback.loc[20:, 'final_operational_status'] = 'maintenance'
-            return fallback, {'error': str(e)}, None
+            # Return a heuristic schedule: recorded readiness, cached delays, greedy induction
+            data = {'train_df': self.generate_comprehensive_data()}
+            try:
+                fallback = self._stage_ensemble(
+                    constraints or {}, data, self._delay_fallback(data), self._readiness_fallback(data),
+                    self._pulp_fallback(data, constraints or {}), None
+                )
+            except Exception:
+                fallback = data['train_df']
+                fallback['final_operational_status'] = 'standby'
+                fallback.loc[:12, 'final_operational_status'] = 'service'
+                fallback.loc[20:, 'final_operational_status'] = 'maintenance'
+            return fallback, {'error': str(e), 'degraded_stages': list(STAGE_TIMEOUTS),
+                              'trace': self._finish_trace(tracer)}, None
+
+    def run_scenario_batch(self, variants, budget_seconds=None):
+        """Compare several scenario/constraint variants in one pipeline run.
+        
+        variants: list of {'name', 'constraints', 'scenario'}. Data, model
+        training, delay prediction and readiness run once; PuLP, OR-Tools and
+        the ensemble run once per distinct constraint set and emergency
+        response once per variant, all fanned out on the same stage graph.
+        Each variant's emergency response draws from its own copy of the
+        standby pool, so variants do not take each other's backups.
+        
+        Returns (comparison DataFrame, {name: {'schedule', 'emergency_response'}}, summary).
+        """
+        start_time = time.time()
+        deadline = Deadline(budget_seconds, BUDGET_RESERVE_SECONDS) if budget_seconds else None
+        print(f"🚇 KMRL Scenario Batch: {len(variants)} variants")
+        print("=" * 60)
+        
+        stages = self._shared_stages()
+        shared = [stage.name for stage in stages]
+        optimizer_suffix = {}  # canonical constraints -> suffix of its optimizer stages
+        plan = []
+        for i, variant in enumerate(variants):
+            name = str(variant.get('name') or f'variant_{i + 1}')
+            if any(name == planned[0] for planned in plan):
+                name = f'{name}_{i + 1}'
+            constraints = variant.get('constraints') or {}
+            scenario = variant.get('scenario')
+            
+            key = canonical_key(constraints)
+            if key not in optimizer_suffix:
+                optimizer_suffix[key] = f'[{name}]'
+                stages += self._optimizer_stages(constraints, deadline, optimizer_suffix[key])
+            stages.append(self._emergency_stage(scenario, f'[{name}]', pool=StandbyPool()))
+            plan.append((name, constraints, scenario, optimizer_suffix[key]))
+        
+        tracer = Tracer('scenario_batch')
+        graph = StageGraph(stages, max_workers=self.max_workers, cache=self.stage_cache, deadline=deadline,
+                           estimates=self.stage_estimates, tracer=tracer)
+        results = graph.run()
+        
+        rows, outputs = [], {}
+        for name, constraints, scenario, suffix in plan:
+            ensemble = results[f'ensemble{suffix}']
+            emergency = results[f'emergency[{name}]'].value
+            pulp_result = results[f'pulp{suffix}'].value
+            or_tools_result = results[f'or_tools{suffix}'].value
+            variant_stages = shared + [f'pulp{suffix}', f'or_tools{suffix}', f'ensemble{suffix}', f'emergency[{name}]']
+            row = {
+                'variant': name,
+                'scenario': scenario.get('type') if scenario else None,
+                'min_service': constraints.get('min_service', 13),
+                'status': ensemble.status,
+                'degraded_stages': [stage for stage in variant_stages if results[stage].status not in ('ok', 'cached')],
+                'pulp_status': pulp_result.get('pulp_status', 'N/A') if pulp_result else 'Failed',
+                'or_tools_status': or_tools_result.get('optimization_status', 'N/A') if or_tools_result else 'Failed',
+                'backup_trains': len(emergency['backup_trains']) if emergency else 0
+            }
+            schedule = cow_view(ensemble.value) if ensemble.usable else None
+            if schedule is not None:
+                status_counts = schedule['final_operational_status'].value_counts()
+                row.update({
+                    'service_trains': int(status_counts.get('service', 0)),
+                    'standby_trains': int(status_counts.get('standby', 0)),
+                    'maintenance_trains': int(status_counts.get('maintenance', 0)),
+                    'avg_delay_minutes': schedule['predicted_delay_minutes'].mean(),
+                    'avg_ai_readiness': schedule['ai_readiness_score'].mean()
+                })
+            rows.append(row)
+            outputs[name] = {'schedule': schedule, 'emergency_response': emergency}
+        
+        comparison = pd.DataFrame(rows)
+        duration = time.time() - start_time
+        summary = {
+            'variants': len(plan),
+            'constraint_sets': len(optimizer_suffix),
+            'duration': duration,
+            'shared_stage_seconds': sum(results[name].seconds for name in shared),
+            'stage_seconds_total': sum(r.seconds for r in results.values()),
+            'stages': StageGraph.report(results),
+            'cached_stages': [name for name, r in results.items() if r.status == 'cached'],
+            'degraded_stages': [name for name, r in results.items() if r.status not in ('ok', 'cached')],
+            'budget': deadline.report() if deadline else None,
+            'trace': self._finish_trace(tracer)
+        }
+        
+        print(f"\n🎯 SCENARIO BATCH COMPLETE in {duration:.2f}s "
+              f"({len(plan)} variants, {len(optimizer_suffix)} constraint sets)")
+        print(comparison[[col for col in ('variant', 'scenario', 'service_trains', 'backup_trains')
+                          if col in comparison.columns]].to_string(index=False))
+        
+        os.makedirs('outputs', exist_ok=True)
+        comparison.to_csv('outputs/scenario_comparison.csv', index=False)
+        return comparison, outputs, summary
 
 # Test the master orchestrator
 if __name__ == "__main__":
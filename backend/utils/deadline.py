@@ -0,0 +1,65 @@
+"""
+🚇 KMRL Deadline
+Latency budgets for the master pipeline
+
+- Deadline: wall-clock budget shared by every stage of one run
+- allocate(): time a stage may spend, keeping a reserve for later stages
+- StageEstimates: EWMA of observed stage durations, used to swap in a cheap
+  heuristic before a stage that would overrun the remaining budget
+"""
+
+import threading
+import time
+
+
+class Deadline:
+    def __init__(self, budget_seconds, reserve_seconds=0.0):
+        self.budget_seconds = float(budget_seconds)
+        self.reserve_seconds = float(reserve_seconds)
+        self.started = time.perf_counter()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def remaining(self):
+        """Seconds left for stages, after the reserve for final assembly"""
+        return max(0.0, self.budget_seconds - self.reserve_seconds - self.elapsed())
+
+    def expired(self):
+        return self.remaining() <= 0.0
+
+    def allocate(self, share=1.0, cap=None, floor=0.0):
+        """Time a stage may spend: a share of what is left, within [floor, cap]"""
+        seconds = max(floor, self.remaining() * share)
+        return min(seconds, cap) if cap is not None else seconds
+
+    def report(self):
+        elapsed = self.elapsed()
+        return {
+            'budget_seconds': self.budget_seconds,
+            'elapsed_seconds': round(elapsed, 4),
+            'met': elapsed <= self.budget_seconds
+        }
+
+
+class StageEstimates:
+    def __init__(self, alpha=0.3, defaults=None):
+        self.alpha = alpha
+        self._estimates = dict(defaults or {})
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            previous = self._estimates.get(name)
+            self._estimates[name] = seconds if previous is None else (
+                self.alpha * seconds + (1 - self.alpha) * previous
+            )
+
+    def estimate(self, name):
+        """Expected duration in seconds, or None before the first observation"""
+        with self._lock:
+            return self._estimates.get(name)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._estimates)
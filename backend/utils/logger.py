@@ -20,6 +20,9 @@ def setup_logger(name='kmrl_system', level=logging.INFO):
     # Create logger
     logger = logging.getLogger(name)
     logger.setLevel(level)
+    # The console handler below already prints each record; without this, a
+    # root handler (e.g. logging.basicConfig elsewhere) would print it again
+    logger.propagate = False
     
     # Avoid duplicate handlers
     if logger.handlers:
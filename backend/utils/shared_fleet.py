@@ -0,0 +1,150 @@
+"""
+🚇 KMRL Shared Fleet State
+Zero-copy handoff of fleet columns to worker processes and between stages
+
+- SharedFleetState.publish(): for process pools (the Monte Carlo workers);
+  numeric and boolean columns are copied once
+  into a single multiprocessing.shared_memory block; text columns are stored
+  as category codes with the categories kept in the handle
+- Pickling a state only sends its small handle; worker processes attach to
+  the block and read the columns as read-only NumPy views
+- writable(): private copy of just the column a stage modifies
+- cow_view(): in-process handoff between pipeline stages; a shallow frame
+  that shares the source's column data instead of a deep copy
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+ALIGNMENT = 64  # Column offsets are cache-line aligned
+
+
+def cow_view(frame):
+    """Frame a stage may add or overwrite columns on without touching the source.
+
+    Columns are shared with the source until the stage assigns them. Whole-column
+    assignment (view[col] = ...) always swaps in a new array, so the source is
+    safe with or without copy-on-write; in-place cell writes (view.loc[i, col])
+    only stay private under copy-on-write (pandas >= 3, or the option enabled).
+    """
+    return frame.copy(deep=False)
+
+
+def _encode(values):
+    """Fixed-width array for the shared block, plus categories for text columns"""
+    array = values.to_numpy() if isinstance(values, (pd.Series, pd.Index)) else np.asarray(values)
+    if array.dtype.kind in 'biufmM':
+        return np.ascontiguousarray(array), None
+    codes, categories = pd.factorize(array)
+    return codes.astype(np.int32), list(categories)
+
+
+class SharedFleetState:
+    def __init__(self, handle, shm, owner=False):
+        self.handle = handle
+        self.owner = owner
+        self._shm = shm
+        self._specs = {spec['name']: spec for spec in handle['columns']}
+
+    @classmethod
+    def publish(cls, data, columns=None):
+        """Copy a DataFrame, or a dict of 1-D arrays and scalars, into shared memory"""
+        if isinstance(data, pd.DataFrame):
+            items = {name: data[name] for name in (columns or data.columns)}
+            index = None if isinstance(data.index, pd.RangeIndex) and data.index.start == 0 \
+                and data.index.step == 1 else data.index
+            attrs = {}
+        else:
+            items = {name: value for name, value in data.items() if np.ndim(value) == 1}
+            attrs = {name: value for name, value in data.items() if name not in items}
+            index = None
+
+        encoded, specs, offset = [], [], 0
+        for name, values in items.items():
+            array, categories = _encode(values)
+            offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            specs.append({'name': name, 'dtype': array.dtype.str, 'shape': array.shape,
+                          'offset': offset, 'categories': categories})
+            encoded.append(array)
+            offset += array.nbytes
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for spec, array in zip(specs, encoded):
+            target = np.ndarray(spec['shape'], dtype=array.dtype, buffer=shm.buf, offset=spec['offset'])
+            target[...] = array
+        handle = {'name': shm.name, 'columns': specs, 'index': index, 'attrs': attrs}
+        return cls(handle, shm, owner=True)
+
+    @classmethod
+    def attach(cls, handle):
+        """Open a published state from another stage or process (read-only)"""
+        # Pool workers share the publisher's resource tracker, and only the publisher unlinks
+        return cls(handle, shared_memory.SharedMemory(name=handle['name']))
+
+    def __reduce__(self):
+        return SharedFleetState.attach, (self.handle,)
+
+    @property
+    def columns(self):
+        return list(self._specs)
+
+    @property
+    def attrs(self):
+        return self.handle['attrs']
+
+    def __contains__(self, name):
+        return name in self._specs or name in self.attrs
+
+    def _view(self, spec):
+        view = np.ndarray(spec['shape'], dtype=np.dtype(spec['dtype']), buffer=self._shm.buf,
+                          offset=spec['offset'])
+        view.flags.writeable = False
+        return view
+
+    def column(self, name):
+        """Read-only view of a numeric column; text columns come back as a Categorical"""
+        spec = self._specs[name]
+        view = self._view(spec)
+        if spec['categories'] is None:
+            return view
+        return pd.Categorical.from_codes(view, categories=spec['categories'])
+
+    def __getitem__(self, name):
+        if name in self._specs:
+            return self.column(name)
+        return self.attrs[name]
+
+    def writable(self, name):
+        """Private copy of one column for a stage that modifies it"""
+        column = self.column(name)
+        return np.array(column, dtype=object) if isinstance(column, pd.Categorical) else column.copy()
+
+    def to_frame(self, columns=None):
+        """DataFrame over the shared columns; numeric columns are not copied"""
+        columns = columns or self.columns
+        data = {name: self.column(name) for name in columns}
+        return pd.DataFrame(data, index=self.handle['index'], copy=False)
+
+    def nbytes(self):
+        return self._shm.size
+
+    def close(self):
+        self._specs = {}
+        try:
+            self._shm.close()
+        except BufferError:
+            # Views are still alive; the mapping is released when they are collected
+            pass
+
+    def unlink(self):
+        if self.owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        self.unlink()
@@ -0,0 +1,97 @@
+"""
+🚇 KMRL Single Flight
+Coalesce identical concurrent calls into one computation
+
+- canonical_key(): order-insensitive hash of request parameters
+- SingleFlight.do(): the first caller for a key runs the function, concurrent
+  callers with the same key wait and share its result (or its exception)
+- coalesce: decorator form for expensive functions and endpoints
+- Nothing is kept after the call finishes; later calls run again
+"""
+
+import functools
+import threading
+
+from backend.utils.stage_cache import fingerprint
+
+
+def canonical_key(*args, **kwargs):
+    """Stable key for call parameters; dict key order does not matter"""
+    return fingerprint(args, kwargs)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn once per in-flight key; every concurrent caller gets the same result"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn(*args, **kwargs)
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executions': self.executions,
+                'shared': self.shared
+            }
+
+
+def coalesce(key=None, flight=None):
+    """Decorator: concurrent calls with equal arguments share one execution.
+
+    key maps the call arguments to a coalescing key (default: canonical_key of
+    all arguments). Coalesced callers receive the same result object, so treat
+    it as read-only.
+    """
+    def decorator(func):
+        group = flight or SingleFlight()
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            call_key = key(*args, **kwargs) if key else canonical_key(name, *args, **kwargs)
+            return group.do(call_key, func, *args, **kwargs)
+
+        wrapper.flight = group
+        return wrapper
+    return decorator
@@ -0,0 +1,160 @@
+"""
+🚇 KMRL Stage Cache
+Content-addressed cache for master pipeline stage outputs
+
+- fingerprint(): stable digest of DataFrames, arrays and nested containers
+- Stage keys combine the stage name, its parameters and the digests of its
+  dependencies' outputs, so a changed input only invalidates what is
+  downstream of it
+- Two tiers: in-memory LRU and on-disk pickles with size-based eviction
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def _update(digest, value):
+    if isinstance(value, pd.DataFrame):
+        digest.update(b'frame')
+        digest.update(repr([(str(c), str(t)) for c, t in value.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        digest.update(b'series' + str(value.name).encode() + str(value.dtype).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(b'array' + str(value.dtype).encode() + repr(value.shape).encode())
+        digest.update(np.ascontiguousarray(value).tobytes() if value.dtype != object else pickle.dumps(value))
+    elif isinstance(value, dict):
+        digest.update(b'dict')
+        for key in sorted(value, key=repr):
+            digest.update(repr(key).encode())
+            _update(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(type(value).__name__.encode())
+        for item in value:
+            _update(digest, item)
+    elif value is None or isinstance(value, (str, bytes, int, float, bool, np.generic)):
+        digest.update(repr(value).encode())
+    else:
+        try:
+            digest.update(pickle.dumps(value))
+        except Exception:
+            digest.update(repr(value).encode())
+
+
+def fingerprint(*values):
+    """Hex digest of the content of the given values"""
+    digest = hashlib.sha256()
+    for value in values:
+        _update(digest, value)
+    return digest.hexdigest()
+
+
+class StageCache:
+    def __init__(self, cache_dir='cache/stages', max_memory_items=64, max_disk_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(stage_name, params, dependency_digests):
+        """Content address of one stage execution"""
+        return fingerprint(stage_name, params, dependency_digests)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pkl')
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Return (hit, entry) from memory first, then disk"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return True, self._memory[key]
+
+        path = self._path(key) if self.cache_dir else None
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    entry = pickle.load(f)
+                os.utime(path)  # Recently used entries are evicted last
+                with self._lock:
+                    self._remember(key, entry)
+                    self.hits += 1
+                return True, entry
+            except Exception:
+                pass
+
+        with self._lock:
+            self.misses += 1
+        return False, None
+
+    def put(self, key, entry):
+        with self._lock:
+            self._remember(key, entry)
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._path(key)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ Could not persist stage cache entry: {e}")
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        """Drop least recently used files until the directory fits max_disk_bytes"""
+        with self._lock:
+            files = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.pkl'):
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                    files.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in files)
+            for _, size, name in sorted(files):
+                if total <= self.max_disk_bytes:
+                    break
+                os.remove(os.path.join(self.cache_dir, name))
+                self._memory.pop(name[:-4], None)
+                total -= size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self.cache_dir and os.path.isdir(self.cache_dir):
+                for name in os.listdir(self.cache_dir):
+                    if name.endswith('.pkl'):
+                        os.remove(os.path.join(self.cache_dir, name))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'memory_items': len(self._memory),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions
+            }
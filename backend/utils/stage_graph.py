@@ -0,0 +1,267 @@
+"""
+🚇 KMRL Stage Graph
+Dependency-graph executor for the master optimization pipeline
+
+- Stages declare their dependencies and receive their outputs as keyword
+  arguments named after those dependencies
+- Independent stages run concurrently on a thread pool, so wall time follows
+  the critical path instead of the sum of all stages; at most max_workers run
+  at once and a stage is only submitted when it can start, so its timeout
+  never counts time spent queued
+- Per-stage timeouts and failure isolation: a failed or timed-out stage uses
+  its fallback when it has one (status 'degraded'), otherwise its dependents
+  are skipped while unrelated stages carry on
+- Optional StageCache: cacheable stages are keyed by their parameters and the
+  content digests of their dependencies' outputs and skipped on a hit
+  (status 'cached')
+- Optional Deadline: stages with a fallback get at most the remaining budget,
+  and are degraded up front when their estimated duration would overrun it
+- Optional Tracer: every stage and fallback that runs is recorded as a span
+- Cancellable stages get a CancelToken: a timed-out stage's thread cannot be
+  stopped, so such stages publish their side effects through the token, which
+  refuses once the graph has given up on them; the pool keeps spare threads
+  for abandoned stages so they never hold a slot later stages need
+"""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from backend.utils.stage_cache import StageCache, fingerprint
+
+
+class CancelToken:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cancelled = False
+        self.committed = False
+
+    def cancel(self):
+        """Abandon the stage; returns False when it has already published"""
+        with self._lock:
+            if not self.committed:
+                self.cancelled = True
+            return self.cancelled
+
+    def commit(self, publish):
+        """Run publish() unless the stage was abandoned; returns whether it ran"""
+        with self._lock:
+            if self.cancelled:
+                return False
+            publish()
+            self.committed = True
+            return True
+
+
+class Stage:
+    def __init__(self, name, fn, deps=(), timeout=None, fallback=None, cacheable=False, params=None,
+                 digest=None, cache_name=None, cancellable=False, cache_if=None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        # Callable taking the same keyword arguments as fn
+        self.fallback = fallback
+        # Cached stages must depend only on params and their dependencies' outputs
+        self.cacheable = cacheable
+        self.params = params
+        # Callable mapping the output to what identifies it downstream (defaults to the output)
+        self.digest = digest
+        # Stages doing the same work under different names can share cache entries
+        self.cache_name = cache_name or name
+        # Callable deciding from the output whether it may be cached (default: always)
+        self.cache_if = cache_if
+        # fn also receives cancel_token=CancelToken() and publishes through it
+        self.cancellable = cancellable
+
+
+class StageResult:
+    def __init__(self, name, status, value=None, error=None, started=0.0, seconds=0.0, digest=None):
+        self.name = name
+        self.status = status
+        self.value = value
+        self.error = error
+        self.started = started
+        self.seconds = seconds
+        self.digest = digest
+
+    @property
+    def usable(self):
+        return self.status in ('ok', 'degraded', 'cached')
+
+    def to_dict(self):
+        return {
+            'status': self.status,
+            'started': round(self.started, 4),
+            'seconds': round(self.seconds, 4),
+            'error': self.error
+        }
+
+
+class StageGraph:
+    def __init__(self, stages, max_workers=4, cache=None, deadline=None, estimates=None, tracer=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_workers = max_workers
+        self.cache = cache
+        self.deadline = deadline
+        self.estimates = estimates
+        self.tracer = tracer
+        self.order = self._topological_order()
+
+    def _topological_order(self):
+        for stage in self.stages.values():
+            missing = [dep for dep in stage.deps if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s) {missing}")
+
+        remaining = {name: set(stage.deps) for name, stage in self.stages.items()}
+        order = []
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Stage graph has a cycle among {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    def _resolve_failure(self, stage, kwargs, status, error, started, seconds):
+        if stage.fallback is None:
+            return StageResult(stage.name, status, error=error, started=started, seconds=seconds)
+        try:
+            value = self._call(f'{stage.name}:fallback', stage.fallback, kwargs)
+        except Exception as e:
+            return StageResult(stage.name, status, error=f"{error}; fallback failed: {e}",
+                               started=started, seconds=seconds)
+        print(f"   ⚠️ Stage '{stage.name}' {status} ({error}), using fallback")
+        return StageResult(stage.name, 'degraded', value, error, started, seconds)
+
+    def _call(self, name, fn, kwargs):
+        if self.tracer is None:
+            return fn(**kwargs)
+        return self.tracer.call(name, fn, **kwargs)
+
+    def _output_digest(self, stage, value):
+        if self.cache is None:
+            return None
+        return fingerprint(stage.digest(value) if stage.digest else value)
+
+    def _cache_key(self, stage, results):
+        # Degraded outputs are stand-ins, so nothing downstream of them is cached
+        if self.cache is None or not stage.cacheable:
+            return None
+        if any(results[dep].status == 'degraded' for dep in stage.deps):
+            return None
+        return StageCache.key(stage.cache_name, stage.params, [results[dep].digest for dep in stage.deps])
+
+    def _time_limit(self, stage):
+        """Effective timeout, and a reason to degrade the stage without running it"""
+        if self.deadline is None or stage.fallback is None:
+            return stage.timeout, None
+        remaining = self.deadline.remaining()
+        expected = self.estimates.estimate(stage.name) if self.estimates else None
+        if remaining <= 0:
+            return stage.timeout, "latency budget exhausted"
+        if expected is not None and expected > remaining:
+            return stage.timeout, f"expected {expected:.2f}s exceeds {remaining:.2f}s left"
+        return min(stage.timeout, remaining) if stage.timeout else remaining, None
+
+    def run(self):
+        """Execute every stage once its dependencies are done; returns name -> StageResult"""
+        t0 = time.perf_counter()
+        results = {}
+        running = {}  # future -> (stage, kwargs, started, cache key, timeout, cancel token)
+        # Each stage is abandoned at most once, so one spare thread per stage means
+        # abandoned threads never starve the max_workers stages allowed to run
+        pool = ThreadPoolExecutor(max_workers=self.max_workers + len(self.stages))
+
+        def submit_ready():
+            # Returns True after a cache hit, whose dependents may now be ready
+            for name in self.order:
+                if name in results or any(entry[0].name == name for entry in running.values()):
+                    continue
+                stage = self.stages[name]
+                if not all(dep in results for dep in stage.deps):
+                    continue
+                blocked = [dep for dep in stage.deps if not results[dep].usable]
+                if blocked:
+                    results[name] = StageResult(name, 'skipped', error=f"dependency failed: {blocked}")
+                    continue
+                if len(running) >= self.max_workers:
+                    continue
+                key = self._cache_key(stage, results)
+                if key is not None:
+                    hit, entry = self.cache.get(key)
+                    if hit:
+                        value, digest = entry
+                        results[name] = StageResult(name, 'cached', value, started=time.perf_counter() - t0,
+                                                    digest=digest)
+                        return True
+                kwargs = {dep: results[dep].value for dep in stage.deps}
+                now = time.perf_counter() - t0
+                timeout, overrun = self._time_limit(stage)
+                if overrun:
+                    results[name] = self._resolve_failure(stage, kwargs, 'timeout', overrun, now, 0.0)
+                    return True
+                token = CancelToken() if stage.cancellable else None
+                call_kwargs = dict(kwargs, cancel_token=token) if token else kwargs
+                running[pool.submit(self._call, name, stage.fn, call_kwargs)] = (stage, kwargs, now, key, timeout,
+                                                                                  token)
+            return False
+
+        try:
+            # Cache hits complete immediately and may unblock further stages
+            while submit_ready():
+                pass
+            while running:
+                now = time.perf_counter() - t0
+                deadlines = [started + timeout for _, _, started, _, timeout, _ in running.values() if timeout]
+                timeout = max(0.0, min(deadlines) - now) if deadlines else None
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                now = time.perf_counter() - t0
+                for future in done:
+                    stage, kwargs, started, key, _, _ = running.pop(future)
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        results[stage.name] = self._resolve_failure(
+                            stage, kwargs, 'failed', f"{type(e).__name__}: {e}", started, now - started
+                        )
+                        continue
+                    digest = self._output_digest(stage, value)
+                    results[stage.name] = StageResult(stage.name, 'ok', value, started=started,
+                                                      seconds=now - started, digest=digest)
+                    if self.estimates is not None:
+                        self.estimates.observe(stage.name, now - started)
+                    if key is not None and (stage.cache_if is None or stage.cache_if(value)):
+                        self.cache.put(key, (value, digest))
+
+                # Timed-out stages are abandoned; their threads finish in the background
+                for future, (stage, kwargs, started, key, timeout, token) in list(running.items()):
+                    if timeout and now - started >= timeout:
+                        if token is not None and not token.cancel():
+                            # Already published, so only its return is left: wait for it
+                            running[future] = (stage, kwargs, started, key, None, token)
+                            continue
+                        del running[future]
+                        future.cancel()
+                        results[stage.name] = self._resolve_failure(
+                            stage, kwargs, 'timeout', f"exceeded {timeout:.2f}s", started, now - started
+                        )
+                        # Abandoned runs still inform the estimate: at least this long
+                        if self.estimates is not None:
+                            self.estimates.observe(stage.name, now - started)
+                while submit_ready():
+                    pass
+        finally:
+            pool.shutdown(wait=False)
+
+        return {name: results[name] for name in self.order}
+
+    @staticmethod
+    def report(results):
+        """JSON-friendly per-stage status and timing"""
+        return {name: result.to_dict() for name, result in results.items()}
@@ -0,0 +1,139 @@
+"""
+🚇 KMRL Tracing
+Per-stage spans for the master pipeline
+
+- Tracer.span(): records wall time, CPU time of the running thread, growth
+  of the process peak RSS and the sizes of the stage inputs
+- Spans are relative to the start of the trace, so stages that overlap on
+  the thread pool are visible as such
+- report() goes into the pipeline summary; log() feeds log_performance so
+  timings can be tracked across runs
+"""
+
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS, spans report None
+    resource = None
+
+
+def peak_rss_mb():
+    """High-water mark of the process resident set, in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def input_sizes(inputs):
+    """Row counts of the frames and arrays a stage receives, by argument name"""
+    sizes = {}
+    for name, value in (inputs or {}).items():
+        if isinstance(value, dict):
+            nested = input_sizes(value)
+            sizes.update({f'{name}.{key}': rows for key, rows in nested.items()})
+        elif isinstance(value, (pd.DataFrame, pd.Series, np.ndarray, list)):
+            sizes[name] = len(value)
+    return sizes
+
+
+class Span:
+    def __init__(self, name, started, inputs=None):
+        self.name = name
+        self.started = started
+        self.inputs = inputs or {}
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_rss_delta_mb = None
+        self.status = 'running'
+        self.error = None
+        self.thread = threading.current_thread().name
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'status': self.status,
+            'start': round(self.started, 4),
+            'end': round(self.started + self.wall_seconds, 4),
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'peak_rss_delta_mb': round(self.peak_rss_delta_mb, 2) if self.peak_rss_delta_mb is not None else None,
+            'inputs': self.inputs,
+            'thread': self.thread,
+            'error': self.error
+        }
+
+
+class Tracer:
+    def __init__(self, name='pipeline'):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.t0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, inputs=None):
+        """Time the enclosed block; CPU time is that of the current thread"""
+        span = Span(name, time.perf_counter() - self.t0, input_sizes(inputs))
+        with self._lock:
+            self._spans.append(span)
+        wall0, cpu0, rss0 = time.perf_counter(), time.thread_time(), peak_rss_mb()
+        try:
+            yield span
+            span.status = 'ok'
+        except BaseException as e:
+            span.status = 'error'
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.wall_seconds = time.perf_counter() - wall0
+            span.cpu_seconds = time.thread_time() - cpu0
+            # Process-wide: growth of the peak while this span ran, shared with overlapping spans
+            rss1 = peak_rss_mb()
+            span.peak_rss_delta_mb = rss1 - rss0 if rss0 is not None else None
+
+    def call(self, name, fn, **kwargs):
+        """Run fn(**kwargs) inside a span named after the stage"""
+        with self.span(name, kwargs):
+            return fn(**kwargs)
+
+    def spans(self):
+        with self._lock:
+            return [span.to_dict() for span in sorted(self._spans, key=lambda span: span.started)]
+
+    def report(self):
+        spans = self.spans()
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'wall_seconds': round(time.perf_counter() - self.t0, 4),
+            'cpu_seconds': round(time.process_time() - self._cpu0, 4),
+            'peak_rss_mb': peak_rss_mb(),
+            'spans': spans
+        }
+
+    def log(self, logger=None):
+        """Write one PERF line per span, and one for the whole trace"""
+        from backend.utils.logger import log_performance, system_logger
+
+        logger = logger or system_logger
+        report = self.report()
+        for span in report['spans']:
+            rows = ', '.join(f'{name}={count}' for name, count in span['inputs'].items())
+            details = (f"trace={self.trace_id[:8]} | {span['status']} | cpu {span['cpu_seconds']:.3f}s | "
+                       f"peak rss +{span['peak_rss_delta_mb'] or 0:.1f}MB" + (f" | rows {rows}" if rows else ""))
+            log_performance(logger, f"{self.name}.{span['name']}", span['wall_seconds'], details)
+        log_performance(logger, self.name, report['wall_seconds'],
+                        f"trace={self.trace_id[:8]} | cpu {report['cpu_seconds']:.3f}s | {len(report['spans'])} spans")
+        return report
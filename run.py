@@ -71,6 +71,17 @@ def clean_data_for_json(data):
     if isinstance(data, pd.DataFrame): return clean_data_for_json(data.to_dict('records'))
     return safe_json_convert(data)
 
+# kmrl_train_data.csv column -> column name the readiness model reads
+READINESS_COLUMNS = {'LastServiceDate': 'last_maintenance', 'ReliabilityScore': 'mechanical_score'}
+
+def readiness_inputs(trains_df):
+    """Readiness model columns derived from the snapshot, scored as of its LastUpdated time"""
+    renames = {src: dst for src, dst in READINESS_COLUMNS.items()
+               if src in trains_df.columns and dst not in trains_df.columns}
+    frame = trains_df.rename(columns=renames)
+    now = pd.to_datetime(trains_df['LastUpdated']).max() if 'LastUpdated' in trains_df.columns else None
+    return frame, now
+
 # Load datasets
 def load_datasets():
     datasets = {}
@@ -190,22 +201,17 @@ def get_pipelined_results():
         # AI train readiness analysis
         trains_df = DATASETS.get('kmrl_train_data', pd.DataFrame())
         if not trains_df.empty:
-            readiness_scores = []
-            # Process first 3 trains to avoid timeout
-            for _, train in trains_df.head(3).iterrows():
-                try:
-                    train_dict = clean_data_for_json(train.to_dict())
-                    readiness = ai_model.calculate_train_readiness(train_dict)
-                    readiness_scores.append({
-                        'train_id': str(train.get('TrainID', 'Unknown')),
-                        'readiness_score': float(readiness) if readiness is not None else 0.85
-                    })
-                except Exception as e:
-                    print(f"⚠️ Train readiness calculation failed: {e}")
-                    readiness_scores.append({
-                        'train_id': str(train.get('TrainID', 'Unknown')),
-                        'readiness_score': 0.75
-                    })
+            # Score the whole fleet in one vectorized pass
+            try:
+                readiness = ai_model.calculate_fleet_readiness(*readiness_inputs(trains_df))['readiness_score']
+            except Exception as e:
+                print(f"⚠️ Train readiness calculation failed: {e}")
+                readiness = pd.Series(0.75, index=trains_df.index)
+            train_ids = trains_df['TrainID'] if 'TrainID' in trains_df.columns else pd.Series('Unknown', index=trains_df.index)
+            readiness_scores = [
+                {'train_id': str(train_id), 'readiness_score': float(score)}
+                for train_id, score in zip(train_ids, readiness)
+            ]
 
             results['train_analysis'] = {
                 'total_trains': int(len(trains_df)),
@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+import backend.models.ai_model as ai_model
+from backend.models.ai_model import SmartMetroAI, DEMAND_FEATURES
+
+def synthetic_schedules(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 1, 1)
+    return pd.DataFrame({
+        "train_id": rng.choice(["KRISHNA", "TAPTI", "NILA"], n),
+        "scheduled_departure": [start + timedelta(hours=int(h)) for h in rng.permutation(24 * 60)[:n]],
+        "route": rng.choice(["Red Line", "Blue Line", "Green Line"], n),
+        "passenger_load": rng.integers(50, 400, n),
+        "delay_minutes": rng.exponential(2.5, n),
+        "weather_condition": rng.choice(["clear", "rainy"], n),
+    })
+
+def trained_ai():
+    ai = SmartMetroAI()
+    ai.train_models(synthetic_schedules(), pd.DataFrame(), pd.DataFrame())
+    return ai
+
+def test_batched_demand_forecast_matches_single_row_predictions():
+    ai = trained_ai()
+    start = datetime(2025, 3, 1, 6)
+    forecast = ai.forecast_demand(days_ahead=2, route="all", start=start)
+    assert len(forecast) == 2 * 24 * 3
+
+    frame = ai.build_demand_frame(days_ahead=2, route="all", start=start)
+    row = frame.iloc[[30]]
+    single = max(0, int(ai.demand_model.predict(row[DEMAND_FEATURES])[0]))
+    assert forecast["predicted_demand"].iloc[30] == single
+
+    records = ai.predict_demand(days_ahead=1, route="Red Line")
+    intervals = ai.get_confidence_intervals(records)
+    assert len(intervals) == 24
+    assert all(i["lower_bound"] <= i["prediction"] <= i["upper_bound"] for i in intervals)
+
+    # The default output stays one row per hour; unknown routes fall back leniently
+    assert len(ai.predict_demand(days_ahead=1)) == len(ai.predict_demand(days_ahead=1, route="Purple Line")) == 24
+    assert "route" not in ai.predict_demand(days_ahead=1)[0]
+    assert len(ai.predict_demand(days_ahead=1, per_route=True)) == 24 * 3
+    assert "error" in ai.predict_demand(days_ahead=1, route="Purple Line", per_route=True)
+
+def test_quantile_models_give_ordered_bands_from_one_pass():
+    ai = trained_ai()
+    forecast = ai.forecast_demand(days_ahead=1, start=datetime(2025, 3, 1))
+    assert (forecast["p10"] <= forecast["p50"]).all() and (forecast["p50"] <= forecast["p90"]).all()
+    intervals = ai.get_confidence_intervals(forecast)
+    assert (intervals["upper_bound"] >= forecast["p90"]).all()
+    assert not (intervals["lower_bound"] == (forecast["predicted_demand"] * 0.85).astype(int)).all()
+
+    delays = ai.predict_delays(route="Red Line", time_of_day="08:00")
+    assert delays["interval"]["p10"] <= delays["interval"]["p50"] <= delays["interval"]["p90"]
+    assert delays["confidence"] == ai.model_performance["delay_prediction"]["interval_coverage"]
+
+def test_fleet_readiness_matches_per_train_scoring(monkeypatch):
+    rng = np.random.default_rng(1)
+    n = 200
+    now = datetime(2025, 6, 1)
+    fleet = pd.DataFrame({
+        "mechanical_score": rng.uniform(0.5, 1.0, n),
+        "last_maintenance": [(now - timedelta(days=int(d))).strftime("%Y-%m-%d") for d in rng.integers(0, 200, n)],
+        "energy_consumption": rng.uniform(50, 100, n),
+        "brand_hours_remaining": rng.integers(0, 10, n),
+        "crew_id": np.where(rng.random(n) > 0.2, "CREW_001", None),
+    })
+    ai = SmartMetroAI()
+    scores = ai.calculate_fleet_readiness(fleet, now=now)
+    assert list(scores.columns) == ["readiness_score", "mechanical", "maintenance", "energy", "branding", "crew"]
+
+    class FixedNow(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now
+    monkeypatch.setattr(ai_model, "datetime", FixedNow)
+    expected = [ai.calculate_train_readiness(row) for row in fleet.to_dict("records")]
+    np.testing.assert_allclose(scores["readiness_score"], expected)
+
+def test_fleet_readiness_matches_per_train_scoring_on_edge_rows(monkeypatch):
+    now = datetime(2025, 6, 1)
+    crews = ["CREW_001", "", None, np.nan, 0, 7, 0.0, False, True]
+    fleet = pd.DataFrame({
+        "mechanical_score": 0.9,
+        "last_maintenance": ["2025-05-01", None] * 4 + ["2025-01-01"],
+        "energy_consumption": 60.0,
+        "brand_hours_remaining": 4,
+        "crew_id": pd.Series(crews, dtype=object),
+    })
+    ai = SmartMetroAI()
+    scores = ai.calculate_fleet_readiness(fleet, now=now)
+    assert scores["readiness_score"].notna().all()
+
+    class FixedNow(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now
+    monkeypatch.setattr(ai_model, "datetime", FixedNow)
+    expected = [ai.calculate_train_readiness(row) for row in fleet.to_dict("records")]
+    np.testing.assert_allclose(scores["readiness_score"], expected)
+
+def test_incremental_training_continues_existing_boosters():
+    ai = trained_ai()
+    # Continued boosting starts from the early-stopping optimum
+    before = ai.delay_model.best_iteration + 1
+    ai.max_total_trees = before + 100
+
+    summary = ai.incremental_training(synthetic_schedules(50, seed=1), "schedules")
+    assert summary["delay"] == {"mode": "continued", "rounds_added": 50, "rows": 350, "total_trees": before + 50}
+    assert summary["demand"]["mode"] == "continued"
+
+    ai.incremental_training(synthetic_schedules(50, seed=2), "schedules")
+    summary = ai.incremental_training(synthetic_schedules(50, seed=3), "schedules")
+    assert summary["delay"] == {"mode": "refit", "rows": 300 + 150, "total_trees": 100}
+
+    # A full retrain starts the window over from its own rows
+    ai.train_models(synthetic_schedules(), pd.DataFrame(), pd.DataFrame())
+    assert len(ai.training_windows["delay"][0]) == len(ai.training_windows["demand"][1]) == 300
+
+def test_models_persist_as_versions_and_reload_for_matching_data(tmp_path):
+    schedules = synthetic_schedules()
+    ai = SmartMetroAI(model_dir=str(tmp_path), keep_versions=2)
+    assert ai.ensure_models(schedules, pd.DataFrame(), pd.DataFrame())["source"] == "trained"
+
+    reloaded = SmartMetroAI(model_dir=str(tmp_path), keep_versions=2)
+    state = reloaded.ensure_models(schedules, pd.DataFrame(), pd.DataFrame())
+    assert state == {"source": "loaded", "version": ai.model_version}
+    frame = ai.build_demand_frame(days_ahead=1, start=datetime(2025, 3, 1))
+    np.testing.assert_array_equal(
+        reloaded.demand_model.predict(frame[DEMAND_FEATURES]), ai.demand_model.predict(frame[DEMAND_FEATURES])
+    )
+    assert reloaded.model_performance.keys() == ai.model_performance.keys()
+    np.testing.assert_array_equal(
+        reloaded.predict_quantiles("demand_quantile_model", frame[DEMAND_FEATURES]),
+        ai.predict_quantiles("demand_quantile_model", frame[DEMAND_FEATURES])
+    )
+
+    for seed in (1, 2):
+        assert reloaded.ensure_models(synthetic_schedules(seed=seed), pd.DataFrame(), pd.DataFrame())["source"] == "trained"
+    assert len([p for p in tmp_path.iterdir() if p.is_dir()]) == 2
+
+def test_reloaded_models_keep_their_settings_and_window_for_incremental_training(tmp_path):
+    ai = SmartMetroAI(model_dir=str(tmp_path))
+    ai.ensure_models(synthetic_schedules(), pd.DataFrame(), pd.DataFrame())
+    reloaded = SmartMetroAI(model_dir=str(tmp_path))
+    assert reloaded.load_models()
+    params = reloaded.delay_model.get_params()
+    assert (params["learning_rate"], params["tree_method"], params["n_estimators"]) == (0.1, "hist", 100)
+    np.testing.assert_array_equal(reloaded.delay_quantile_model.get_params()["quantile_alpha"], ai_model.QUANTILES)
+
+    reloaded.max_total_trees = reloaded.delay_model.best_iteration + 100
+    summary = reloaded.incremental_training(synthetic_schedules(50, seed=1), "schedules")
+    assert summary["delay"]["mode"] == "continued" and summary["delay"]["rows"] == 350
+
+    # At the cap the refit still uses the saved learning rate
+    reloaded.max_total_trees = 0
+    reloaded.incremental_training(synthetic_schedules(50, seed=2), "schedules")
+    assert reloaded.delay_model.get_params()["learning_rate"] == 0.1
+
+def test_what_if_reports_distributions_independent_of_worker_count():
+    ai = trained_ai()
+    result = ai.what_if_analysis("increase_frequency", {"frequency_increase": 20}, 24, n_runs=3000)
+    delta = result["performance_delta"]
+    assert delta["passenger_wait_time"] < 0 < delta["operational_cost"]
+    wait = result["distributions"]["passenger_wait_time"]
+    assert wait["p5"] <= wait["p50"] <= wait["p95"]
+    assert result["simulation"]["runs"] == 3000
+
+    parallel = ai.what_if_analysis("increase_frequency", {"frequency_increase": 20}, 24, n_runs=3000, n_workers=2)
+    assert parallel["distributions"] == result["distributions"]
+
+def test_batch_maintenance_scoring_matches_per_train_predictions(monkeypatch):
+    rng = np.random.default_rng(2)
+    n = 300
+    now = datetime(2025, 6, 1)
+    fleet = pd.DataFrame({
+        "train_id": [f"T{i}" for i in range(n)],
+        "last_maintenance": [(now - timedelta(days=int(d))).strftime("%Y-%m-%d") for d in rng.integers(0, 150, n)],
+        "next_maintenance": [(now + timedelta(days=int(d))).strftime("%Y-%m-%d") for d in rng.integers(0, 90, n)],
+        "energy_consumption": rng.uniform(50, 100, n),
+        "mechanical_score": rng.uniform(0.5, 1.0, n),
+    })
+
+    class FixedNow(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now
+    monkeypatch.setattr(ai_model, "datetime", FixedNow)
+
+    ai = SmartMetroAI()
+    for trained in (False, True):
+        if trained:
+            ai.train_models(synthetic_schedules(), fleet, fleet)
+            assert ai.maintenance_model is not None
+        batch = ai.predict_maintenance_batch(fleet, now=now)
+        expected = pd.DataFrame([ai.predict_maintenance(row) for row in fleet.to_dict("records")])
+        assert list(batch["action"]) == list(expected["action"])
+        assert list(batch["reason"]) == list(expected["reason"])
+        np.testing.assert_allclose(batch["confidence"], expected["confidence"], rtol=1e-6)
+        np.testing.assert_array_equal(batch["days_until"], expected["days_until"])
@@ -0,0 +1,49 @@
+import time
+import pandas as pd
+from backend.optimization.optimization_run import greedy_induction
+from backend.utils.deadline import Deadline, StageEstimates
+from backend.utils.stage_graph import Stage, StageGraph
+
+def graph(deadline, estimates):
+    return StageGraph([
+        Stage("data", lambda: 1),
+        Stage("solver", lambda data: (time.sleep(1.0), "optimal")[1], deps=["data"], timeout=30,
+              fallback=lambda data: "greedy"),
+        Stage("model", lambda data: "trained", deps=["data"], fallback=lambda data: "stale"),
+        Stage("final", lambda solver, model: f"{solver}/{model}", deps=["solver", "model"]),
+    ], deadline=deadline, estimates=estimates)
+
+def test_budget_bounds_stages_and_estimates_preempt_overruns():
+    estimates = StageEstimates()
+    start = time.perf_counter()
+    results = graph(Deadline(0.3, reserve_seconds=0.05), estimates).run()
+    assert time.perf_counter() - start < 0.6
+    assert results["final"].value == "greedy/trained"
+    assert results["solver"].status == "degraded" and results["model"].status == "ok"
+
+    # The solver is now known to take longer than the budget: skip it up front
+    start = time.perf_counter()
+    results = graph(Deadline(0.3, reserve_seconds=0.05), estimates).run()
+    assert time.perf_counter() - start < 0.1
+    assert "expected" in results["solver"].error and results["final"].value == "greedy/trained"
+
+def test_greedy_induction_selects_eligible_trains_by_readiness():
+    trains = pd.DataFrame({
+        "trainset_id": ["A", "B", "C", "D"],
+        "certificate_valid": [1, 1, 0, 1],
+        "critical_jobs_open": [0, 1, 0, 0],
+        "readiness_score": [0.7, 0.99, 0.95, 0.9],
+    })
+    result = greedy_induction(trains, min_peak_trainsets=2)
+    assert result["selected_trainsets"] == ["D", "A"] and result["pulp_status"] == "Greedy"
+    assert result["details"]["selected_for_induction"].tolist() == [1, 0, 0, 1]
+
+def test_greedy_induction_respects_depot_capacities():
+    trains = pd.DataFrame({
+        "trainset_id": ["A", "B", "C", "D", "E"],
+        "location": ["Muttom", "Muttom", "Muttom", "Kalamassery", "Aluva"],
+        "critical_jobs_open": [0, 0, 1, 0, 0],
+        "readiness_score": [0.8, 0.9, 0.99, 0.7, 0.6],
+    })
+    result = greedy_induction(trains, min_peak_trainsets=3, depot_capacities={"Muttom": 1, "Kalamassery": 0})
+    assert result["selected_trainsets"] == ["B", "E"] and result["pulp_status"] == "Greedy (short)"
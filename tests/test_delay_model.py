@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+from backend.models.delay_prediction_model import DelayPredictor
+
+def small_fleet():
+    return pd.DataFrame([
+        {"TrainID": "KRISHNA", "distance_km": 8.5},
+        {"TrainID": "TAPTI", "distance_km": 12.0},
+    ])
+
+def test_shared_mode_predicts_all_heads_and_round_trips(tmp_path):
+    predictor = DelayPredictor(model_mode="shared", model_dir=str(tmp_path))
+    result = predictor.train_model(df=small_fleet())
+    assert result["models_count"] == 1
+
+    prediction = predictor.predict_schedule(dwell_time=60, distance=8.5, load_factor=0.7, time_of_day=8)
+    assert prediction["Predicted Delay Category"] == predictor.categorize_delay(prediction["Predicted Delay Minutes"])
+    assert prediction["Predicted Service Pattern"] == "Peak"
+    assert 0 <= prediction["Confidence"] <= 100
+
+    reloaded = DelayPredictor(model_dir=str(tmp_path))
+    reloaded.load_models()
+    assert reloaded.model_mode == "shared"
+    assert reloaded.predict_schedule(dwell_time=60, distance=8.5, load_factor=0.7, time_of_day=8) == prediction
+
+def test_prediction_cache_hits_on_quantized_inputs_and_resets_on_retrain(tmp_path):
+    predictor = DelayPredictor(model_dir=str(tmp_path))
+    predictor.train_model(df=small_fleet(), save=False)
+
+    first = predictor.predict_schedule(dwell_time=60, distance=8.51, load_factor=0.7)
+    second = predictor.predict_schedule(dwell_time=60, distance=8.49, load_factor=0.7)
+    assert first == second
+    stats = predictor.get_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    predictor.train_model(df=small_fleet(), save=False)
+    predictor.predict_schedule(dwell_time=60, distance=8.5, load_factor=0.7)
+    stats = predictor.get_cache_stats()
+    assert stats["invalidations"] == 1 and stats["size"] == 1
+
+def test_streaming_training_keeps_a_bounded_sample(tmp_path):
+    history = tmp_path / "history.csv"
+    pd.DataFrame({"TrainID": ["A", "B", "C", "D"], "distance_km": [2.0, 4.0, 6.0, 8.0]}).to_csv(history, index=False)
+
+    predictor = DelayPredictor(model_dir=str(tmp_path))
+    result = predictor.train_streaming(str(history), chunksize=1, reservoir_size=500, save=False)
+    assert result["rows_seen"] == 4 * 272
+    assert result["sample_rows"] == 500
+    stats = predictor.training_summary["feature_stats"]["distance_km"]
+    assert stats["count"] == 4 * 272 and stats["mean"] == 5.0
+
+def test_training_noise_comes_from_a_local_generator():
+    predictor = DelayPredictor()
+    np.random.seed(7)
+    expected = np.random.random()
+    np.random.seed(7)
+    rng = np.random.default_rng(42)
+    _, first = predictor.prepare_training_data(small_fleet(), rng)
+    _, second = predictor.prepare_training_data(small_fleet(), rng)
+    assert np.random.random() == expected
+    # Successive chunks sharing one generator get fresh noise
+    assert not np.allclose(first["delay_minutes"], second["delay_minutes"])
+    _, again = predictor.prepare_training_data(small_fleet())
+    assert np.allclose(again["delay_minutes"], first["delay_minutes"])
+
+def test_tuned_configuration_only_configures_the_minutes_regressor(tmp_path):
+    DelayPredictor(model_dir=str(tmp_path)).save_tuned_config(
+        {"engine": "random_forest", "params": {"n_estimators": 10, "max_depth": 5}, "heads": ["delay_minutes"]}
+    )
+    predictor = DelayPredictor(model_dir=str(tmp_path))
+    predictor.train_model(df=small_fleet(), save=False)
+    minutes = predictor.models["delay_minutes"]
+    assert (type(minutes).__name__, minutes.n_estimators, minutes.max_depth) == ("RandomForestRegressor", 10, 5)
+    # Classifier heads were never scored by the search and keep the engine defaults
+    assert predictor.engine == "hist_gradient_boosting"
+    assert type(predictor.models["delay_category"]).__name__ == "HistGradientBoostingClassifier"
+    assert type(DelayPredictor(model_dir=str(tmp_path), use_tuned=False).make_estimator(
+        "regressor", head="delay_minutes")).__name__ == "HistGradientBoostingRegressor"
+
+def test_successive_halving_keeps_the_better_half_each_rung():
+    from backend.models.delay_tuning import successive_halving
+    rng = np.random.default_rng(0)
+    X = rng.uniform(-1, 1, (400, 2))
+    y = np.sin(4 * X[:, 0]) + X[:, 1] ** 2
+    candidates = [
+        {"engine": "random_forest", "params": {"n_estimators": 10, "max_depth": 1}},
+        {"engine": "random_forest", "params": {"n_estimators": 10, "max_depth": None}},
+    ]
+    result = successive_halving(X, y, candidates, budget_seconds=60, factor=2, min_rows=100, max_workers=1)
+    assert [(rung["rows"], rung["evaluated"], rung["complete"]) for rung in result["rungs"]] == \
+        [(100, 2, True), (200, 1, True)]
+    assert result["params"]["max_depth"] is None and result["rows"] == 200
+    assert result["validation_mae"] == result["rungs"][-1]["best_mae"]
+
+def test_each_engine_trains_and_round_trips_through_metadata(tmp_path):
+    assert DelayPredictor(model_dir=str(tmp_path), use_tuned=False).engine == "hist_gradient_boosting"
+    for engine, estimator in [("random_forest", "RandomForestRegressor"),
+                              ("hist_gradient_boosting", "HistGradientBoostingRegressor")]:
+        model_dir = tmp_path / engine
+        predictor = DelayPredictor(model_dir=str(model_dir), engine=engine)
+        assert "error" not in predictor.train_model(df=small_fleet())
+        prediction = predictor.predict_schedule(dwell_time=60, distance=8.5, load_factor=0.7)
+
+        reloaded = DelayPredictor(model_dir=str(model_dir))
+        reloaded.load_models()
+        assert reloaded.engine == engine and reloaded.model_version == predictor.model_version
+        assert type(reloaded.models["delay_minutes"]).__name__ == estimator
+        assert reloaded.predict_schedule(dwell_time=60, distance=8.5, load_factor=0.7) == prediction
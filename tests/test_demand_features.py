@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from backend.models.demand_features import RollingDemandFeatures
+
+def trip_history(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    loads = rng.integers(50, 400, n).astype(float)
+    loads[rng.choice(n, 10, replace=False)] = np.nan
+    return pd.DataFrame({
+        "scheduled_departure": pd.date_range("2025-01-01", periods=n, freq="17min"),
+        "route": rng.choice(["Red Line", "Blue Line", "Green Line"], n),
+        "passenger_load": loads,
+    })
+
+def reference_features(frame):
+    frame = frame.sort_values("scheduled_departure").copy()
+    frame["historical_demand"] = frame.groupby("route")["passenger_load"].shift(1).fillna(0)
+    frame["demand_trend"] = frame.groupby("route")["passenger_load"].rolling(7).mean().reset_index(0, drop=True).fillna(0)
+    return frame
+
+def test_batched_and_single_updates_match_full_recompute():
+    history = trip_history()
+    expected = reference_features(history)
+
+    batched = RollingDemandFeatures()
+    for start in range(0, len(history), 64):
+        batched.extend(history.iloc[start:start + 64])
+    exported = batched.to_frame()
+    pd.testing.assert_series_equal(exported["historical_demand"], expected["historical_demand"])
+    pd.testing.assert_series_equal(exported["demand_trend"], expected["demand_trend"])
+
+    single = RollingDemandFeatures()
+    rows = [single.update(r, load) for r, load in zip(history["route"], history["passenger_load"])]
+    np.testing.assert_allclose(np.array(rows), expected[["historical_demand", "demand_trend"]].to_numpy())
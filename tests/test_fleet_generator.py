@@ -0,0 +1,32 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from backend.data.fleet_generator import generate_dataset, generate_fleet
+
+REFERENCE = "2026-01-05 08:00"
+
+def test_generation_is_deterministic_per_seed_and_ignores_global_rng():
+    expected = generate_dataset(200, seed=7, reference=REFERENCE)
+
+    def generate(i):
+        np.random.seed(i)  # Other threads touching the global RNG must not matter
+        return generate_dataset(200, seed=7, reference=REFERENCE)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        for dataset in pool.map(generate, range(4)):
+            for name, frame in expected.items():
+                pd.testing.assert_frame_equal(dataset[name], frame)
+    assert not generate_fleet(200, seed=8, reference=REFERENCE).equals(expected["trainsets"])
+
+def test_large_fleet_columns_and_job_cards():
+    data = generate_dataset(100_000, seed=1, reference=REFERENCE)
+    fleet, jobs = data["trainsets"], data["jobcards"]
+    assert fleet["train_id"].is_unique and fleet["train_id"].iloc[0] == "KRISHNA"
+    assert fleet["dwell_time_seconds"].between(45, 89).all()
+    assert abs(fleet["certificate_valid"].mean() - 0.85) < 0.01
+    assert abs((fleet["location"] == "Muttom").mean() - 0.65) < 0.01
+    assert abs((fleet["weather_condition"] == "clear").mean() - 0.65) < 0.01
+    assert (pd.to_datetime(fleet["next_maintenance"]) > pd.to_datetime(fleet["last_maintenance"])).all()
+    assert jobs["train_id"].isin(fleet["train_id"]).all() and jobs["job_id"].is_unique
+    assert abs(len(jobs) / len(fleet) - 1.25) < 0.02
+    assert len(data["schedule_history"]) == 4 * len(fleet)
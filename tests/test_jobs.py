@@ -0,0 +1,65 @@
+import threading
+import time
+from flask import Flask
+import backend.api.jobs as jobs
+from backend.api.jobs import JobManager, JobStore, init_jobs
+
+def wait_for(client, job_id, statuses, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/api/jobs/{job_id}").get_json()
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} stuck in {job['status']}")
+
+def test_jobs_run_async_and_queued_jobs_can_be_cancelled(tmp_path):
+    gate = threading.Event()
+    runners = {"master": lambda params: (gate.wait(5), {"service": params["min_service"]})[1]}
+    app = Flask(__name__)
+    manager = init_jobs(app, runners=runners, max_workers=1, store=JobStore(str(tmp_path / "jobs.db")))
+    client = app.test_client()
+
+    first = client.post("/api/jobs", json={"params": {"min_service": 13}})
+    assert first.status_code == 202
+    first_id = first.get_json()["job"]["job_id"]
+    wait_for(client, first_id, ["running"])
+    second_id = client.post("/api/jobs", json={"min_service": 14}).get_json()["job"]["job_id"]
+    assert client.get("/api/jobs").get_json()["queue_depth"] == 1
+
+    assert client.delete(f"/api/jobs/{second_id}").get_json()["status"] == "cancelled"
+    gate.set()
+    done = wait_for(client, first_id, ["succeeded"])
+    assert done["result"] == {"service": 13} and done["run_seconds"] >= 0
+    stats = client.get("/api/jobs").get_json()
+    assert stats["jobs_by_status"] == {"cancelled": 1, "succeeded": 1}
+    assert client.get("/api/jobs/missing").status_code == 404
+    manager.shutdown()
+
+def test_job_state_survives_restart(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    store = JobStore(db_path)
+    store.insert("was-running", "master", {})
+    store.update("was-running", status="running", started_at=time.time())
+    store.insert("was-queued", "master", {"min_service": 12})
+
+    manager = JobManager(runners={"master": lambda params: params}, store=JobStore(db_path))
+    manager.shutdown(wait=True)
+    assert manager.get("was-running")["status"] == "interrupted"
+    assert manager.get("was-queued")["result"] == {"min_service": 12}
+
+def test_jobs_share_one_orchestrator_and_apps_keep_separate_databases(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(jobs, "_orchestrator", None)
+    assert jobs.get_orchestrator() is jobs.get_orchestrator()
+
+    runners = {"master": lambda params: params}
+    dashboard = init_jobs(Flask("dashboard"), runners=runners, db_path=str(tmp_path / "dashboard.db"))
+    dashboard.store.insert("in-flight", "master", {})
+    dashboard.store.update("in-flight", status="running", started_at=time.time())
+    # Starting the other app must not mark the dashboard's running job interrupted
+    backend = init_jobs(Flask("backend"), runners=runners, db_path=str(tmp_path / "backend.db"))
+    assert dashboard.get("in-flight")["status"] == "running"
+    assert backend.store.db_path.endswith("backend.db")
+    dashboard.shutdown()
+    backend.shutdown()
@@ -0,0 +1,133 @@
+import json
+import time
+import numpy as np
+import pandas as pd
+from backend.orchestrator import KMRLMasterOrchestrator
+
+def synthetic_fleet(n=10_000, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = [f"T{i:05d}" for i in range(n)]
+    train_df = pd.DataFrame({
+        "train_id": ids,
+        "trainset_id": ids,
+        "RollingStockFitnessStatus": rng.random(n) < 0.9,
+        "critical_jobs_open": rng.choice([0, 1, 2], n, p=[0.8, 0.15, 0.05]),
+    })
+    readiness = pd.DataFrame({
+        "ai_readiness_score": rng.uniform(0.3, 1.0, n).round(2),
+        "maintenance_recommendation": rng.choice(["Continue Operations", "Schedule Maintenance"], n, p=[0.9, 0.1]),
+    })
+    delay = pd.DataFrame({"predicted_delay_minutes": rng.exponential(2.5, n), "delay_category": "Low"})
+    picked = rng.choice(ids, n // 2)  # Includes repeats; the first row per train wins
+    pulp = {"details": pd.DataFrame({"trainset_id": picked, "selected_for_induction": rng.integers(0, 2, len(picked))})}
+    or_tools = {"assignments": {train_id: "Red Line" for train_id in rng.choice(ids, n // 3, replace=False)}}
+    return {"train_df": train_df}, delay, readiness, pulp, or_tools
+
+def reference_status(final_schedule, pulp_details, assigned, min_service):
+    final_schedule = final_schedule.copy()
+    final_schedule["pulp_selected"] = 0
+    for idx, train_id in enumerate(final_schedule["trainset_id"]):
+        rows = pulp_details[pulp_details["trainset_id"] == train_id]
+        if len(rows) > 0:
+            final_schedule.loc[idx, "pulp_selected"] = rows["selected_for_induction"].iloc[0]
+    final_schedule["or_tools_assigned"] = final_schedule["train_id"].isin(assigned).astype(int)
+    statuses = []
+    for _, row in final_schedule.iterrows():
+        votes = int(row["ai_readiness_score"] > 0.8) + int(row["pulp_selected"] == 1) + int(row["or_tools_assigned"] == 1)
+        if (not row["RollingStockFitnessStatus"] or row["critical_jobs_open"] > 0 or
+                row["maintenance_recommendation"] == "Schedule Maintenance"):
+            statuses.append("maintenance")
+        elif votes >= 2:
+            statuses.append("service")
+        elif votes >= 1 or row["ai_readiness_score"] > 0.7:
+            statuses.append("standby")
+        else:
+            statuses.append("maintenance")
+    final_schedule["final_operational_status"] = statuses
+    service_count = statuses.count("service")
+    if service_count < min_service:
+        top = final_schedule[final_schedule["final_operational_status"] == "standby"].nlargest(
+            min_service - service_count, "ai_readiness_score")
+        final_schedule.loc[top.index, "final_operational_status"] = "service"
+    return final_schedule["final_operational_status"].tolist()
+
+def test_vectorized_ensemble_matches_reference_loop():
+    orchestrator = KMRLMasterOrchestrator(use_cache=False)
+    data, delay, readiness, pulp, or_tools = synthetic_fleet()
+    start = time.perf_counter()
+    schedule = orchestrator._stage_ensemble({"min_service": 4000}, data, delay, readiness, pulp, or_tools)
+    assert time.perf_counter() - start < 0.5
+
+    joined = pd.concat([data["train_df"], delay, readiness], axis=1)
+    expected = reference_status(joined, pulp["details"], list(or_tools["assignments"]), 4000)
+    assert schedule["final_operational_status"].tolist() == expected
+    assert (schedule["final_operational_status"] == "service").sum() >= 4000
+
+def test_scenario_batch_shares_models_and_fans_out_tails(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    orchestrator = KMRLMasterOrchestrator(use_cache=False)
+    comparison, outputs, summary = orchestrator.run_scenario_batch([
+        {"name": "breakdown", "constraints": {"min_service": 13}, "scenario": {"type": "train_breakdown"}},
+        {"name": "weather", "constraints": {"min_service": 13}, "scenario": {"type": "weather_disruption"}},
+        {"name": "tight", "constraints": {"min_service": 20}},
+    ])
+    stages = summary["stages"]
+    assert summary["constraint_sets"] == 2
+    assert {"delay_model", "smart_ai", "ensemble[breakdown]", "ensemble[tight]"} <= set(stages)
+    assert "ensemble[weather]" not in stages and "emergency[weather]" in stages
+    assert comparison["variant"].tolist() == ["breakdown", "weather", "tight"]
+    assert {"data", "ensemble[tight]", "emergency[weather]"} <= {span["name"] for span in summary["trace"]["spans"]}
+    # Each variant draws backups from its own copy of the standby pool
+    assert outputs["breakdown"]["emergency_response"]["backup_trains"]
+    assert outputs["weather"]["emergency_response"]["backup_trains"]
+    assert outputs["tight"]["emergency_response"] is None
+    assert (outputs["tight"]["schedule"]["final_operational_status"] == "service").sum() >= \
+        (outputs["breakdown"]["schedule"]["final_operational_status"] == "service").sum()
+
+def test_standby_pool_keeps_dispatches_and_follows_night_decisions(tmp_path):
+    decisions = tmp_path / "night_decisions.json"
+    orchestrator = KMRLMasterOrchestrator(use_cache=False, night_decisions_path=str(decisions))
+    data = orchestrator._stage_data()
+    scenario = {"type": "train_breakdown"}
+    first = {t["train_id"] for t in orchestrator._stage_emergency(data, scenario)["backup_trains"]}
+    second = {t["train_id"] for t in orchestrator._stage_emergency(data, scenario)["backup_trains"]}
+    assert first and second and not first & second
+
+    # A re-sync (new fleet data) does not put dispatched trainsets back
+    pool = orchestrator.standby_pool
+    orchestrator.standby_pool_fingerprint = None
+    orchestrator._refresh_standby_pool(data["train_df"])
+    assert not (first | second) & {t["train_id"] for t in pool.peek(len(pool))}
+
+    # A new night-shift export reaches the pool on the next run
+    returned, held = sorted(first)[0], pool.peek(1)[0]["train_id"]
+    decisions.write_text(json.dumps({"train_decisions": {
+        "held_standby": [{"train_id": returned}], "held_maintenance": [{"train_id": held}]}}))
+    orchestrator._stage_emergency(data, {"type": "weather_disruption"})
+    assert returned in pool and held not in pool
+
+def test_abandoned_model_stages_leave_the_shared_models_alone(tmp_path, monkeypatch):
+    from backend.utils.stage_graph import CancelToken
+    monkeypatch.chdir(tmp_path)
+    orchestrator = KMRLMasterOrchestrator(use_cache=False)
+    data = orchestrator._stage_data()
+    smart_ai, predictor = orchestrator.smart_ai, orchestrator.delay_predictor
+    abandoned = CancelToken()
+    abandoned.cancel()
+
+    assert orchestrator._stage_smart_ai(data, cancel_token=abandoned)["source"] == "trained"
+    assert "data_fingerprint" not in orchestrator._stage_delay_model(data, cancel_token=abandoned)
+    assert orchestrator.smart_ai is smart_ai and smart_ai.delay_model is None
+    assert orchestrator.delay_predictor is predictor and not predictor.is_trained
+
+    assert orchestrator._stage_delay_model(data, cancel_token=CancelToken())["data_fingerprint"]
+    assert orchestrator.delay_predictor.is_trained and not predictor.is_trained
+
+def test_budgeted_solves_are_not_cached_for_later_runs():
+    from backend.utils.deadline import Deadline
+    orchestrator = KMRLMasterOrchestrator(use_cache=False)
+    constraints = {"min_service": 13}
+    cacheable = lambda deadline: {stage.cache_name: stage.cacheable
+                                  for stage in orchestrator._optimizer_stages(constraints, deadline)}
+    assert cacheable(None) == {"pulp": True, "or_tools": True, "ensemble": True}
+    assert cacheable(Deadline(5.0)) == {"pulp": False, "or_tools": False, "ensemble": True}
@@ -0,0 +1,46 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from backend.utils.shared_fleet import SharedFleetState, cow_view
+
+def fleet():
+    return pd.DataFrame({
+        "train_id": [f"T{i:03d}" for i in range(1000)],
+        "mileage_km": np.arange(1000, dtype=float) * 10,
+        "certificate_valid": np.arange(1000) % 7 != 0,
+        "status": np.where(np.arange(1000) % 5 == 0, "Maintenance", "Service"),
+    })
+
+def worker_summary(state):
+    return float(state["mileage_km"].sum()), int(state["certificate_valid"].sum()), state.column("status")[5]
+
+def test_workers_read_shared_columns_without_copies():
+    df = fleet()
+    with SharedFleetState.publish(df) as state:
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(worker_summary, [state, state]))
+        assert results[0] == (df["mileage_km"].sum(), df["certificate_valid"].sum(), "Maintenance")
+
+        view = state["mileage_km"]
+        with pytest.raises(ValueError):
+            view[0] = -1.0
+        frame = state.to_frame()
+        pd.testing.assert_frame_equal(frame.astype({"status": object, "train_id": object}), df,
+                                      check_dtype=False)
+        assert np.shares_memory(frame["mileage_km"].to_numpy(), view)
+
+        # Writes go to a private copy of that column only
+        mileage = state.writable("mileage_km")
+        mileage[0] = -1.0
+        assert state["mileage_km"][0] == 0.0
+        del view, frame
+
+def test_cow_view_leaves_source_frame_untouched():
+    df = fleet()
+    view = cow_view(df)
+    view["mileage_km"] = 0.0
+    view["delay_minutes"] = 1.0
+    assert df["mileage_km"].iloc[1] == 10.0 and "delay_minutes" not in df
+    # Columns the stage did not assign are not copied
+    assert np.shares_memory(view["certificate_valid"].to_numpy(), df["certificate_valid"].to_numpy())
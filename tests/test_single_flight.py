@@ -0,0 +1,57 @@
+import threading
+import time
+from backend.orchestrator import KMRLMasterOrchestrator
+from backend.utils.single_flight import SingleFlight, canonical_key, coalesce
+
+def run_concurrently(fn, args_list):
+    results = [None] * len(args_list)
+    def worker(i, args):
+        try:
+            results[i] = fn(*args)
+        except Exception as e:
+            results[i] = e
+    threads = [threading.Thread(target=worker, args=(i, args)) for i, args in enumerate(args_list)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_duplicates_share_one_execution():
+    calls = []
+    @coalesce()
+    def expensive(constraints):
+        calls.append(constraints)
+        time.sleep(0.2)
+        return {"service": constraints["min_service"]}
+
+    results = run_concurrently(expensive, [({"min_service": 13, "max_maintenance": 8},)] * 6 +
+                                          [({"max_maintenance": 8, "min_service": 13},)] * 2 +
+                                          [({"min_service": 14},)])
+    assert len(calls) == 2
+    assert all(result is results[0] for result in results[:8]) and results[8] == {"service": 14}
+    assert expensive.flight.stats() == {"in_flight": 0, "executions": 2, "shared": 7}
+    expensive({"min_service": 13})
+    assert len(calls) == 3  # Nothing is cached once the flight lands
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+    def boom():
+        time.sleep(0.1)
+        raise RuntimeError("solver crashed")
+    results = run_concurrently(lambda: flight.do("k", boom), [()] * 3)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.executions == 1 and flight.in_flight() == 0
+
+def test_orchestrator_entry_point_coalesces_identical_runs():
+    orchestrator = KMRLMasterOrchestrator(use_cache=False)
+    runs = []
+    def fake_run(constraints=None, scenario=None, budget_seconds=None):
+        runs.append(constraints)
+        time.sleep(0.2)
+        return "schedule", {"constraints": constraints}, None
+    orchestrator._run_master_optimization = fake_run
+    constraints = {"min_service": 13}
+    results = run_concurrently(orchestrator.run_master_optimization, [(constraints, None)] * 4)
+    assert len(runs) == 1 and len(set(map(id, results))) == 1
+    assert canonical_key({"a": 1, "b": 2}) == canonical_key({"b": 2, "a": 1})
@@ -0,0 +1,52 @@
+import pandas as pd
+from backend.utils.stage_cache import StageCache, fingerprint
+from backend.utils.stage_graph import Stage, StageGraph
+
+def build(cache, calls, frame, params):
+    def track(name, fn):
+        def run(**kwargs):
+            calls.append(name)
+            return fn(**kwargs)
+        return run
+    return StageGraph([
+        Stage("data", lambda: frame),
+        Stage("scores", track("scores", lambda data: data["load"] * 2), deps=["data"], cacheable=True),
+        Stage("plan", track("plan", lambda data: int(data["load"].sum()) + params["min_service"]),
+              deps=["data"], cacheable=True, params=params),
+        Stage("final", track("final", lambda scores, plan: float(scores.sum()) + plan),
+              deps=["scores", "plan"], cacheable=True, params=params),
+    ], cache=cache)
+
+def test_reruns_hit_and_changes_invalidate_only_downstream(tmp_path):
+    cache = StageCache(cache_dir=str(tmp_path))
+    frame = pd.DataFrame({"load": [1, 2, 3]})
+    calls = []
+    first = build(cache, calls, frame, {"min_service": 13}).run()
+    assert sorted(calls) == ["final", "plan", "scores"]
+
+    calls.clear()
+    again = build(cache, calls, frame.copy(), {"min_service": 13}).run()
+    assert calls == [] and again["final"].status == "cached"
+    assert again["final"].value == first["final"].value
+
+    calls.clear()
+    changed = build(cache, calls, frame, {"min_service": 14}).run()
+    assert sorted(calls) == ["final", "plan"] and changed["scores"].status == "cached"
+
+    # A fresh process starts from the on-disk tier
+    calls.clear()
+    build(StageCache(cache_dir=str(tmp_path)), calls, frame, {"min_service": 13}).run()
+    assert calls == []
+
+def test_fingerprint_follows_content_and_disk_tier_is_bounded(tmp_path):
+    frame = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    assert fingerprint(frame) == fingerprint(frame.copy())
+    assert fingerprint(frame) != fingerprint(frame.assign(a=[1, 3]))
+    assert fingerprint({"x": 1, "y": 2}) == fingerprint({"y": 2, "x": 1})
+
+    cache = StageCache(cache_dir=str(tmp_path), max_memory_items=2, max_disk_bytes=3000)
+    for i in range(10):
+        cache.put(f"k{i}", b"x" * 1000)
+    assert sum(p.stat().st_size for p in tmp_path.iterdir()) <= 3000
+    assert cache.get("k9")[0] and not cache.get("k0")[0]
+    assert cache.stats()["evictions"] > 0
@@ -0,0 +1,84 @@
+import time
+import pytest
+from backend.utils.stage_graph import Stage, StageGraph
+
+def sleepy(seconds, value):
+    def run(**_):
+        time.sleep(seconds)
+        return value
+    return run
+
+def test_independent_stages_overlap_and_receive_dependency_outputs():
+    graph = StageGraph([
+        Stage("data", lambda: 2),
+        Stage("a", lambda data: (time.sleep(0.2), data * 3)[1], deps=["data"]),
+        Stage("b", lambda data: (time.sleep(0.2), data + 1)[1], deps=["data"]),
+        Stage("total", lambda a, b: a + b, deps=["a", "b"]),
+    ])
+    start = time.perf_counter()
+    results = graph.run()
+    assert time.perf_counter() - start < 0.35
+    assert results["total"].value == 9 and results["total"].status == "ok"
+
+def test_failures_and_timeouts_are_isolated():
+    def boom(data):
+        raise RuntimeError("solver crashed")
+    graph = StageGraph([
+        Stage("data", lambda: 1),
+        Stage("broken", boom, deps=["data"]),
+        Stage("after_broken", lambda broken: broken, deps=["broken"]),
+        Stage("slow", sleepy(1.0, "late"), deps=["data"], timeout=0.1, fallback=lambda data: "cached"),
+        Stage("uses_slow", lambda slow: slow.upper(), deps=["slow"]),
+    ])
+    start = time.perf_counter()
+    results = graph.run()
+    assert time.perf_counter() - start < 0.5
+    assert results["broken"].status == "failed" and "solver crashed" in results["broken"].error
+    assert results["after_broken"].status == "skipped"
+    assert results["slow"].status == "degraded"
+    assert results["uses_slow"].value == "CACHED"
+
+def test_timed_out_stage_cannot_publish_after_its_fallback_is_used():
+    published = []
+    def train(data, cancel_token):
+        time.sleep(0.3)
+        cancel_token.commit(lambda: published.append("late model"))
+        return "trained"
+    results = StageGraph([
+        Stage("data", lambda: 1),
+        Stage("model", train, deps=["data"], timeout=0.1, fallback=lambda data: "previous", cancellable=True),
+        Stage("quick", lambda data, cancel_token: cancel_token.commit(lambda: published.append("quick")),
+              deps=["data"], timeout=1.0, cancellable=True),
+    ]).run()
+    assert results["model"].value == "previous" and results["quick"].value is True
+    time.sleep(0.4)
+    assert published == ["quick"]
+
+def test_timeouts_start_when_the_stage_starts_and_abandoned_threads_free_their_slot():
+    graph = StageGraph([
+        Stage("stuck", sleepy(0.6, "late"), timeout=0.1, fallback=lambda: "fallback"),
+        Stage("queued", sleepy(0.05, "done"), timeout=0.2),
+        Stage("after", sleepy(0.05, "done"), timeout=0.2),
+    ], max_workers=1)
+    results = graph.run()
+    assert results["stuck"].status == "degraded"
+    # Neither waits for the stuck thread, nor is charged for waiting its turn
+    assert results["queued"].status == results["after"].status == "ok"
+    assert results["after"].started < 0.4
+
+def test_outputs_rejected_by_cache_if_are_used_but_not_cached():
+    from backend.utils.stage_cache import StageCache
+    cache = StageCache(cache_dir=None)
+    def stages(status):
+        return [Stage("data", lambda: 1),
+                Stage("solve", lambda data: {"optimization_status": status}, deps=["data"], cacheable=True,
+                      cache_if=lambda result: result["optimization_status"] == "optimal")]
+    assert StageGraph(stages("feasible (time limit)"), cache=cache).run()["solve"].status == "ok"
+    assert StageGraph(stages("optimal"), cache=cache).run()["solve"].status == "ok"
+    assert StageGraph(stages("optimal"), cache=cache).run()["solve"].status == "cached"
+
+def test_cycles_and_unknown_dependencies_are_rejected():
+    with pytest.raises(ValueError):
+        StageGraph([Stage("a", lambda b: b, deps=["b"]), Stage("b", lambda a: a, deps=["a"])])
+    with pytest.raises(ValueError):
+        StageGraph([Stage("a", lambda missing: missing, deps=["missing"])])
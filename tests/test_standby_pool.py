@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from backend.models.ai_model import SmartMetroAI
+from backend.models.standby_pool import StandbyPool
+
+def standby_fleet(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "train_id": [f"T{i:03d}" for i in range(n)],
+        "readiness_score": rng.uniform(0.5, 1.0, n),
+        "location": rng.choice(["Muttom", "Kalamassery"], n),
+        "status": "Standby",
+    })
+
+def test_breakdown_backups_match_sorting_the_frame():
+    fleet = standby_fleet()
+    ai = SmartMetroAI()
+    expected = ai.emergency_response("train_breakdown", ["X"], ["Red Line"], fleet)["backup_trains"]
+
+    pool = StandbyPool()
+    pool.sync_from_frame(fleet)
+    response = ai.emergency_response("train_breakdown", ["X"], ["Red Line"], fleet, standby_pool=pool)
+    assert [t["train_id"] for t in response["backup_trains"]] == [t["train_id"] for t in expected]
+    assert len(pool) == len(fleet) - 2
+
+def test_pool_tracks_status_changes_and_depot_constraints(tmp_path):
+    pool = StandbyPool()
+    pool.upsert("KRISHNA", 0.95, depot="Muttom")
+    pool.upsert("TAPTI", 0.90, depot="Kalamassery")
+    pool.upsert("NILA", 0.85, depot="Muttom")
+    pool.upsert("KRISHNA", 0.70, depot="Muttom")
+
+    assert [t["train_id"] for t in pool.peek(3)] == ["TAPTI", "NILA", "KRISHNA"]
+    assert [t["train_id"] for t in pool.take(2, depot="Muttom", min_readiness=0.75)] == ["NILA"]
+    assert "NILA" not in pool and len(pool) == 2
+
+    pool.apply_night_decisions({"train_decisions": {
+        "held_maintenance": [{"train_id": "TAPTI"}],
+        "held_standby": [{"train_id": "PERIYAR", "location": "Kalamassery"}],
+    }})
+    assert [t["train_id"] for t in pool.take(5, depot="Kalamassery")] == ["PERIYAR"]
+    assert [t["train_id"] for t in pool.take(5)] == ["KRISHNA"]
+
+def test_sync_drops_trainsets_missing_from_the_frame():
+    fleet = standby_fleet(10)
+    pool = StandbyPool()
+    pool.sync_from_frame(fleet)
+    pool.sync_from_frame(fleet.iloc[3:])
+    assert len(pool) == 7 and "T000" not in pool and "T003" in pool
+
+    # Dispatched trainsets stay out until the frame shows them leaving standby
+    taken = pool.take(1)[0]["train_id"]
+    pool.sync_from_frame(fleet.iloc[3:])
+    assert taken not in pool and pool.dispatched() == [taken]
+    moved = fleet.iloc[3:].assign(status=lambda df: df["status"].mask(df["train_id"] == taken, "Active"))
+    pool.sync_from_frame(moved)
+    pool.sync_from_frame(fleet.iloc[3:])
+    assert taken in pool and pool.dispatched() == []
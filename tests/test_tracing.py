@@ -0,0 +1,36 @@
+import logging
+import time
+import pandas as pd
+from backend.utils.stage_graph import Stage, StageGraph
+from backend.utils.tracing import Tracer
+
+def busy(seconds):
+    end = time.thread_time() + seconds
+    while time.thread_time() < end:
+        pass
+
+def test_stage_graph_records_spans_with_cpu_and_input_sizes(tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    tracer = Tracer("test_pipeline")
+    results = StageGraph([
+        Stage("data", lambda: {"train_df": pd.DataFrame({"x": range(25)})}),
+        Stage("model", lambda data: busy(0.05) or "trained", deps=["data"]),
+        Stage("solver", lambda data: 1 / 0, deps=["data"], fallback=lambda data: "greedy"),
+    ], tracer=tracer).run()
+    assert results["solver"].value == "greedy"
+
+    spans = {span["name"]: span for span in tracer.spans()}
+    assert set(spans) == {"data", "model", "solver", "solver:fallback"}
+    assert spans["model"]["inputs"] == {"data.train_df": 25}
+    assert spans["model"]["cpu_seconds"] >= 0.04 and spans["model"]["end"] >= spans["model"]["start"]
+    assert spans["solver"]["status"] == "error" and "ZeroDivisionError" in spans["solver"]["error"]
+
+    logger = logging.getLogger("test_tracing")
+    with caplog.at_level(logging.INFO, logger="test_tracing"):
+        report = tracer.log(logger)
+    assert len(report["spans"]) == 4
+    assert any(record.getMessage().startswith("PERF | test_pipeline.model |") for record in caplog.records)
+
+    # The system logger prints through its own handlers only, not again via the root logger
+    from backend.utils.logger import system_logger
+    assert system_logger.propagate is False